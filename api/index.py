@@ -1,37 +1,19 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-import os
+"""Serverless (Vercel) entry point.
 
-app = FastAPI(title="EduAlert")
+Mounts the full backend application. Routers are included lazily per route
+group so a cold start for /health or /auth/login does not import pandas or
+scikit-learn, and page files are served from an in-memory cache.
+"""
+import os
+import sys
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
 
-@app.get("/")
-async def root():
-    try:
-        with open("static/complete_frontend.html", "r", encoding="utf-8") as f:
-            content = f.read()
-        return HTMLResponse(content=content)
-    except Exception as e:
-        return {"error": str(e), "message": "File not found"}
+# The backend resolves its SQLite databases and static files relative to
+# the working directory
+os.chdir(BACKEND_DIR)
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
+from app_factory import create_app
 
-@app.get("/test")
-async def test():
-    files = []
-    try:
-        files = os.listdir(".")
-        static_files = os.listdir("static") if os.path.exists("static") else []
-        return {"files": files, "static_files": static_files}
-    except Exception as e:
-        return {"error": str(e), "files": files}
\ No newline at end of file
+app = create_app(lazy_routers=True)
@@ -2,10 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel
 from typing import Optional
-from auth.auth import AuthService, User, UserRole, get_current_user
+from auth.auth import User, UserRole, get_current_user
+from utils.services import services
 
 router = APIRouter()
-auth_service = AuthService()
 
 class LoginRequest(BaseModel):
     username: str
@@ -25,7 +25,7 @@ class UserInfo(BaseModel):
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Authenticate user and return JWT token"""
-    user = auth_service.authenticate_user(request.username, request.password)
+    user = services.auth.authenticate_user(request.username, request.password)
     
     if not user:
         raise HTTPException(
@@ -34,7 +34,7 @@ async def login(request: LoginRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = auth_service.create_access_token(user)
+    access_token = services.auth.create_access_token(user)
     
     # Login successful
     
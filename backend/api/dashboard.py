@@ -1,5 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from auth.auth import User, UserRole, get_current_user
+from models.risk_engine import COMPONENTS, RiskEngine
+from models.risk_history import combine_trends, daily_trend, student_trajectory
+from utils.parallel import map_tenants, reduce_partials
+from utils.services import services
 import sqlite3
 import pandas as pd
 
@@ -64,53 +68,40 @@ def get_college_stats(college_id: str):
 def get_all_colleges_stats():
     """Get aggregated statistics for all colleges"""
     colleges = ['gpj', 'geca', 'rtu', 'itij', 'polu']
-    total_students = 0
-    total_high_risk = 0
-    combined_risk_dist = {}
-    combined_dept_dist = {}
-    college_breakdown = {}
     
-    for college_id in colleges:
-        stats = get_college_stats(college_id)
-        college_breakdown[college_id] = stats
-        
-        total_students += stats['total_students']
-        total_high_risk += stats['high_risk_count']
-        
-        # Combine risk distributions
-        for risk, count in stats['risk_distribution'].items():
-            combined_risk_dist[risk] = combined_risk_dist.get(risk, 0) + count
-        
-        # Combine department distributions
-        for dept, count in stats['department_distribution'].items():
-            combined_dept_dist[dept] = combined_dept_dist.get(dept, 0) + count
+    # Read every college database in parallel, then reduce
+    per_college = map_tenants(get_college_stats, colleges)
+    for college_id, error in per_college.errors.items():
+        print(f"Error getting stats for {college_id}: {error}")
+    empty = {'total_students': 0, 'high_risk_count': 0, 'risk_distribution': {}, 'department_distribution': {}}
+    college_breakdown = {college_id: per_college.results.get(college_id, empty) for college_id in colleges}
     
+    totals = reduce_partials(college_breakdown.values(), counts=['total_students', 'high_risk_count'],
+                             distributions=['risk_distribution', 'department_distribution'])
     return {
-        'total_students': total_students,
-        'high_risk_count': total_high_risk,
-        'risk_distribution': combined_risk_dist,
-        'department_distribution': combined_dept_dist,
+        **totals,
         'college_breakdown': college_breakdown,
         'total_colleges': len(colleges)
     }
 
+def read_college_students(college_id: str):
+    """All students of one college, highest risk first"""
+    with sqlite3.connect(f"{college_id}_students.db") as conn:
+        query = "SELECT * FROM students ORDER BY risk_score DESC"
+        return pd.read_sql_query(query, conn).to_dict('records')
+
 def get_students_for_user(user: User, limit: int = 100):
     """Get students based on user role"""
     students = []
     
     if user.role == UserRole.GOVERNMENT_ADMIN:
         colleges = ['gpj', 'geca', 'rtu', 'itij', 'polu']
+        per_college = map_tenants(read_college_students, colleges)
         for college_id in colleges:
-            db_path = f"{college_id}_students.db"
-            try:
-                with sqlite3.connect(db_path) as conn:
-                    query = "SELECT * FROM students ORDER BY risk_score DESC"
-                    df = pd.read_sql_query(query, conn)
-                    college_students = df.to_dict('records')
-                    students.extend(college_students)
-            except Exception as e:
-                print(f"Error reading {college_id}: {e}")
+            if college_id in per_college.errors:
+                print(f"Error reading {college_id}: {per_college.errors[college_id]}")
                 continue
+            students.extend(per_college.results[college_id])
     else:
         db_path = f"{user.college_id}_students.db"
         try:
@@ -239,6 +230,9 @@ async def get_active_alerts(current_user: User = Depends(get_current_user)):
                     "marks": marks,
                     "risk_score": risk_score,
                     "risk_level": risk_level,
+                    "risk_areas": [c for c in COMPONENTS if student.get(f'{c}_risk_level') in ('High', 'Critical')],
+                    "recommendations": (RiskEngine.recommendations_from_codes(student['recommendation_codes'])
+                                        if pd.notna(student.get('recommendation_codes')) else []),
                     "created_at": "2024-01-15T10:30:00Z",
                     "status": "active"
                 }
@@ -269,7 +263,7 @@ async def get_active_alerts(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Failed to retrieve alerts")
 
 @dashboard_router.get("/dashboard/trends")
-async def get_risk_trends(current_user: User = Depends(get_current_user)):
+async def get_risk_trends(current_user: User = Depends(get_current_user), days: int = 90):
     """Get risk trends and patterns"""
     try:
         # Get stats and students based on user permissions
@@ -288,12 +282,19 @@ async def get_risk_trends(current_user: User = Depends(get_current_user)):
                 'risk_percentage': (high_risk_in_dept / total_in_dept * 100) if total_in_dept > 0 else 0
             }
         
+        # Daily curves from the per-college risk history and college_stats
+        colleges = [current_user.college_id] if current_user.role != UserRole.GOVERNMENT_ADMIN else ['gpj', 'geca', 'rtu', 'itij', 'polu']
+        per_college = map_tenants(lambda college_id: daily_trend(f"{college_id}_students.db", days), colleges)
+        trends = [per_college.results.get(college_id, []) for college_id in colleges]
+        
         return {
             "department_risk_analysis": department_risk,
             "overall_trends": {
                 "total_students": stats['total_students'],
                 "risk_distribution": stats['risk_distribution']
-            }
+            },
+            "daily_trend": trends[0] if len(trends) == 1 else combine_trends(trends),
+            "daily_stats": {college_id: services.multi_db.get_college_daily_stats(college_id, days) for college_id in colleges}
         }
         
     except ZeroDivisionError:
@@ -345,6 +346,16 @@ async def get_student_details(student_id: str, current_user: User = Depends(get_
         print(f"Student details error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve student details")
 
+@dashboard_router.get("/student/{student_id}/risk-history")
+async def get_student_risk_history(student_id: str, current_user: User = Depends(get_current_user)):
+    """Recorded risk score changes for one student, oldest first"""
+    colleges = [current_user.college_id] if current_user.role != UserRole.GOVERNMENT_ADMIN else ['gpj', 'geca', 'rtu', 'itij', 'polu']
+    for college_id in colleges:
+        history = student_trajectory(f"{college_id}_students.db", student_id)
+        if history:
+            return {"student_id": student_id, "college_id": college_id, "history": history}
+    raise HTTPException(status_code=404, detail="No risk history for this student")
+
 @dashboard_router.get("/dashboard/recommendations")
 async def get_system_recommendations(current_user: User = Depends(get_current_user)):
     """Get system-wide recommendations"""
@@ -0,0 +1,113 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, Dict, Optional
+
+from auth.auth import User, UserRole, get_current_user
+from utils.services import services
+
+ml_router = APIRouter()
+
+def require_government_admin(current_user: User):
+    if current_user.role != UserRole.GOVERNMENT_ADMIN:
+        raise HTTPException(status_code=403, detail="Only government admins can manage models")
+
+@ml_router.post("/ml/train")
+async def start_training(
+    search: bool = False,
+    max_candidates: Optional[int] = Query(None, ge=1, le=100),
+    folds: Optional[int] = Query(None, ge=2, le=10),
+    cpu_budget_s: Optional[float] = Query(None, gt=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a full retrain on all stored students; with search=true, tune the forest by cross-validation first"""
+    require_government_admin(current_user)
+    options = None
+    if search:
+        options = {name: value for name, value in
+                   [('max_candidates', max_candidates), ('folds', folds), ('cpu_budget_s', cpu_budget_s)]
+                   if value is not None}
+    job_id = services.training.submit(reason=f"manual:{current_user.username}", search=options)
+    return {"job_id": job_id, "status": "queued"}
+
+@ml_router.get("/ml/training/{job_id}")
+async def get_training_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Status, metrics and resulting model version of a training job"""
+    job = services.training.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@ml_router.get("/ml/models")
+async def list_models(current_user: User = Depends(get_current_user)):
+    """Registered model versions with their metrics, newest first"""
+    registry = services.model_registry
+    return {"active_version": registry.active_version(), "models": registry.versions()}
+
+@ml_router.post("/ml/models/{version}/promote")
+async def promote_model(version: str, current_user: User = Depends(get_current_user)):
+    """Make a registered version the active model (or roll back to an older one)"""
+    require_government_admin(current_user)
+    try:
+        services.model_registry.promote(version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    services.use_model(version)
+    return {"active_version": version}
+
+@ml_router.post("/ml/predict")
+async def predict_student(student: Dict[str, Any], current_user: User = Depends(get_current_user)):
+    """ML risk prediction for one student; concurrent calls are micro-batched"""
+    if not services.ml_predictor.is_trained:
+        raise HTTPException(status_code=503, detail="No trained model is active yet")
+    try:
+        return await services.inference.predict_async(student)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@ml_router.get("/ml/colleges/{college_id}/predictions")
+async def predict_college(
+    college_id: str,
+    limit: int = Query(100, ge=0, le=5000),
+    current_user: User = Depends(get_current_user)
+):
+    """ML risk of every student of a college from its stored features; the `limit` most at-risk are listed"""
+    import sqlite3
+    import numpy as np
+    from models.rescoring import tenant_databases
+
+    if current_user.role != UserRole.GOVERNMENT_ADMIN and current_user.college_id != college_id:
+        raise HTTPException(status_code=403, detail="Access denied to this college")
+    db_path = tenant_databases().get(college_id)
+    if db_path is None:
+        raise HTTPException(status_code=404, detail="College not found")
+    predictor, store = services.ml_predictor, services.feature_store
+    if store is None:
+        raise HTTPException(status_code=503, detail="No trained model is active yet")
+
+    features, rowids = store.features(college_id, db_path)
+    probabilities, predicted, _ = predictor.predict_features(features)
+    classes = list(predictor.rf_model.classes_)
+    at_risk = sum((probabilities[:, classes.index(level)] for level in ('High', 'Critical') if level in classes),
+                  np.zeros(len(rowids)))
+    top = np.argsort(-at_risk, kind='stable')[:limit]
+
+    with sqlite3.connect(db_path) as conn:
+        placeholders = ', '.join('?' * len(top))
+        student_ids = dict(conn.execute(f"SELECT rowid, student_id FROM students WHERE rowid IN ({placeholders})",
+                                        [int(rowids[i]) for i in top]).fetchall())
+    levels, counts = np.unique(predicted, return_counts=True)
+    return {
+        "college_id": college_id,
+        "model_version": predictor.version,
+        "total_students": len(rowids),
+        "predicted_distribution": {str(level): int(count) for level, count in zip(levels, counts)},
+        "at_risk": [
+            {"student_id": student_ids.get(int(rowids[i])), "predicted_risk": str(predicted[i]),
+             "at_risk_probability": float(at_risk[i])}
+            for i in top
+        ]
+    }
+
+@ml_router.get("/ml/inference-stats")
+async def get_inference_stats(current_user: User = Depends(get_current_user)):
+    """Batch-size and latency histograms of the micro-batcher in this worker"""
+    return services.inference.stats()
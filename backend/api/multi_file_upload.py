@@ -3,10 +3,17 @@ from typing import List, Dict, Any
 import pandas as pd
 import io
 from auth.auth import User, get_current_user
+from models.risk_history import ensure_baseline, record_snapshot
+from models.risk_rules import RISK_LEVELS, compile_profile
+from utils.csv_sniffer import read_csv
+from utils.services import services
 import sqlite3
 
 router = APIRouter()
 
+# Linear attendance/marks/fees scoring used for 3-file uploads
+multi_factor_rules = compile_profile('multi_factor')
+
 @router.post("/upload-multi-files")
 async def upload_multi_files(
     attendance_file: UploadFile = File(...),
@@ -42,34 +49,10 @@ async def upload_multi_files(
             if len(content) > max_size:
                 raise HTTPException(status_code=400, detail=f"{file_type} file too large. Max: 10MB")
         
-        # Safe decode function for different encodings
-        def safe_decode(content):
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    return content.decode(encoding)
-                except UnicodeDecodeError:
-                    continue
-            return content.decode('utf-8', errors='ignore')
-        
-        # Parse CSV files with robust error handling
+        # Parse CSV files: encoding and separator sniffed from the start of each file, then one parse
         def parse_csv_robust(content, filename):
-            # Try different encodings and separators
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            separators = [',', ';', '\t']
-            
-            for encoding in encodings:
-                for sep in separators:
-                    try:
-                        df = pd.read_csv(io.BytesIO(content), encoding=encoding, sep=sep, on_bad_lines='skip')
-                        if len(df.columns) > 1 and len(df) > 0:
-                            return df
-                    except:
-                        continue
-            
-            # Fallback: try with error handling
             try:
-                df = pd.read_csv(io.BytesIO(content), encoding='utf-8', on_bad_lines='skip', sep=None, engine='python')
-                return df
+                return read_csv(content, on_bad_lines='skip')
             except Exception as e:
                 raise ValueError(f"Could not parse {filename}: {str(e)}")
         
@@ -94,8 +77,9 @@ async def upload_multi_files(
         merged_df = merged_df.merge(fees_df, on='student_id', how='outer')
         
         # Calculate risk scores based on multiple factors
-        merged_df['risk_score'] = calculate_multi_factor_risk(merged_df)
-        merged_df['risk_level'] = merged_df['risk_score'].apply(categorize_risk)
+        scores = multi_factor_rules.evaluate_frame(merged_df)
+        merged_df['risk_score'] = scores['composite_score']
+        merged_df['risk_level'] = RISK_LEVELS[scores['risk_level']]
         
         # Determine college from user or student_id
         if current_user.role.value == 'government_admin':
@@ -121,7 +105,11 @@ async def upload_multi_files(
         db_path = f"{college_id}_students.db"
         
         with sqlite3.connect(db_path) as conn:
+            ensure_baseline(conn)
             merged_df.to_sql('students', conn, if_exists='replace', index=False)
+            record_snapshot(conn, merged_df, complete=True)
+        services.multi_db.update_government_stats(college_id)
+        services.refresh_features_later(college_id, db_path)
         
         # Generate summary statistics
         summary = {
@@ -152,35 +140,12 @@ def calculate_multi_factor_risk(df: pd.DataFrame) -> pd.Series:
     Calculate risk score based on attendance, marks, and fees
     As per SIH requirements for early intervention
     """
-    risk_scores = pd.Series(0, index=df.index)
-    
-    # Attendance risk (40% weight)
-    attendance_risk = (100 - df['attendance_percentage'].fillna(50)) * 0.4
-    
-    # Academic risk (35% weight) 
-    marks_risk = (100 - df['marks'].fillna(50)) * 0.35
-    
-    # Financial risk (25% weight)
-    fees_risk = pd.Series(0, index=df.index)
-    fees_risk[df['payment_status'] == 'Pending'] = 25
-    fees_risk[df['fees_due'] > 20000] += 15
-    fees_risk[df['fees_due'] > 30000] += 10
-    
-    # Combined risk score
-    risk_scores = attendance_risk + marks_risk + fees_risk
-    
-    return risk_scores.clip(0, 100)
+    scores = multi_factor_rules.evaluate_frame(df)
+    return pd.Series(scores['composite_score'], index=df.index)
 
 def categorize_risk(score: float) -> str:
     """Categorize risk score into levels"""
-    if score >= 80:
-        return 'Critical'
-    elif score >= 65:
-        return 'High'
-    elif score >= 45:
-        return 'Medium'
-    else:
-        return 'Low'
+    return multi_factor_rules.level(score)
 
 @router.get("/sample-format")
 async def get_sample_format():
@@ -3,16 +3,15 @@ from typing import List, Dict, Optional
 import pandas as pd
 import io
 import sqlite3
-from models.multi_tenant_db import MultiTenantDatabase
-from models.risk_engine import RiskEngine
 from auth.auth import User, get_current_user
+from models.database import ensure_columns
+from models.risk_engine import BREAKDOWN_COLUMNS, records_frame
+from models.risk_history import ensure_baseline, record_snapshot
+from utils.csv_sniffer import read_csv
+from utils.services import services
 
 multi_upload_router = APIRouter()
 
-# Global instances
-multi_db = MultiTenantDatabase()
-risk_engine = RiskEngine()
-
 @multi_upload_router.post("/multi-upload")
 async def process_multi_files(
     attendance_file: Optional[UploadFile] = File(None),
@@ -83,7 +82,7 @@ async def process_file(file: UploadFile, file_type: str) -> pd.DataFrame:
         
         # Determine file format and read
         if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
+            df = read_csv(content)
         elif file.filename.endswith(('.xlsx', '.xls')):
             df = pd.read_excel(io.BytesIO(content))
         else:
@@ -190,29 +189,25 @@ def calculate_multi_area_risks(merged_data: List[Dict]) -> Dict:
             perfect_matches += 1
         elif data_completeness >= 2:
             partial_matches += 1
-        
-        # Calculate risk if we have enough data
-        if data_completeness >= 2:
-            try:
-                risk_result = risk_engine.calculate_risk_score(student)
-                multi_area_result = risk_engine.detect_multi_area_risk(student)
-                
-                # Update student record with risk data
-                student['risk_score'] = risk_result['composite_score']
-                student['risk_level'] = risk_result['risk_level']
-                student['multi_area_risk'] = multi_area_result['is_multi_area_risk']
-                student['risk_areas_count'] = multi_area_result['risk_areas_count']
-                
-                # Count risk levels
-                risk_breakdown[risk_result['risk_level']] += 1
-                
-                # Count multi-area risks
-                if multi_area_result['is_multi_area_risk']:
-                    multi_area_risks += 1
-                    
-            except Exception as e:
-                print(f"Error calculating risk for student {student['student_id']}: {e}")
-                student['risk_level'] = 'Unknown'
+    
+    # Calculate risk if we have enough data: one vectorized pass for the upload
+    scored = [student for student in merged_data if student.get('data_completeness', 0) >= 2]
+    if scored:
+        try:
+            assessed = services.risk_engine.assess_batch(records_frame(scored), with_breakdown=True)
+            columns = ['risk_score', 'risk_level', 'multi_area_risk', 'risk_areas_count'] + list(BREAKDOWN_COLUMNS)
+            for student, risk_data in zip(scored, assessed[columns].to_dict('records')):
+                student.update(risk_data)
+        except Exception as e:
+            print(f"Batch risk assessment failed, scoring students individually: {e}")
+            for student in scored:
+                assess_student(student)
+    
+    for student in scored:
+        if student['risk_level'] in risk_breakdown:
+            risk_breakdown[student['risk_level']] += 1
+        if student.get('multi_area_risk'):
+            multi_area_risks += 1
     
     data_completeness_pct = round((perfect_matches / total_students) * 100, 1) if total_students > 0 else 0
     
@@ -227,6 +222,21 @@ def calculate_multi_area_risks(merged_data: List[Dict]) -> Dict:
         'multi_area_percentage': round((multi_area_risks / total_students) * 100, 1) if total_students > 0 else 0
     }
 
+def assess_student(student: Dict):
+    """Score one merged record in place (fallback when the batch pass fails)"""
+    try:
+        assessment = services.risk_engine.assess(student)
+        
+        # Update student record with risk data
+        student['risk_score'] = assessment['composite_score']
+        student['risk_level'] = assessment['risk_level']
+        student['multi_area_risk'] = assessment['multi_area']['is_multi_area_risk']
+        student['risk_areas_count'] = assessment['multi_area']['risk_areas_count']
+        student.update(services.risk_engine.breakdown_columns(assessment))
+    except Exception as e:
+        print(f"Error calculating risk for student {student['student_id']}: {e}")
+        student['risk_level'] = 'Unknown'
+
 def store_merged_data(merged_data: List[Dict], session_id: str, college_code: str = None) -> int:
     """Store merged data in database"""
     try:
@@ -261,7 +271,8 @@ def store_merged_data(merged_data: List[Dict], session_id: str, college_code: st
                 'family_education': 'Graduate',
                 'distance_from_college': 10,
                 'practical_marks_available': 'No',
-                'practical_marks': 0
+                'practical_marks': 0,
+                **{column: student.get(column) for column in BREAKDOWN_COLUMNS}
             }
             students_list.append(db_student)
         
@@ -276,7 +287,7 @@ def store_merged_data(merged_data: List[Dict], session_id: str, college_code: st
                 # Initialize college database if it doesn't exist
                 init_college_db(db_path)
             else:
-                db_path = db.db_path
+                db_path = services.db.db_path
             
             conn = sqlite3.connect(db_path)
             
@@ -290,8 +301,16 @@ def store_merged_data(merged_data: List[Dict], session_id: str, college_code: st
             new_students = students_df[~students_df['student_id'].isin(existing_ids)]
             
             if len(new_students) > 0:
+                if college_code:
+                    ensure_baseline(conn)
                 new_students.to_sql('students', conn, if_exists='append', index=False)
+                if college_code:
+                    record_snapshot(conn, new_students)
+                    conn.commit()
                 conn.close()
+                if college_code:
+                    services.multi_db.update_government_stats(college_code)
+                services.refresh_features_later(college_code or 'main', db_path)
                 print(f"Successfully stored {len(new_students)} new students to {college_code or 'main'} database (skipped {len(students_list) - len(new_students)} duplicates)")
                 return len(new_students)
             else:
@@ -362,6 +381,7 @@ def init_college_db(db_path: str):
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
     
     conn.commit()
     conn.close()
@@ -0,0 +1,133 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+
+from auth.auth import User, UserRole, get_current_user
+from utils.services import services
+
+risk_router = APIRouter()
+
+class RiskConfigUpdate(BaseModel):
+    thresholds: Dict[str, Dict[str, float]] = {}
+    weights: Dict[str, float] = {}
+
+class SimulationCondition(BaseModel):
+    field: str
+    op: str = "=="
+    value: Union[float, str]
+
+class Perturbation(BaseModel):
+    field: str
+    op: str = "add"
+    value: Union[float, str]
+    where: List[SimulationCondition] = []
+
+class SimulationRequest(BaseModel):
+    perturbations: List[Perturbation]
+    college_id: Optional[str] = None
+
+def require_government_admin(current_user: User):
+    if current_user.role != UserRole.GOVERNMENT_ADMIN:
+        raise HTTPException(status_code=403, detail="Only government admins can change risk scoring")
+
+@risk_router.get("/risk/cache-stats")
+async def get_risk_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit rate of the risk scoring memo for this worker"""
+    return services.risk_engine.cache_info()
+
+@risk_router.get("/risk/config")
+async def get_risk_config(current_user: User = Depends(get_current_user)):
+    """Current thresholds, weights and their version"""
+    engine = services.risk_engine
+    return {"thresholds": engine.thresholds, "weights": engine.weights, "risk_version": engine.version}
+
+@risk_router.put("/risk/config")
+async def update_risk_config(
+    update: RiskConfigUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Change thresholds/weights, persist them and rescore every college in the background"""
+    from models.rescoring import run_job, start_rescoring
+
+    require_government_admin(current_user)
+    engine = services.risk_engine
+
+    unknown = [f"thresholds.{c}.{t}" for c, values in update.thresholds.items() for t in values
+               if t not in engine.thresholds.get(c, {})]
+    unknown += [f"weights.{c}" for c in update.weights if c not in engine.weights]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown risk settings: {', '.join(unknown)}")
+
+    services.db.save_risk_overrides(update.thresholds, update.weights)
+    engine.update_thresholds(update.thresholds)
+    engine.update_weights(update.weights)
+
+    job_id = start_rescoring(engine)
+    background_tasks.add_task(run_job, job_id)
+    services.multi_db.log_user_action(current_user, "UPDATE_RISK_CONFIG", f"rescoring_{job_id}")
+
+    return {
+        "success": True,
+        "risk_version": engine.version,
+        "rescoring_job_id": job_id
+    }
+
+@risk_router.post("/risk/simulate")
+async def simulate_risk(request: SimulationRequest, current_user: User = Depends(get_current_user)):
+    """Rescore a cohort in memory under perturbed inputs; nothing is saved"""
+    import pandas as pd
+    from models.rescoring import tenant_databases
+    from models.simulation import load_cohort, simulate, validate_perturbations
+
+    perturbations = [p.dict() for p in request.perturbations]
+    errors = validate_perturbations(perturbations)
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+
+    databases = tenant_databases()
+    if current_user.role == UserRole.GOVERNMENT_ADMIN:
+        colleges = [request.college_id] if request.college_id else list(databases)
+    else:
+        if request.college_id and request.college_id != current_user.college_id:
+            raise HTTPException(status_code=403, detail="Can only simulate your own college")
+        colleges = [current_user.college_id]
+    if any(c not in databases for c in colleges):
+        raise HTTPException(status_code=404, detail="College database not found")
+
+    cohorts = [load_cohort(databases[c]) for c in colleges]
+    df = cohorts[0] if len(cohorts) == 1 else pd.concat(cohorts, ignore_index=True)
+    result = simulate(services.risk_engine, df, perturbations)
+    result['colleges'] = colleges
+    result['risk_version'] = services.risk_engine.version
+    return result
+
+@risk_router.get("/risk/rescoring/{job_id}")
+async def get_rescoring_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Progress of a rescoring job"""
+    from models.rescoring import get_job
+
+    require_government_admin(current_user)
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rescoring job not found")
+    return job
+
+@risk_router.post("/risk/rescoring/{job_id}/resume")
+async def resume_rescoring_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Continue an interrupted or failed job from its checkpoints"""
+    from models.rescoring import get_job, run_job
+
+    require_government_admin(current_user)
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rescoring job not found")
+    if job['status'] == 'completed':
+        return {"success": True, "message": "Job already completed", "job": job}
+
+    background_tasks.add_task(run_job, job_id)
+    return {"success": True, "message": "Rescoring resumed", "rescoring_job_id": job_id}
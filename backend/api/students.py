@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from typing import Dict, List, Optional
 
 from auth.auth import User, UserRole, get_current_user, require_role
+from utils.parallel import map_tenants
+from utils.services import services
 
 students_router = APIRouter()
 
@@ -38,17 +40,14 @@ async def get_students(
             if college:
                 colleges = [college]
             
+            from api.dashboard import read_college_students
+            
+            per_college = map_tenants(read_college_students, colleges)
             for college_id in colleges:
-                db_path = f"{college_id}_students.db"
-                try:
-                    with sqlite3.connect(db_path) as conn:
-                        query = "SELECT * FROM students ORDER BY risk_score DESC"
-                        df = pd.read_sql_query(query, conn)
-                        college_students = df.to_dict('records')
-                        students.extend(college_students)
-                except Exception as e:
-                    print(f"Error reading {college_id}: {e}")
+                if college_id in per_college.errors:
+                    print(f"Error reading {college_id}: {per_college.errors[college_id]}")
                     continue
+                students.extend(per_college.results[college_id])
         else:
             # College admin sees only their students
             db_path = f"{current_user.college_id}_students.db"
@@ -94,7 +93,7 @@ async def get_student(
         # Check access permissions
         if current_user.role != UserRole.GOVERNMENT_ADMIN:
             # College users can only access their own students
-            db_path = multi_db.get_college_database_path(current_user.college_id)
+            db_path = services.multi_db.get_college_database_path(current_user.college_id)
             import sqlite3
             with sqlite3.connect(db_path) as conn:
                 cursor = conn.cursor()
@@ -104,10 +103,10 @@ async def get_student(
                     raise HTTPException(status_code=403, detail="Access denied to this student")
         
         # Log access
-        multi_db.log_user_action(current_user, "VIEW_STUDENT", f"student_{student_id}")
+        services.multi_db.log_user_action(current_user, "VIEW_STUDENT", f"student_{student_id}")
         
         # Get student from appropriate database
-        db_path = multi_db.get_database_for_user(current_user)
+        db_path = services.multi_db.get_database_for_user(current_user)
         import sqlite3
         import pandas as pd
         
@@ -120,12 +119,16 @@ async def get_student(
             
             student = df.iloc[0].to_dict()
         
-        # Calculate detailed risk breakdown
-        risk_breakdown = risk_engine.calculate_risk_score(student)
+        # Risk breakdown stored at ingestion; rescored only if stale
+        risk_breakdown = services.risk_engine.get_breakdown(student)
+        
+        # ML prediction and its per-feature explanation, stored when the student was scored
+        from models.prediction_store import get_prediction
         
         return {
             "student": student,
-            "risk_breakdown": risk_breakdown
+            "risk_breakdown": risk_breakdown,
+            "ml_prediction": get_prediction(db_path, student_id)
         }
         
     except HTTPException:
@@ -138,7 +141,7 @@ async def update_student(student_id: str, updates: StudentUpdate):
     """Update student data and recalculate risk"""
     try:
         # Get current student data
-        current_student = db.get_student_by_id(student_id)
+        current_student = services.db.get_student_by_id(student_id)
         
         if not current_student:
             raise HTTPException(status_code=404, detail="Student not found")
@@ -150,26 +153,27 @@ async def update_student(student_id: str, updates: StudentUpdate):
             raise HTTPException(status_code=400, detail="No valid updates provided")
         
         # Update student in database
-        success = db.update_student(student_id, update_dict)
+        success = services.db.update_student(student_id, update_dict)
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update student")
         
         # Get updated student data
-        updated_student = db.get_student_by_id(student_id)
+        updated_student = services.db.get_student_by_id(student_id)
         
         # Recalculate risk score
-        risk_data = risk_engine.calculate_risk_score(updated_student)
+        risk_data = services.risk_engine.calculate_risk_score(updated_student)
         
         # Update risk score in database
         risk_updates = {
             'risk_score': risk_data['composite_score'],
-            'risk_level': risk_data['risk_level']
+            'risk_level': risk_data['risk_level'],
+            **services.risk_engine.breakdown_columns(risk_data)
         }
-        db.update_student(student_id, risk_updates)
+        services.db.update_student(student_id, risk_updates)
         
         # Get final updated data
-        final_student = db.get_student_by_id(student_id)
+        final_student = services.db.get_student_by_id(student_id)
         
         return {
             "success": True,
@@ -189,10 +193,10 @@ async def get_high_risk_students():
     """Get students with high or critical risk levels"""
     try:
         filters = {'risk_level': 'High'}
-        high_risk = db.get_students_by_filter(filters)
+        high_risk = services.db.get_students_by_filter(filters)
         
         filters = {'risk_level': 'Critical'}
-        critical_risk = db.get_students_by_filter(filters)
+        critical_risk = services.db.get_students_by_filter(filters)
         
         return {
             "high_risk": high_risk,
@@ -232,17 +236,18 @@ async def bulk_update_students(student_ids: List[str], updates: StudentUpdate):
         
         for student_id in student_ids:
             try:
-                success = db.update_student(student_id, update_dict)
+                success = services.db.update_student(student_id, update_dict)
                 if success:
                     # Recalculate risk
-                    student = db.get_student_by_id(student_id)
+                    student = services.db.get_student_by_id(student_id)
                     if student:
-                        risk_data = risk_engine.calculate_risk_score(student)
+                        risk_data = services.risk_engine.calculate_risk_score(student)
                         risk_updates = {
                             'risk_score': risk_data['composite_score'],
-                            'risk_level': risk_data['risk_level']
+                            'risk_level': risk_data['risk_level'],
+                            **services.risk_engine.breakdown_columns(risk_data)
                         }
-                        db.update_student(student_id, risk_updates)
+                        services.db.update_student(student_id, risk_updates)
                         updated_count += 1
                 else:
                     failed_updates.append(student_id)
@@ -5,19 +5,11 @@ from typing import Dict, List
 import uuid
 import pandas as pd
 
-from models.database import Database
-from models.ml_models import DropoutPredictor
-from models.risk_engine import RiskEngine
-from utils.file_processor import FileProcessor
+from models.training import MIN_TRAINING_ROWS
+from utils.services import services
 
 upload_router = APIRouter()
 
-# Global instances
-db = Database()
-ml_predictor = DropoutPredictor()
-risk_engine = RiskEngine()
-file_processor = FileProcessor()
-
 class ColumnMapping(BaseModel):
     mappings: Dict[str, str]
     session_id: str
@@ -37,16 +29,16 @@ async def upload_file(file: UploadFile = File(...)):
         content = await file.read()
         if len(content) > 10 * 1024 * 1024:  # 10MB limit
             raise HTTPException(status_code=400, detail="File too large. Max: 10MB")
-        df = file_processor.read_file(content, file.filename)
+        df = services.file_processor.read_file(content, file.filename)
         
         # Detect columns and suggest mappings
-        column_info = file_processor.detect_columns(df)
+        column_info = services.file_processor.detect_columns(df)
         
         # Generate session ID for this upload
         session_id = str(uuid.uuid4())
         
         # Get sample data for preview
-        sample_data = file_processor.get_sample_data(df)
+        sample_data = services.file_processor.get_sample_data(df)
         
         # Convert numpy types to Python types for JSON serialization
         for row in sample_data:
@@ -85,17 +77,17 @@ async def process_data(file: UploadFile = File(...), mappings: str = Form(...),
         content = await file.read()
         if len(content) > 10 * 1024 * 1024:  # 10MB limit
             raise HTTPException(status_code=400, detail="File too large. Max: 10MB")
-        df = file_processor.read_file(content, file.filename)
+        df = services.file_processor.read_file(content, file.filename)
         
         # Parse mappings from form data
         import json
         mappings_dict = json.loads(mappings) if mappings else {}
         
         # Apply column mappings
-        df_mapped = file_processor.apply_column_mapping(df, mappings_dict)
+        df_mapped = services.file_processor.apply_column_mapping(df, mappings_dict)
         
         # Validate data
-        validation = file_processor.validate_data(df_mapped)
+        validation = services.file_processor.validate_data(df_mapped)
         
         if not validation['is_valid']:
             return JSONResponse(
@@ -108,27 +100,25 @@ async def process_data(file: UploadFile = File(...), mappings: str = Form(...),
             )
         
         # Clean data
-        df_clean = file_processor.clean_data(df_mapped)
+        df_clean = services.file_processor.clean_data(df_mapped)
         
         # Calculate risk scores
-        df_with_risk = risk_engine.batch_calculate_risk(df_clean)
-        
-        # Train ML models if we have enough data
-        if len(df_with_risk) >= 10:
-            try:
-                training_results = ml_predictor.train_models(df_with_risk)
-            except Exception as e:
-                print(f"ML training failed: {e}")
-                training_results = {"error": str(e)}
-        else:
-            training_results = {"message": "Not enough data for ML training"}
+        df_with_risk = services.risk_engine.batch_calculate_risk(df_clean, with_breakdown=True)
         
         # Save to database
-        success = db.insert_students(df_with_risk)
+        success = services.db.insert_students(df_with_risk)
         
         if success:
             # Save column mappings
-            db.save_column_mapping(mappings_dict, session_id)
+            services.db.save_column_mapping(mappings_dict, session_id)
+            services.refresh_features_later('main', services.db.db_path)
+            
+            # Retrain in the background on everything stored so far
+            if len(df_with_risk) >= MIN_TRAINING_ROWS:
+                job_id = services.training.submit(reason=f"upload:{session_id}", rows=df_with_risk)
+                training_results = {"job_id": job_id, "status": "queued"}
+            else:
+                training_results = {"message": "Not enough data for ML training"}
             
             return {
                 "success": True,
@@ -0,0 +1,150 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+from utils.services import services
+from utils.lazy_routers import RouteGroup, include_route_groups
+from utils.static_assets import static_assets
+
+# Routers in inclusion order; `paths` lets the serverless entry point load a
+# group (and its pandas/sklearn imports) only when one of its routes is hit
+ROUTE_GROUPS = [
+    RouteGroup("auth", "api.auth_routes", "router", prefix="/auth", tags=["authentication"]),
+    RouteGroup("upload", "api.upload", "upload_router", prefix="/api",
+               paths=["/api/upload-file", "/api/process-data", "/api/sample-format"]),
+    RouteGroup("students", "api.students", "students_router", prefix="/api",
+               paths=["/api/students", "/api/student/"]),
+    RouteGroup("dashboard", "api.dashboard", "dashboard_router", prefix="/api",
+               paths=["/api/dashboard/", "/api/student/"]),
+    RouteGroup("multi_upload", "api.multi_upload", "multi_upload_router", prefix="/api",
+               paths=["/api/multi-upload"]),
+    RouteGroup("multi_file_upload", "api.multi_file_upload", "router", prefix="/api", tags=["multi-file-upload"],
+               paths=["/api/upload-multi-files", "/api/sample-format"]),
+    RouteGroup("risk", "api.risk", "risk_router", prefix="/api", tags=["risk"],
+               paths=["/api/risk/"]),
+    RouteGroup("ml", "api.ml", "ml_router", prefix="/api", tags=["ml"],
+               paths=["/api/ml/"]),
+    RouteGroup("email_alerts", "api.email_alerts", "email_router", prefix="/api", tags=["email-alerts"],
+               paths=["/api/send-alert", "/api/configure-email", "/api/email-config"]),
+]
+
+# Services warmed before the first request; everything else (databases for
+# uploads, the training service) is built on first use. The ML predictor is
+# loaded here from the registry's active model so no request pays for it;
+# without a trained model it stays an empty predictor and sklearn is not imported.
+STARTUP_SERVICES = ['auth', 'multi_db', 'ml_predictor']
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services.warm_up(STARTUP_SERVICES)
+    with services.startup_report.phase("static:precompress"):
+        static_assets.precompress_all()
+    services.startup_report.print_report()
+    yield
+
+def create_app(lazy_routers: bool = False) -> FastAPI:
+    """Build the application; lazy_routers defers router imports to first use"""
+    app = FastAPI(
+        title="EduAlert - Student Dropout Prediction System", 
+        version="2.0.0",
+        description="AI-powered multi-tenant system for early intervention and student success",
+        lifespan=lifespan
+    )
+    
+    # CORS middleware with specific origins
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:8012",
+            "http://127.0.0.1:8012",
+            "https://dte-rajasthan.gov.in",  # Production domain
+            "https://*.dte-rajasthan.gov.in"  # Subdomains
+        ],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["Authorization", "Content-Type"],
+    )
+
+    # Fingerprinted, precompressed static files (HEAD too, as the StaticFiles mount answered it)
+    @app.api_route("/static/{filename}", methods=["GET", "HEAD"])
+    async def serve_static(filename: str, request: Request):
+        return static_assets.asset_response(request, filename)
+
+    # Include routers
+    with services.startup_report.phase("include:routers"):
+        include_route_groups(app, ROUTE_GROUPS, lazy=lazy_routers)
+
+    @app.get("/")
+    async def serve_frontend(request: Request):
+        return static_assets.page_response(request, "static/complete_frontend.html")
+
+    @app.get("/login-government")
+    async def serve_government_login(request: Request):
+        return static_assets.page_response(request, "static/complete_frontend.html")
+
+    @app.get("/login-college")
+    async def serve_college_login(request: Request):
+        return static_assets.page_response(request, "static/college_login.html")
+
+    @app.get("/dashboard")
+    async def serve_dashboard(request: Request):
+        return static_assets.page_response(request, "static/unified_dashboard.html")
+
+    @app.get("/upload")
+    async def serve_upload(request: Request):
+        return static_assets.page_response(request, "static/upload_interface.html")
+
+    @app.get("/students")
+    async def serve_students(request: Request):
+        return static_assets.page_response(request, "static/students_management.html")
+
+    @app.get("/alerts")
+    async def serve_alerts(request: Request):
+        return static_assets.page_response(request, "static/alerts_interface.html")
+
+    @app.get("/email-config")
+    async def serve_email_config(request: Request):
+        return static_assets.page_response(request, "static/email_config.html")
+
+    @app.get("/multi-upload")
+    async def serve_multi_upload(request: Request):
+        return static_assets.page_response(request, "../frontend/multi_upload.html")
+
+    @app.get("/frontend/multi_upload.html")
+    async def serve_multi_upload_direct(request: Request):
+        return static_assets.page_response(request, "../frontend/multi_upload.html")
+
+    @app.get("/login")
+    async def serve_login(request: Request):
+        return static_assets.page_response(request, "../frontend/login.html")
+
+    @app.get("/dashboard-government")
+    async def serve_government_dashboard(request: Request):
+        return static_assets.page_response(request, "../frontend/dashboard-government.html")
+
+    @app.get("/dashboard-college")
+    async def serve_college_dashboard(request: Request):
+        return static_assets.page_response(request, "../frontend/dashboard-college.html")
+
+    @app.get("/student/{student_id}")
+    async def serve_student(request: Request):
+        return static_assets.page_response(request, "../frontend/student.html")
+
+    @app.get("/health")
+    async def health_check():
+        return {
+            "status": "healthy", 
+            "message": "EduAlert Multi-Tenant System Running",
+            "version": "2.0.0",
+            "features": ["multi-tenancy", "role-based-access", "audit-logging"],
+            "security": ["jwt-auth", "cors-protection", "data-isolation"],
+            "ready": all(services.is_initialized(name) for name in STARTUP_SERVICES),
+            "ml_model": services.model_status(),
+            "startup": services.startup_report.as_dict()
+        }
+
+    @app.get("/test")
+    async def serve_test(request: Request):
+        return static_assets.page_response(request, "../frontend/simple_test.html")
+    
+    return app
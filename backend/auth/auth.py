@@ -7,6 +7,8 @@ from passlib.context import CryptContext
 import sqlite3
 from enum import Enum
 
+from utils.services import services
+
 class UserRole(str, Enum):
     GOVERNMENT_ADMIN = "government_admin"
     COLLEGE_ADMIN = "college_admin"
@@ -20,6 +22,12 @@ class AuthConfig:
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Default government admin and sample college admins
+DEFAULT_USERS = [("gov_001", "government_admin", "admin123", UserRole.GOVERNMENT_ADMIN, None)] + [
+    (f"{college}_001", f"{college}_admin", f"{college}_admin", UserRole.COLLEGE_ADMIN, college)
+    for college in ["gpj", "geca", "itij", "polu", "rtu"]
+]
+
 class User:
     def __init__(self, user_id: str, username: str, role: UserRole, college_id: Optional[str] = None):
         self.user_id = user_id
@@ -45,21 +53,18 @@ class AuthService:
                 )
             ''')
             
-            # Create default government admin
-            gov_hash = pwd_context.hash("admin123")
-            cursor.execute('''
-                INSERT OR IGNORE INTO users (user_id, username, password_hash, role, college_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', ("gov_001", "government_admin", gov_hash, UserRole.GOVERNMENT_ADMIN, None))
+            # Seed default accounts only when they are missing; hashing
+            # bcrypt passwords is the slowest part of startup
+            cursor.execute("SELECT username FROM users")
+            existing = {row[0] for row in cursor.fetchall()}
             
-            # Create sample college admins
-            colleges = ["gpj", "geca", "itij", "polu", "rtu"]
-            for college in colleges:
-                college_hash = pwd_context.hash(f"{college}_admin")
+            for user_id, username, password, role, college_id in DEFAULT_USERS:
+                if username in existing:
+                    continue
                 cursor.execute('''
                     INSERT OR IGNORE INTO users (user_id, username, password_hash, role, college_id)
                     VALUES (?, ?, ?, ?, ?)
-                ''', (f"{college}_001", f"{college}_admin", college_hash, UserRole.COLLEGE_ADMIN, college))
+                ''', (user_id, username, pwd_context.hash(password), role, college_id))
             
             conn.commit()
     
@@ -119,10 +124,8 @@ class AuthService:
         except JWTError:
             return None
 
-auth_service = AuthService()
-
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    user = auth_service.verify_token(credentials.credentials)
+    user = services.auth.verify_token(credentials.credentials)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
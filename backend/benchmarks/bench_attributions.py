@@ -0,0 +1,173 @@
+"""Per-student feature attributions (CompiledForest.contributions) and stored predictions.
+
+A model is trained on a synthetic cohort. The checks:
+
+- bias + contributions summed over features equals predict_proba, for the
+  random forest and for the decision tree (also with missing inputs);
+- one batched call gives each row the same contributions as a call for
+  that row alone, and they agree with a per-row walk of sklearn's trees;
+- score_tenant stores one ml_predictions row per student whose bias and
+  contributions add up to its stored probability;
+- after an append only the new students are scored, and a full rescore
+  drops students that are gone.
+
+Timed: the per-student cost of explaining a --rows cohort in one batch
+vs walking every tree of the sklearn forest row by row (how the
+explanation would otherwise be computed per request).
+
+    cd backend && python -m benchmarks.bench_attributions [--rows 20000 --loop-rows 200]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_feature_store import append, create_tenant
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+
+ENGINE = RiskEngine(cache_size=0)
+
+
+def walk_row(model, x: np.ndarray):
+    """Contributions of one row by following its path through every sklearn tree"""
+    n_classes = len(model.classes_)
+    contributions = np.zeros((len(x), n_classes))
+    bias = np.zeros(n_classes)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        node = 0
+        bias += value[0]
+        while tree.children_left[node] != -1:
+            feature = tree.feature[node]
+            child = tree.children_left[node] if x[feature] <= tree.threshold[node] else tree.children_right[node]
+            contributions[feature] += value[child] - value[node]
+            node = child
+    return bias / len(model.estimators_), contributions / len(model.estimators_)
+
+
+def check_decomposition(predictor, X: np.ndarray):
+    forest, tree, _ = predictor.compiled()
+    for compiled, inputs in ((forest, X), (tree, X), (tree, np.where(np.arange(X.shape[1]) % 2, np.nan, X))):
+        bias, contributions = compiled.contributions(inputs)
+        assert np.allclose(bias + contributions.sum(axis=1), compiled.predict_proba(inputs), atol=1e-9)
+
+    bias, batched = forest.contributions(X)
+    for i in range(0, len(X), 97):
+        assert np.allclose(forest.contributions(X[i:i + 1])[1][0], batched[i], atol=1e-12)
+        walked_bias, walked = walk_row(predictor.rf_model, X[i].astype(np.float32))
+        assert np.allclose(walked_bias, bias) and np.allclose(walked, batched[i], atol=1e-9)
+
+    # What predict_risk reports: contributions toward the predicted level, keyed by input field
+    record = make_cohort(1, seed=5).iloc[0].to_dict()
+    result = predictor.predict_risk(record)
+    assert set(result['contributions']) == set(predictor.input_features)
+    assert abs(result['bias'] + sum(result['contributions'].values()) - result['probability']) < 1e-9
+    print("attributions: bias + contributions = predict_proba (forest, tree, missing inputs); "
+          "batched = per row = sklearn tree walk")
+
+
+def stored(db_path: str):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT student_id, model_version, probability, bias, contributions, scored_at "
+                            "FROM ml_predictions").fetchall()
+
+
+def check_scoring(predictor):
+    import json
+
+    from models.feature_store import FeatureStore
+    from models.prediction_store import get_prediction, init_predictions_table, score_tenant
+
+    df = ENGINE.batch_calculate_risk(make_cohort(2000, seed=2))
+    create_tenant("check.db", df)
+    with sqlite3.connect("check.db") as conn:
+        init_predictions_table(conn)
+    store = FeatureStore(predictor.encoder, "store")
+    store.refresh('tenant', "check.db")
+    assert score_tenant(predictor, store, 'tenant', "check.db")['scored'] == len(df)
+    rows = stored("check.db")
+    assert len(rows) == len(df) and {row[0] for row in rows} == set(df['student_id'])
+    for _, version, probability, bias, contributions, _ in rows:
+        assert version == predictor.version
+        assert abs(bias + sum(json.loads(contributions).values()) - probability) < 1e-4
+
+    expected = predictor.predict_risk(df.iloc[0].to_dict())
+    prediction = get_prediction("check.db", df['student_id'].iloc[0])
+    assert prediction['predicted_risk'] == expected['prediction']
+    assert abs(prediction['probability'] - expected['probability']) < 1e-9
+    magnitudes = [abs(v) for v in prediction['contributions'].values()]
+    assert magnitudes == sorted(magnitudes, reverse=True)
+    assert get_prediction("check.db", "nobody") is None
+
+    # An append scores only the new students
+    extra = ENGINE.batch_calculate_risk(make_cohort(300, seed=8))
+    extra['student_id'] = [f"NEW{i}" for i in range(len(extra))]
+    append("check.db", extra)
+    with sqlite3.connect("check.db") as conn:
+        conn.execute("UPDATE ml_predictions SET model_version = 'old'")
+    refreshed = store.refresh('tenant', "check.db")
+    assert refreshed['mode'] == 'appended'
+    assert score_tenant(predictor, store, 'tenant', "check.db", new_rows=refreshed['new_rows'])['scored'] == len(extra)
+    versions = {row[0]: row[1] for row in stored("check.db")}
+    assert len(versions) == len(df) + len(extra)
+    assert all(versions[sid] == predictor.version for sid in extra['student_id'])
+    assert all(versions[sid] == 'old' for sid in df['student_id'])
+
+    # A full rescore forgets deleted students
+    with sqlite3.connect("check.db") as conn:
+        conn.execute("DELETE FROM students WHERE student_id = 'NEW0'")
+    store.refresh('tenant', "check.db")
+    score_tenant(predictor, store, 'tenant', "check.db")
+    versions = {row[0]: row[1] for row in stored("check.db")}
+    assert 'NEW0' not in versions and set(versions.values()) == {predictor.version}
+    print("attributions: stored rows add up to their probability; appends score only new students; "
+          "full rescores drop deleted ones")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--loop-rows", type=int, default=200)
+    args = parser.parse_args()
+
+    from models.ml_models import DropoutPredictor
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            predictor = DropoutPredictor()
+            predictor.train_models(ENGINE.batch_calculate_risk(make_cohort(20000, seed=1)))
+            X = predictor.prepare_features(make_cohort(args.rows, seed=3)).to_numpy(dtype=float)
+            check_decomposition(predictor, X[:1000])
+            check_scoring(predictor)
+        finally:
+            os.chdir(cwd)
+
+    forest = predictor.compiled()[0]
+    loop_rows = X[:args.loop_rows].astype(np.float32)
+    batch = time_call(lambda: forest.contributions(X), repeat=3)
+    loop = time_call(lambda: [walk_row(predictor.rf_model, x) for x in loop_rows], repeat=1)
+    results = {
+        'rows': args.rows,
+        'loop_rows': args.loop_rows,
+        'batched': batch,
+        'per_row_walk': loop,
+        'batched_us_per_student': batch['best_s'] / args.rows * 1e6,
+        'per_row_us_per_student': loop['best_s'] / args.loop_rows * 1e6,
+    }
+    results['speedup'] = results['per_row_us_per_student'] / results['batched_us_per_student']
+    print(f"batched {results['batched_us_per_student']:.1f} us/student, per-row walk "
+          f"{results['per_row_us_per_student']:.1f} us/student ({results['speedup']:.0f}x)")
+    write_results("attributions", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
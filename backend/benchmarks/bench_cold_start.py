@@ -0,0 +1,81 @@
+"""Cold-start benchmark for the serverless entry point (api/index.py).
+
+Each path is measured in a fresh interpreter: import of the entry module plus
+the first request, without running lifespan events (as on a serverless cold
+start). The run fails if any path exceeds its budget.
+
+    cd backend && python -m benchmarks.bench_cold_start
+"""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import BACKEND_DIR, write_results
+
+# Cold-start budget per path in milliseconds (import + first response)
+COLD_START_BUDGET_MS = {
+    '/health': 1000,
+    '/auth/login': 1500,
+}
+
+ENTRY_POINT = os.path.join(os.path.dirname(BACKEND_DIR), "api", "index.py")
+
+PROBE = '''
+import importlib.util, json, sys, time
+import httpx  # test client transport, not part of the app's cold start
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("serverless_entry", {entry!r})
+entry = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(entry)
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+client = TestClient(entry.app)
+if {path!r} == "/auth/login":
+    response = client.post("/auth/login", json={{"username": "government_admin", "password": "admin123"}})
+else:
+    response = client.get({path!r})
+done = time.perf_counter()
+from utils.services import services
+
+print(json.dumps({{
+    "status": response.status_code,
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (done - imported) * 1000,
+    "total_ms": (done - start) * 1000,
+    "reported_startup_ms": services.startup_report.as_dict()["total_ms"],
+    "pandas_loaded": "pandas" in sys.modules,
+    "sklearn_loaded": "sklearn" in sys.modules,
+}}))
+'''
+
+
+def measure(path: str) -> dict:
+    code = PROBE.format(entry=ENTRY_POINT, path=path)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(rounds: int = 3) -> int:
+    results = {}
+    failed = False
+
+    for path, budget_ms in COLD_START_BUDGET_MS.items():
+        runs = [measure(path) for _ in range(rounds)]
+        best = min(runs, key=lambda r: r['total_ms'])
+        within_budget = best['total_ms'] <= budget_ms and best['status'] == 200
+        assert all(r['reported_startup_ms'] <= r['total_ms'] for r in runs), f"{path}: startup report exceeds wall time"
+        failed = failed or not within_budget
+        results[path] = {'budget_ms': budget_ms, 'within_budget': within_budget, 'best': best, 'runs': runs}
+        print(f"{path:<14} {best['total_ms']:8.1f} ms (budget {budget_ms} ms) "
+              f"status={best['status']} pandas={best['pandas_loaded']} sklearn={best['sklearn_loaded']} "
+              f"{'OK' if within_budget else 'OVER BUDGET'}")
+
+    write_results("cold_start", results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
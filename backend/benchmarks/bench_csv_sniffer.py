@@ -0,0 +1,154 @@
+"""Sniffed CSV parsing (utils.csv_sniffer) vs the encoding x separator retry loop it replaced.
+
+Checks, on the exports in benchmarks/fixtures/csv:
+- every fixture is read with the expected encoding, delimiter, columns and
+  values: Excel "CSV UTF-8" (BOM), Windows cp1252 with en dashes, curly
+  apostrophes and lakh-grouped amounts, Excel "Unicode Text" (UTF-16,
+  tab), a pipe-separated portal export, and ';' exports with decimal
+  commas (read as numbers) next to Indian-grouped amounts and dd.mm.yyyy
+  dates (left as text, never rescaled);
+- FileProcessor.read_file returns the same frame;
+- a file whose first non-UTF-8 byte lies beyond SNIFF_BYTES falls back to
+  cp1252, and a multi-byte character cut off by the prefix is still UTF-8.
+The fixtures the retry loop misread are reported.
+
+Timed: parsing a --mb upload in each encoding/delimiter combination,
+sniffed (one parse) vs the retry loop (its number of parses is recorded).
+
+    cd backend && python -m benchmarks.bench_csv_sniffer [--mb 10]
+"""
+import argparse
+import io
+import os
+import sys
+
+import pandas as pd
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "csv")
+
+# file -> (encoding, delimiter, rows, {(row, column): value})
+FIXTURES = {
+    'excel_csv_utf8_bom.csv': ('utf-8-sig', ',', 5, {(0, 'student_id'): 'GOV0000001', (0, 'name'): 'राहुल शर्मा'}),
+    'excel_csv_cp1252.csv': ('cp1252', ',', 4, {(0, 'department'): 'B.Tech – CSE', (1, 'name'): 'Priya D’Souza',
+                                            (0, 'fees_due'): 'Rs. 1,50,000'}),
+    'excel_unicode_text_utf16.csv': ('utf-16', '\t', 5, {(3, 'name'): 'सुनीता मीणा', (2, 'marks'): 88}),
+    'portal_pipe_utf8.csv': ('utf-8', '|', 5, {(1, 'name'): 'प्रिया पटेल', (2, 'attendance_percentage'): 91.25}),
+    'semicolon_decimal_comma_cp1252.csv': ('cp1252', ';', 3, {(1, 'name'): 'Rohan D’Costa',
+                                                          (0, 'attendance_percentage'): 58.75,
+                                                          (2, 'attendance_percentage'): 90.25,
+                                                          (1, 'family_income'): 'Rs. 1,20,000'}),
+    'semicolon_indian_amounts_cp1252.csv': ('cp1252', ';', 3, {(0, 'attendance_percentage'): 58.75,
+                                                           (0, 'total_fees'): '45,000', (0, 'fees_due'): '12,500',
+                                                           (0, 'family_income'): '1,50,000',
+                                                           (1, 'name'): 'Anjali D’Souza'}),
+    'semicolon_dotted_dates_utf8.csv': ('utf-8', ';', 3, {(0, 'date_of_birth'): '15.08.2004',
+                                                      (2, 'admission_date'): '15.07.2023', (0, 'marks'): 61.5,
+                                                      (0, 'name'): 'पूजा गुर्जर'}),
+}
+
+
+def retry_loop_read(content: bytes):
+    """FileProcessor.read_file before csv_sniffer; returns (frame, parses)"""
+    parses = 0
+    for encoding in ['utf-8', 'latin-1', 'cp1252']:
+        for sep in [',', ';', '\t']:
+            parses += 1
+            try:
+                df = pd.read_csv(io.BytesIO(content), encoding=encoding, sep=sep, on_bad_lines='skip')
+                if len(df.columns) > 1 and len(df) > 0:
+                    return df, parses
+            except Exception:
+                continue
+    parses += 1
+    return pd.read_csv(io.BytesIO(content), encoding='utf-8', on_bad_lines='skip', sep=None, engine='python'), parses
+
+
+def check_fixtures():
+    from utils.csv_sniffer import read_csv, sniff
+    from utils.file_processor import FileProcessor
+
+    processor = FileProcessor()
+    misread = []
+    for name, (encoding, delimiter, rows, values) in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            content = f.read()
+        assert sniff(content) == (encoding, delimiter), (name, sniff(content))
+        df = read_csv(content)
+        assert len(df) == rows and df.columns[0] == 'student_id', (name, df.columns)
+        for (row, column), value in values.items():
+            # Text stays text: a grouped amount or dotted date read as a number is corrupted
+            actual = df.loc[row, column]
+            assert actual == value and isinstance(actual, str) == isinstance(value, str), (name, row, column, actual)
+        pd.testing.assert_frame_equal(processor.read_file(content, name), df)
+
+        old, _ = retry_loop_read(content)
+        if not (old.columns.equals(df.columns) and old.astype(str).equals(df.astype(str))):
+            misread.append(name)
+    print(f"csv_sniffer: {len(FIXTURES)} fixtures read as expected; the retry loop misread {misread}")
+    return misread
+
+
+def check_prefix():
+    from utils.csv_sniffer import SNIFF_BYTES, read_csv, sniff
+
+    header = "student_id,name,department\n"
+    filler = "".join(f"S{i:07d},Student {i},CSE\n" for i in range(SNIFF_BYTES // 20))
+    late = (header + filler + "S9999999,Late Entry,B.Tech – ME\n").encode('cp1252')
+    assert sniff(late)[0] == 'utf-8'
+    assert read_csv(late)['department'].iloc[-1] == 'B.Tech – ME'
+
+    # A Devanagari character split by the end of the prefix
+    start = header + "S0000001,"
+    start += "a" * (SNIFF_BYTES - 2 - len(start)) + ","
+    cut = (start + "क,CSE\n").encode()
+    assert len(start) == SNIFF_BYTES - 1  # the character's 3 bytes straddle the prefix
+    assert sniff(cut) == ('utf-8', ',')
+    print("csv_sniffer: late non-UTF-8 bytes fall back to cp1252; a character cut by the prefix stays UTF-8")
+
+
+def upload(mb: float, encoding: str, delimiter: str) -> bytes:
+    """Synthetic upload of about `mb` megabytes with non-ASCII department names"""
+    df = make_cohort(max(1, int(mb * 1024 * 1024 / 170)), seed=1)
+    df['department'] = 'B.Tech – ' + df['department'].astype(str)
+    return df.to_csv(index=False, sep=delimiter).encode(encoding)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=10.0)
+    args = parser.parse_args()
+
+    from utils.csv_sniffer import read_csv
+
+    misread = check_fixtures()
+    check_prefix()
+
+    results = {'mb': args.mb, 'fixtures_misread_by_retry_loop': misread, 'cases': {}}
+    for encoding, delimiter in [('utf-8', ','), ('cp1252', ','), ('cp1252', ';'), ('utf-8', '\t'), ('utf-16', '\t')]:
+        content = upload(args.mb, encoding, delimiter)
+        new = read_csv(content)
+        old, parses = retry_loop_read(content)
+        sniffed = time_call(lambda: read_csv(content), repeat=3)
+        retried = time_call(lambda: retry_loop_read(content), repeat=1)
+        case = f"{encoding} {delimiter!r}"
+        results['cases'][case] = {
+            'bytes': len(content),
+            'sniffed': sniffed,
+            'retry_loop': retried,
+            'retry_loop_parses': parses,
+            'retry_loop_correct': bool(old.shape == new.shape and old.astype(str).equals(new.astype(str))),
+            'speedup': retried['best_s'] / sniffed['best_s'],
+        }
+        print(f"{case:<16}{len(content) / 1e6:>7.1f} MB  sniffed {sniffed['best_s']:.3f}s  "
+              f"retry loop {retried['best_s']:.3f}s ({parses} parses"
+              f"{'' if results['cases'][case]['retry_loop_correct'] else ', misread'})  "
+              f"{results['cases'][case]['speedup']:.1f}x")
+    write_results("csv_sniffer", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""DropoutPredictor feature preparation: FeatureEncoder vs the LabelEncoder path.
+
+legacy_prepare_features below is the code prepare_features used before:
+a full DataFrame copy, a LabelEncoder per categorical column over
+astype(str), and NaNs filled with the median of the frame being
+predicted. The checks:
+
+- on training data, the encoder's matrix is identical to the legacy one,
+  so models trained either way are the same;
+- unseen categories get UNKNOWN_CODE instead of raising;
+- a student predicted alone is imputed with the training medians, the
+  same as in a large batch;
+- pandas categorical columns encode the same as object columns;
+- the encoder survives a save/load round trip.
+
+Then both are timed on cohorts of --sizes students. Single predictions
+and other frames of up to SMALL_FRAME_ROWS rows take the dict path. For
+large frames of plain string columns, the encoder is bound by one hash
+lookup per value; frames with categorical columns skip that
+('encoder_categorical_columns').
+
+    cd backend && python -m benchmarks.bench_feature_encoder [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.feature_encoder import UNKNOWN_CODE, FeatureEncoder
+from models.ml_models import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+
+
+def legacy_prepare_features(df: pd.DataFrame, label_encoders: dict) -> pd.DataFrame:
+    from sklearn.preprocessing import LabelEncoder
+
+    df_processed = df.copy()
+    numerical_features = list(NUMERICAL_FEATURES)
+    for col in CATEGORICAL_FEATURES:
+        if col in df.columns:
+            if col not in label_encoders:
+                label_encoders[col] = LabelEncoder()
+                df_processed[f'{col}_encoded'] = label_encoders[col].fit_transform(df[col].astype(str))
+            else:
+                df_processed[f'{col}_encoded'] = label_encoders[col].transform(df[col].astype(str))
+            numerical_features.append(f'{col}_encoded')
+    for col in numerical_features:
+        if col in df_processed.columns:
+            df_processed[col] = df_processed[col].fillna(df_processed[col].median())
+    return df_processed[[col for col in numerical_features if col in df_processed.columns]]
+
+
+def cohort(rows: int, seed: int) -> pd.DataFrame:
+    df = make_cohort(rows, seed=seed)
+    df.loc[df.sample(frac=0.02, random_state=seed).index, 'marks'] = np.nan
+    df.loc[df.sample(frac=0.01, random_state=seed + 1).index, 'region'] = np.nan
+    return df
+
+
+def check():
+    train = cohort(20000, seed=1)
+    encoder = FeatureEncoder().fit(train, NUMERICAL_FEATURES, CATEGORICAL_FEATURES)
+    label_encoders = {}
+    legacy = legacy_prepare_features(train, label_encoders)
+    encoded = encoder.transform(train)
+    assert list(encoded.columns) == list(legacy.columns) == encoder.feature_names
+    assert np.array_equal(encoded.to_numpy(dtype=float), legacy.to_numpy(dtype=float))
+    assert FeatureEncoder.from_label_encoders(label_encoders, encoder.feature_names).categorical == encoder.categorical
+
+    unseen = train.head(3).copy()
+    unseen['region'] = ['Coastal', 'Urban', None]
+    codes = encoder.transform(unseen)['region_encoded'].tolist()
+    assert codes[0] == UNKNOWN_CODE and codes[1] == encoder.categorical['region'].index('Urban')
+    assert codes[2] == UNKNOWN_CODE  # str(None) never occurred in training
+
+    batch = cohort(5000, seed=2)
+    student = batch.iloc[[int(np.flatnonzero(batch['marks'].isna())[0])]]
+    alone = encoder.transform(student)
+    assert alone['marks'].iloc[0] == encoder.numerical['marks']
+    assert alone.equals(encoder.transform(batch).loc[student.index])
+    assert encoder.transform(student.drop(columns=['marks'])).equals(alone)
+    as_categories = batch.astype({col: 'category' for col in encoder.categorical})
+    assert encoder.transform(as_categories).equals(encoder.transform(batch))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feature_encoder.json")
+        encoder.save(path)
+        assert FeatureEncoder.load(path).transform(batch).equals(encoder.transform(batch))
+    print("feature_encoder: matches LabelEncoder codes on training data; unknowns and one-row imputation handled")
+    return encoder, label_encoders
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,64,10000,100000,1000000")
+    args = parser.parse_args()
+
+    encoder, label_encoders = check()
+    results = {}
+    for rows in [int(s) for s in args.sizes.split(",")]:
+        df = cohort(rows, seed=rows)
+        legacy = time_call(lambda: legacy_prepare_features(df, label_encoders))
+        encoded = time_call(lambda: encoder.transform(df))
+        as_categories = df.astype({col: 'category' for col in encoder.categorical})
+        categorical = time_call(lambda: encoder.transform(as_categories))
+        results[str(rows)] = {'legacy': legacy, 'encoder': encoded, 'encoder_categorical_columns': categorical,
+                              'speedup': legacy['best_s'] / encoded['best_s']}
+        print(f"{rows:>9} rows  legacy {legacy['best_s']:.4f}s  encoder {encoded['best_s']:.4f}s  "
+              f"{results[str(rows)]['speedup']:.1f}x  (category dtype {categorical['best_s']:.4f}s)")
+    write_results("feature_encoder", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
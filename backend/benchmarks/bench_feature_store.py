@@ -0,0 +1,161 @@
+"""Memory-mapped feature store (models.feature_store) vs reading and encoding per call.
+
+A model is trained on a synthetic cohort, and a tenant database of
+--rows students is written in the tenant schema (updated_at defaults to
+the insert time). The checks:
+
+- the stored matrix equals encoder.transform() of the table, and
+  predictions from it equal batch_predict on the table;
+- appending students refreshes only the new rows, and the result equals
+  a rebuild from scratch;
+- a replaced table, an edited student or a deleted student each force a
+  rebuild, and a refresh with nothing changed writes nothing;
+- another encoder gets its own directory, and prune() removes the others;
+- labelled_matrix aligns every row with its stored risk level.
+
+Timed: loading a tenant's features (read_sql + prepare_features vs a
+mapped .npy), scoring a tenant end to end, and refreshing after an
+upload of --append rows (incremental vs rebuild).
+
+    cd backend && python -m benchmarks.bench_feature_store [--rows 100000 --append 5000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+
+ENGINE = RiskEngine(cache_size=0)
+
+
+def create_tenant(db_path: str, df: pd.DataFrame):
+    """students table with an updated_at column that defaults to the insert time, as in tenant databases"""
+    columns = ', '.join(f"{name} {'REAL' if pd.api.types.is_numeric_dtype(dtype) else 'TEXT'}"
+                        for name, dtype in df.dtypes.items())
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE IF EXISTS students")
+        conn.execute(f"CREATE TABLE students ({columns}, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        df.to_sql('students', conn, if_exists='append', index=False)
+
+
+def append(db_path: str, df: pd.DataFrame):
+    with sqlite3.connect(db_path) as conn:
+        df.to_sql('students', conn, if_exists='append', index=False)
+
+
+def read_table(db_path: str) -> pd.DataFrame:
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query("SELECT * FROM students ORDER BY rowid", conn)
+
+
+def check(predictor, db_path: str, rows: int):
+    from models.feature_encoder import FeatureEncoder
+    from models.feature_store import FeatureStore, labelled_matrix
+
+    store = FeatureStore(predictor.encoder, "store")
+    assert store.refresh('tenant', db_path)['mode'] == 'rebuilt'
+    features, rowids = store.load('tenant')
+    assert isinstance(features, np.memmap) and features.dtype == np.float32
+    table = read_table(db_path)
+    assert np.array_equal(features, predictor.encoder.transform(table).to_numpy(dtype=np.float32))
+    proba, predicted, _ = predictor.predict_features(features)
+    expected = predictor.batch_predict(table)
+    assert (predicted == expected['predicted_risk'].to_numpy()).all()
+    assert np.array_equal(proba.max(axis=1), expected['risk_probability'].to_numpy())
+
+    extra = ENGINE.batch_calculate_risk(make_cohort(rows // 10 + 1, seed=7))
+    append(db_path, extra)
+    refreshed = store.refresh('tenant', db_path)
+    assert refreshed['mode'] == 'appended' and refreshed['new_rows'] == len(extra), refreshed
+    rebuilt = FeatureStore(predictor.encoder, "rebuilt")
+    rebuilt.refresh('tenant', db_path)
+    assert all(np.array_equal(a, b) for a, b in zip(store.load('tenant'), rebuilt.load('tenant')))
+    assert store.refresh('tenant', db_path)['mode'] == 'unchanged'
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE students SET marks = 1, updated_at = '2999-01-01' WHERE rowid = 3")
+    assert store.refresh('tenant', db_path)['mode'] == 'rebuilt'
+    assert store.load('tenant')[0][2, predictor.feature_names.index('marks')] == 1
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM students WHERE rowid = 5")
+    assert store.refresh('tenant', db_path)['mode'] == 'rebuilt'
+    assert 5 not in set(store.load('tenant')[1].tolist())
+    create_tenant(db_path, extra)
+    assert store.refresh('tenant', db_path) == {'tenant': 'tenant', 'mode': 'rebuilt', 'rows': len(extra),
+                                                'new_rows': len(extra)}
+
+    X, y = labelled_matrix(store, {'tenant': db_path}, ['Low', 'Medium', 'High', 'Critical'])
+    assert len(y) == len(extra) and (y == extra['risk_level'].to_numpy()).all()
+    assert np.array_equal(X, predictor.encoder.transform(extra).to_numpy(dtype=np.float32))
+
+    other = FeatureStore(FeatureEncoder().fit(extra, list(predictor.encoder.numerical),
+                                              list(predictor.encoder.categorical)), "store")
+    assert other.version != store.version
+    other.refresh('tenant', db_path)
+    other.prune()
+    assert os.listdir("store") == [other.version]
+    print("feature_store: matches the encoder; appends are incremental; edits, deletes and replacements rebuild")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--append", type=int, default=5000)
+    args = parser.parse_args()
+
+    from models.feature_store import FeatureStore
+    from models.ml_models import DropoutPredictor
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            predictor = DropoutPredictor()
+            predictor.train_models(ENGINE.batch_calculate_risk(make_cohort(20000, seed=1)))
+            create_tenant("check.db", ENGINE.batch_calculate_risk(make_cohort(2000, seed=2)))
+            check(predictor, "check.db", 2000)
+
+            create_tenant("tenant.db", ENGINE.batch_calculate_risk(make_cohort(args.rows, seed=3)))
+            store = FeatureStore(predictor.encoder, "feature_store")
+            store.refresh('tenant', "tenant.db")
+
+            def score_from_table():
+                return predictor.batch_predict(read_table("tenant.db"))
+
+            def score_from_store():
+                return predictor.predict_features(store.features('tenant', "tenant.db")[0])
+
+            results = {
+                'rows': args.rows,
+                'load_read_and_encode': time_call(lambda: predictor.prepare_features(read_table("tenant.db"))),
+                'load_store': time_call(lambda: store.features('tenant', "tenant.db")),
+                'score_from_table': time_call(score_from_table),
+                'score_from_store': time_call(score_from_store),
+            }
+
+            upload = ENGINE.batch_calculate_risk(make_cohort(args.append, seed=4))
+            append("tenant.db", upload)
+            # Timed once each: the first refresh consumes the appended rows
+            results['refresh_appended'] = time_call(lambda: store.refresh('tenant', "tenant.db"), repeat=1)
+            fresh = FeatureStore(predictor.encoder, "fresh")
+            results['refresh_rebuild'] = time_call(lambda: fresh.refresh('tenant', "tenant.db"), repeat=1)
+            results['append_rows'] = args.append
+        finally:
+            os.chdir(cwd)
+
+    for name in ('load_read_and_encode', 'load_store', 'score_from_table', 'score_from_store',
+                 'refresh_appended', 'refresh_rebuild'):
+        print(f"{name:<24}{results[name]['best_s']:>10.4f}s")
+    write_results("feature_store", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Scoring, ingestion, ML and API hot paths at several cohort sizes.
+
+Every case runs at each size (default 1k and 100k students; add 1000000
+for the full run) spread across --colleges synthetic colleges. Per-row
+paths that would take minutes at the larger sizes are timed at their cap
+and extrapolated using the case's scaling (linear or quadratic); those
+entries carry 'extrapolated': true and the rows actually timed.
+
+API routes run through an in-process ASGI client (httpx.ASGITransport)
+against synthetic tenant databases in a temporary working directory, so
+the repository databases are never touched.
+
+    cd backend && python -m benchmarks.bench_hot_paths [--sizes 1000,100000,1000000] [--colleges 5]
+"""
+import argparse
+import asyncio
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+import pandas as pd
+
+from benchmarks.harness import write_results
+from benchmarks.synthetic import COLLEGES, make_cohort, upload_files
+
+
+class Case:
+    """A timed code path: setup(rows) builds its input, run(data) is timed"""
+
+    def __init__(self, name: str, setup: Callable, run: Callable, max_rows: int = None, scaling: str = 'linear'):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_rows = max_rows
+        self.scaling = scaling
+
+    def measure(self, rows: int, repeat: int) -> Dict:
+        timed_rows = min(rows, self.max_rows) if self.max_rows else rows
+        data = self.setup(timed_rows)
+        rounds = []
+        for _ in range(repeat if timed_rows == rows else 1):
+            start = time.perf_counter()
+            self.run(data)
+            rounds.append(time.perf_counter() - start)
+        best = min(rounds)
+        result = {'best_s': best, 'mean_s': sum(rounds) / len(rounds), 'rows_timed': timed_rows}
+        if timed_rows < rows:
+            factor = rows / timed_rows
+            result['best_s'] = best * (factor ** 2 if self.scaling == 'quadratic' else factor)
+            result['mean_s'] = result['best_s']
+            result['extrapolated'] = True
+        result['per_row_us'] = result['best_s'] / rows * 1e6
+        return result
+
+
+def college_ids(count: int):
+    return COLLEGES[:count] if count <= len(COLLEGES) else [f"c{i:02d}" for i in range(count)]
+
+
+def scoring_cases(colleges):
+    from api.multi_file_upload import calculate_multi_factor_risk
+    from models.enhanced_risk_engine import EnhancedRiskEngine
+    from models.risk_engine import RiskEngine
+
+    engine, enhanced = RiskEngine(cache_size=0), EnhancedRiskEngine()
+    cohort = lambda rows: make_cohort(rows, seed=rows, colleges=colleges)
+    records = lambda rows: cohort(rows).to_dict('records')
+    return [
+        Case('risk.calculate_risk_score', records, lambda rs: [engine.calculate_risk_score(r) for r in rs],
+             max_rows=20000),
+        Case('risk.batch_calculate_risk', cohort, lambda df: engine.batch_calculate_risk(df, with_breakdown=True)),
+        Case('enhanced.calculate_comprehensive_risk', records,
+             lambda rs: [enhanced.calculate_comprehensive_risk(r) for r in rs], max_rows=20000),
+        Case('enhanced.calculate_batch', cohort, lambda df: enhanced.calculate_batch(df)),
+        Case('multi_factor.calculate_multi_factor_risk', cohort, calculate_multi_factor_risk),
+    ]
+
+
+def ingestion_cases(colleges):
+    from api.multi_upload import clean_dataframe, merge_student_data
+    from utils.file_processor import FileProcessor
+
+    processor = FileProcessor()
+
+    def split_frames(rows):
+        files = upload_files(rows, seed=rows, colleges=colleges)
+        return {kind: clean_dataframe(pd.read_csv(io.BytesIO(files[kind])), kind)
+                for kind in ('attendance', 'marks', 'fees')}
+
+    return [
+        Case('file_processor.read_file', lambda rows: upload_files(rows, seed=rows, colleges=colleges)['combined'],
+             lambda content: processor.read_file(content, "students.csv")),
+        Case('file_processor.clean_data',
+             lambda rows: processor.read_file(upload_files(rows, seed=rows, colleges=colleges)['combined'], "s.csv"),
+             processor.clean_data),
+        Case('multi_upload.merge_student_data', split_frames, merge_student_data, max_rows=2000, scaling='quadratic'),
+    ]
+
+
+def ml_cases(colleges):
+    from models.ml_models import DropoutPredictor
+    from models.risk_engine import RiskEngine
+
+    engine = RiskEngine(cache_size=0)
+
+    def labelled(rows):
+        df = engine.batch_calculate_risk(make_cohort(rows, seed=rows, colleges=colleges))
+        # train_models stratifies its split, which needs two students per level
+        counts = df['risk_level'].value_counts()
+        return df[df['risk_level'].isin(counts[counts >= 2].index)]
+
+    def trained(rows):
+        predictor = DropoutPredictor()
+        predictor.train_models(labelled(min(rows, 20000)))
+        return predictor, labelled(rows)
+
+    return [
+        Case('ml.train_models', labelled, lambda df: DropoutPredictor().train_models(df), max_rows=100000),
+        Case('ml.batch_predict', trained, lambda data: data[0].batch_predict(data[1])),
+    ]
+
+
+API_ROUTES = [
+    ('GET', '/health', None),
+    ('GET', '/api/dashboard/stats', None),
+    ('GET', '/api/students?limit=100', None),
+    ('GET', '/api/dashboard/trends', None),
+    ('GET', '/api/risk/config', None),
+    ('POST', '/api/risk/simulate', {'perturbations': [{'field': 'attendance_percentage', 'op': 'add', 'value': 10}]}),
+]
+
+
+def bench_api(rows: int, repeat: int) -> Dict:
+    """Main routes through the ASGI app, on synthetic tenant databases of `rows` students in total"""
+    import httpx
+    from models.risk_engine import RiskEngine
+
+    cwd = os.getcwd()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            from app_factory import create_app
+            from auth.auth import User, UserRole
+            from utils.services import services
+
+            services.reset()
+            engine = RiskEngine(cache_size=0)
+            cohort = engine.batch_calculate_risk(make_cohort(rows, seed=rows), with_breakdown=True)
+            for college_id, students in cohort.groupby('college_id'):
+                with sqlite3.connect(f"{college_id}_students.db") as conn:
+                    students.to_sql('students', conn, index=False)
+            services.multi_db  # registers the colleges in government_master.db
+
+            token = services.auth.create_access_token(User('bench', 'bench', UserRole.GOVERNMENT_ADMIN))
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def run():
+                transport = httpx.ASGITransport(app=create_app())
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    for method, url, body in API_ROUTES:
+                        rounds = []
+                        for _ in range(repeat):
+                            start = time.perf_counter()
+                            response = await client.request(method, url, headers=headers, json=body)
+                            rounds.append(time.perf_counter() - start)
+                        results[f"{method} {url}"] = {
+                            'best_s': min(rounds), 'mean_s': sum(rounds) / len(rounds), 'status': response.status_code
+                        }
+
+            asyncio.run(run())
+        finally:
+            services.reset()
+            os.chdir(cwd)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000")
+    parser.add_argument("--colleges", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--api-rows", type=int, default=20000, help="students across the API tenant databases")
+    parser.add_argument("--skip", default="", help="comma-separated groups to skip: scoring,ingestion,ml,api")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    skip = set(filter(None, args.skip.split(",")))
+    colleges = college_ids(args.colleges)
+    groups = {'scoring': scoring_cases, 'ingestion': ingestion_cases, 'ml': ml_cases}
+
+    results = {'sizes': sizes, 'colleges': len(colleges), 'cases': {}}
+    for group, build in groups.items():
+        if group in skip:
+            continue
+        for case in build(colleges):
+            results['cases'][case.name] = {}
+            for rows in sizes:
+                timing = case.measure(rows, args.repeat)
+                results['cases'][case.name][str(rows)] = timing
+                note = f" (extrapolated from {timing['rows_timed']})" if timing.get('extrapolated') else ""
+                print(f"{case.name:<42}{rows:>9} rows {timing['best_s']:>10.3f}s "
+                      f"{timing['per_row_us']:>9.2f} us/row{note}")
+
+    if 'api' not in skip:
+        results['api'] = {'rows': args.api_rows, 'routes': bench_api(args.api_rows, args.repeat)}
+        for route, timing in results['api']['routes'].items():
+            print(f"{route:<42}{timing['status']:>9}      {timing['best_s'] * 1000:>10.1f} ms")
+
+    write_results("hot_paths", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
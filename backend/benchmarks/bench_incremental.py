@@ -0,0 +1,132 @@
+"""Incremental (warm-start) model updates vs full retraining.
+
+In a temporary directory: a full training job on --history students
+seeds the model and the reservoir. Then uploads of --uploads sizes each
+run as an incremental job, and each is compared with a full retrain on
+all stored students. Incremental time should follow the upload size;
+full time follows the history size.
+
+Checks:
+- the reservoir keeps a uniform sample (by position) of everything it
+  was offered across many add() calls;
+- accuracy on a fresh cohort after the incremental updates stays within
+  a few points of full retraining, including after a skewed upload that
+  contains only struggling students from one college;
+- an update that cannot be incremental falls back to a full retrain.
+
+    cd backend && python -m benchmarks.bench_incremental [--history 100000 --uploads 1000,5000,20000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+
+ENGINE = RiskEngine(cache_size=0)
+
+
+def labelled(rows: int, seed: int, **kwargs) -> pd.DataFrame:
+    return ENGINE.batch_calculate_risk(make_cohort(rows, seed=seed, **kwargs))
+
+
+def check_reservoir():
+    from models.training import Reservoir
+
+    reservoir = Reservoir("unused.pkl", size=2000, seed=7)
+    offered = 0
+    for batch in [500, 3000, 1, 20000, 76499]:
+        reservoir.add(pd.DataFrame({'risk_level': ['Low'] * batch, 'attendance_percentage': offered + np.arange(batch)}))
+        offered += batch
+    positions = reservoir.rows['attendance_percentage'].to_numpy()
+    assert len(positions) == 2000 and len(set(positions)) == 2000 and reservoir.seen == offered
+    deciles = np.bincount((positions * 10 // offered).astype(int), minlength=10)
+    assert deciles.min() > 140 and deciles.max() < 260, deciles
+    print(f"reservoir: 2000 of {offered} rows, per-decile counts {deciles.min()}-{deciles.max()} (uniform is 200)")
+
+
+def store(df: pd.DataFrame, main_db: str):
+    with sqlite3.connect(main_db) as conn:
+        df.to_sql('students', conn, index=False, if_exists='append')
+
+
+def timed_job(service, **submit):
+    start = time.perf_counter()
+    job_id = service.submit(**submit)
+    service.wait()
+    job = service.get_job(job_id)
+    assert job['status'] == 'completed', job
+    return time.perf_counter() - start, job
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=100000)
+    parser.add_argument("--uploads", default="1000,5000,20000")
+    args = parser.parse_args()
+
+    from models.training import ModelRegistry, TrainingService
+
+    check_reservoir()
+    cwd = os.getcwd()
+    results = {'history': args.history, 'uploads': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with sqlite3.connect("government_master.db") as conn:
+                conn.execute("CREATE TABLE colleges (college_id TEXT)")
+            registry = ModelRegistry("model_registry")
+            service = TrainingService(registry, government_db="government_master.db", main_db="main.db")
+            full_only = TrainingService(ModelRegistry("full_registry"), government_db="government_master.db",
+                                        main_db="main.db")
+            test = labelled(20000, seed=999)
+
+            store(labelled(args.history, seed=1), "main.db")
+            elapsed, job = timed_job(service, reason="seed")
+            assert job['mode'] == 'full' and service.reservoir.seen == args.history
+            results['seed_full_s'] = elapsed
+            print(f"seed: full training on {args.history} rows {elapsed:.2f}s")
+
+            uploads = [(int(size), labelled(int(size), seed=10 + i)) for i, size in enumerate(args.uploads.split(","))]
+            # Only struggling students of one college: the update must not drift toward them
+            skewed = labelled(5000, seed=50, colleges=['polu'])
+            skewed = skewed[skewed['risk_level'].isin(['High', 'Critical'])]
+            uploads.append(('skewed', skewed))
+
+            for name, upload in uploads:
+                store(upload, "main.db")
+                inc_s, inc = timed_job(service, reason=f"upload {name}", rows=upload)
+                full_s, full = timed_job(full_only, reason=f"full {name}")
+                assert inc['mode'] == 'incremental', inc
+                inc_acc = registry.load(inc['model_version']).evaluate(test)['random_forest_accuracy']
+                full_acc = full_only.registry.load(full['model_version']).evaluate(test)['random_forest_accuracy']
+                results['uploads'][str(name)] = {
+                    'rows': len(upload), 'incremental_s': inc_s, 'full_s': full_s,
+                    'incremental_accuracy': inc_acc, 'full_accuracy': full_acc,
+                    'trees': inc['metrics']['trees'], 'replay_rows': inc['metrics']['replay_rows']
+                }
+                print(f"upload {str(name):>7} ({len(upload):>6} rows): incremental {inc_s:6.2f}s "
+                      f"acc {inc_acc:.3f} | full {full_s:6.2f}s acc {full_acc:.3f}")
+                assert inc_acc >= full_acc - 0.05, (inc_acc, full_acc)
+
+            # A tiny upload with one level and an empty reservoir cannot be incremental
+            service._reservoir.rows = service.reservoir.rows.iloc[:0]
+            _, fallback = timed_job(service, reason="fallback", rows=uploads[0][1].head(20).assign(risk_level='Low'))
+            assert fallback['mode'] == 'full' and 'incremental_fallback' in fallback['metrics']
+            print("fallback: update without every risk level retrained in full")
+        finally:
+            os.chdir(cwd)
+
+    write_results("incremental", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Single-student ML predictions: direct predict_risk vs the micro-batcher.
+
+Trains a DropoutPredictor on a synthetic cohort, then checks that every
+prediction made through MicroBatcher (with records of different shapes,
+missing values and unseen categories mixed in) equals predict_risk for
+the same student. Then measures throughput and latency for --clients
+concurrent callers: each caller either calls predict_risk directly
+(serialized behind a lock, as one worker process would be) or goes
+through the batcher.
+
+    cd backend && python -m benchmarks.bench_inference [--requests 2000 --clients 32]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.harness import write_results
+from benchmarks.synthetic import make_cohort
+from models.inference import MicroBatcher
+from models.ml_models import DropoutPredictor
+from models.risk_engine import RiskEngine
+
+FIELDS = ['attendance_percentage', 'marks', 'family_income', 'family_size',
+          'electricity', 'internet_access', 'caste_category', 'region', 'gender']
+
+
+def trained_predictor(rows: int) -> DropoutPredictor:
+    df = RiskEngine(cache_size=0).batch_calculate_risk(make_cohort(rows, seed=1))
+    predictor = DropoutPredictor()
+    predictor.train_models(df)
+    return predictor
+
+
+def student_records(n: int):
+    return make_cohort(n, seed=2)[FIELDS].to_dict('records')
+
+
+def same_prediction(a, b) -> bool:
+    return (a['prediction'] == b['prediction'] and a['decision_tree_prediction'] == b['decision_tree_prediction']
+            and a['probabilities'].keys() == b['probabilities'].keys()
+            and np.allclose(list(a['probabilities'].values()), list(b['probabilities'].values()))
+            and a['contributions'].keys() == b['contributions'].keys()
+            and np.allclose(list(a['contributions'].values()), list(b['contributions'].values())))
+
+
+def check(predictor: DropoutPredictor):
+    records = student_records(300)
+    for i, record in enumerate(records[::7]):
+        record['student_id'] = f"S{i}"  # other record shapes in the same batches
+    for record in records[3::11]:
+        del record['gender']
+    records[5]['marks'] = None
+    records[11]['electricity'] = 'Solar'  # never seen in training
+    records[13]['family_size'] = 'unknown'
+
+    batcher = MicroBatcher(lambda: predictor, max_batch_size=64, max_wait_ms=20)
+    futures = [batcher.submit(record) for record in records]
+    for i, (record, future) in enumerate(zip(records, futures)):
+        assert same_prediction(future.result(), predictor.predict_risk(record)), i
+    assert batcher.stats()['batch_size']['max'] > 1
+    print(f"inference: {len(records)} batched predictions (mixed shapes, missing and unseen values) "
+          f"match predict_risk")
+
+
+def drive(predict, records, clients: int):
+    """Run all records through `predict` from `clients` threads; per-call latencies in ms"""
+    latencies = []
+    chunks = [records[i::clients] for i in range(clients)]
+
+    def client(chunk):
+        for record in chunk:
+            start = time.perf_counter()
+            predict(record)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'elapsed_s': elapsed,
+        'requests_per_s': len(records) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+    }
+
+
+def drive_async(batcher: MicroBatcher, records):
+    """All records as concurrent coroutines on one event loop, as FastAPI would issue them"""
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(batcher.predict_async(record) for record in records))
+        return time.perf_counter() - start
+    elapsed = asyncio.run(run())
+    return {'elapsed_s': elapsed, 'requests_per_s': len(records) / elapsed}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    predictor = trained_predictor(args.train_rows)
+    check(predictor)
+
+    records = student_records(args.requests)
+    lock = threading.Lock()
+
+    def direct(record):
+        with lock:
+            return predictor.predict_risk(record)
+
+    batcher = MicroBatcher(lambda: predictor, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    results = {
+        'requests': args.requests,
+        'clients': args.clients,
+        'direct': drive(direct, records, args.clients),
+        'batched': drive(batcher.predict, records, args.clients),
+        'batched_async': drive_async(batcher, records),
+        'batcher_stats': batcher.stats(),
+    }
+    for name in ('direct', 'batched', 'batched_async'):
+        timing = results[name]
+        latency = f"  p50 {timing['p50_ms']:.1f} ms  p95 {timing['p95_ms']:.1f} ms" if 'p50_ms' in timing else ""
+        print(f"{name:<14}{timing['requests_per_s']:>10.0f} req/s{latency}")
+    print(f"mean batch size {results['batcher_stats']['batch_size']['mean']}")
+    write_results("inference", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Cross-validated hyperparameter search (models.model_search).
+
+On --rows labelled synthetic students, the search runs with one worker
+process and then with --workers. The wall times of the two runs are
+compared; the speedup is bounded by cpu_count, which is recorded with the
+results. Fold scores must agree between the two runs; only where a
+candidate was pruned can differ, since that depends on which candidates
+had finished first.
+
+Checks:
+- the current defaults run first and complete;
+- a candidate stops after one fold once it cannot reach stop_below;
+- once the CPU budget is spent, no further candidate starts, and with a
+  worker per candidate the running ones stop after their current fold;
+- the chosen settings are the fastest to serve within
+  SELECTION_TOLERANCE of the best accuracy;
+- a search training job records every candidate in the registry
+  metrics, and a later full retrain keeps the chosen settings;
+- once a model is active, a search reads the feature store.
+
+Everything runs in a temporary working directory.
+
+    cd backend && python -m benchmarks.bench_model_search [--rows 20000 --candidates 12 --workers 4]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+from benchmarks.harness import write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+
+ENGINE = RiskEngine(cache_size=0)
+
+
+def training_matrix(df):
+    from models.feature_encoder import FeatureEncoder
+    from models.ml_models import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+
+    encoder = FeatureEncoder().fit(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES)
+    return encoder.transform(df).to_numpy(dtype=float), df['risk_level'].to_numpy()
+
+
+def check_search(found, X, y):
+    from models import model_search
+    from models.ml_models import DEFAULT_RF_PARAMS
+
+    first = found['candidates'][0]
+    assert first['params'] == DEFAULT_RF_PARAMS and first['status'] == 'completed', first
+    completed = [c for c in found['candidates'] if c['status'] == 'completed']
+    best = max(c['accuracy'] for c in completed)
+    eligible = [c for c in completed if c['accuracy'] >= best - model_search.SELECTION_TOLERANCE]
+    chosen = min(eligible, key=lambda c: c['predict_row_us'])
+    assert found['best_params'] == chosen['params']
+
+    # Early stopping: no setting reaches 100% mean accuracy, so one fold is enough to give up
+    model_search._init_worker(X, y)
+    pruned = model_search.evaluate_candidate(DEFAULT_RF_PARAMS, folds=5, stop_below=1.0)
+    assert pruned['status'] == 'pruned' and len(pruned['fold_accuracies']) == 1
+
+    # CPU budget: after the first candidate finishes, nothing else starts
+    limited = model_search.search(X, y, max_candidates=6, cpu_budget_s=1e-6, workers=1)
+    statuses = [c['status'] for c in limited['candidates']]
+    assert statuses == ['completed'] + ['skipped'] * 5, statuses
+
+    # With a worker per candidate everything starts at once; the shared budget still stops them
+    crowded = model_search.search(X, y, max_candidates=6, folds=5, cpu_budget_s=1e-6, workers=6)
+    statuses = [c['status'] for c in crowded['candidates']]
+    assert 'completed' in statuses and set(statuses) & {'stopped', 'pruned'}, statuses
+    print(f"model_search: defaults first, pruning after one fold, budget stops new candidates; "
+          f"chose {found['best_params']}")
+
+
+def check_training_job(df):
+    from models.training import ModelRegistry, TrainingService
+
+    with sqlite3.connect("government_master.db") as conn:
+        conn.execute("CREATE TABLE colleges (college_id TEXT)")
+    with sqlite3.connect("main.db") as conn:
+        df.to_sql('students', conn, index=False)
+    service = TrainingService(ModelRegistry("model_registry"), government_db="government_master.db",
+                              main_db="main.db")
+
+    job_id = service.submit(reason="search", search={'max_candidates': 4, 'folds': 3})
+    service.wait()
+    job = service.get_job(job_id)
+    assert job['status'] == 'completed' and job['mode'] == 'search', job
+    metrics = service.registry.metrics(job['model_version'])
+    assert len(metrics['search']['candidates']) == 4
+    assert metrics['rf_params'] == metrics['search']['best_params']
+
+    job_id = service.submit(reason="full")
+    service.wait()
+    job = service.get_job(job_id)
+    assert job['mode'] == 'full' and job['metrics']['rf_params'] == metrics['rf_params'], job
+
+    # With a model active, candidates are compared on its stored features
+    job_id = service.submit(reason="search again", search={'max_candidates': 2, 'folds': 3})
+    service.wait()
+    job = service.get_job(job_id)
+    assert job['status'] == 'completed' and job['metrics']['search']['stored_features'], job
+    print("model_search: search job recorded its candidates; the next full retrain kept the chosen settings; "
+          "a later search read the feature store")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--candidates", type=int, default=12)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from models.model_search import search
+
+    df = ENGINE.batch_calculate_risk(make_cohort(args.rows, seed=1))
+    X, y = training_matrix(df)
+    serial = search(X, y, max_candidates=args.candidates, folds=args.folds, workers=1)
+    parallel = search(X, y, max_candidates=args.candidates, folds=args.folds, workers=args.workers)
+    key = lambda c: str(c['params'])
+    for one, other in zip(sorted(serial['candidates'], key=key), sorted(parallel['candidates'], key=key)):
+        folds = min(len(one['fold_accuracies']), len(other['fold_accuracies']))
+        assert one['fold_accuracies'][:folds] == other['fold_accuracies'][:folds], (one, other)
+    check_search(parallel, X, y)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            check_training_job(df.head(5000))
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'params':<80}{'status':>10}{'acc':>8}{'fit s':>8}{'row us':>9}")
+    for c in parallel['candidates']:
+        if c['status'] == 'skipped':
+            continue
+        print(f"{str(c['params']):<80}{c['status']:>10}{c['accuracy']:>8.3f}{c['fit_s']:>8.2f}"
+              f"{c['predict_row_us']:>9.0f}")
+    results = {
+        'rows': args.rows, 'candidates': args.candidates, 'folds': serial['folds'],
+        'serial': {'wall_s': serial['wall_s'], 'cpu_s': serial['cpu_s']},
+        'parallel': {'workers': parallel['workers'], 'wall_s': parallel['wall_s'], 'cpu_s': parallel['cpu_s']},
+        'speedup': serial['wall_s'] / parallel['wall_s'],
+        'best_params': parallel['best_params'], 'best_accuracy': parallel['best_accuracy'],
+        'search': parallel['candidates']
+    }
+    print(f"serial {serial['wall_s']:.1f}s, {parallel['workers']} workers {parallel['wall_s']:.1f}s "
+          f"({results['speedup']:.2f}x on {os.cpu_count()} CPUs)")
+    write_results("model_search", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
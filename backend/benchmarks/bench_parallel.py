@@ -0,0 +1,130 @@
+"""Statewide operations: sequential vs the bounded parallel layer.
+
+Builds N synthetic tenant databases in a temporary directory. Checks that
+the parallel government dashboard stats and per-tenant scoring equal
+their sequential results, and that timeouts and failures stay per tenant
+and count from when a worker starts the tenant, not from when it was queued.
+Then times both. Expect the speedup to follow the number of cores
+(cpu_count is recorded with the results).
+
+    cd backend && python -m benchmarks.bench_parallel [--colleges 8 --rows 50000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+from utils.parallel import map_tenants, reduce_partials
+
+
+def score_tenant(college_id: str, db_path: str):
+    """CPU-bound per-tenant work: batch-score every student and count levels"""
+    with sqlite3.connect(db_path) as conn:
+        df = pd.read_sql_query("SELECT * FROM students", conn)
+    scored = RiskEngine(cache_size=0).batch_calculate_risk(df)
+    return {'total_students': len(scored), 'risk_distribution': scored['risk_level'].value_counts().to_dict()}
+
+
+def slow_tenant(college_id: str):
+    if college_id == 'slow':
+        time.sleep(2)
+    if college_id == 'broken':
+        raise RuntimeError("database is locked")
+    return college_id
+
+
+def paced_tenant(college_id: str):
+    time.sleep(0.3)
+    return college_id
+
+
+def build_tenants(colleges: int, rows: int):
+    from models.multi_tenant_db import MultiTenantDatabase
+
+    db = MultiTenantDatabase()
+    college_ids = [f"c{i:02d}" for i in range(colleges)]
+    with sqlite3.connect(db.government_db) as conn:
+        conn.execute("DELETE FROM colleges")
+        conn.executemany("INSERT INTO colleges (college_id, college_name) VALUES (?, ?)",
+                         [(c, f"College {c}") for c in college_ids])
+    engine = RiskEngine(cache_size=0)
+    for i, college_id in enumerate(college_ids):
+        cohort = engine.batch_calculate_risk(make_cohort(rows, seed=i, colleges=[college_id]))
+        with sqlite3.connect(db.get_college_database_path(college_id)) as conn:
+            cohort.to_sql('students', conn, index=False)
+    return db, {c: db.get_college_database_path(c) for c in college_ids}
+
+
+def sequential_dashboard(db, college_ids):
+    per_college = {c: db.get_college_dashboard_stats(c) for c in college_ids}
+    return reduce_partials(per_college.values(), counts=['total_students', 'high_risk_count'],
+                           distributions=['risk_distribution', 'department_distribution'])
+
+
+def check(db, databases):
+    parallel = db.get_government_dashboard_stats()
+    expected = sequential_dashboard(db, databases)
+    assert {k: parallel[k] for k in expected} == expected
+    assert parallel['total_colleges'] == len(databases)
+
+    sequential_scores = {c: score_tenant(c, path) for c, path in databases.items()}
+    parallel_scores = map_tenants(score_tenant, databases, processes=True, timeout=None)
+    assert parallel_scores.ok and parallel_scores.results == sequential_scores
+
+    outcome = map_tenants(slow_tenant, ['a', 'slow', 'broken', 'b'], timeout=0.5)
+    assert outcome.results == {'a': 'a', 'b': 'b'}
+    assert outcome.errors['slow'].startswith('timed out') and 'database is locked' in outcome.errors['broken']
+
+    # One worker process: tenants queued behind a running one start their timeout when the worker picks them up
+    queued = map_tenants(paced_tenant, ['a', 'b', 'c'], processes=True, max_workers=1, timeout=0.5)
+    assert queued.ok and queued.results == {'a': 'a', 'b': 'b', 'c': 'c'}, queued.errors
+    print(f"parallel: dashboard stats and scoring over {len(databases)} tenants match sequential; "
+          f"timeouts and failures isolated")
+
+
+def bench(db, databases, rows: int):
+    college_ids = list(databases)
+    results = {
+        'colleges': len(college_ids),
+        'rows_per_college': rows,
+        'dashboard_sequential': time_call(lambda: sequential_dashboard(db, college_ids)),
+        'dashboard_threads': time_call(db.get_government_dashboard_stats),
+        'scoring_sequential': time_call(lambda: [score_tenant(c, p) for c, p in databases.items()], repeat=1),
+        'scoring_processes': time_call(lambda: map_tenants(score_tenant, databases, processes=True, timeout=None),
+                                       repeat=1),
+    }
+    for name, timing in results.items():
+        if isinstance(timing, dict):
+            print(f"{name:<22} best {timing['best_s']:.3f}s")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--colleges", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Tenant paths are relative to the working directory, as in the app
+        os.chdir(tmp)
+        try:
+            db, databases = build_tenants(args.colleges, args.rows)
+            check(db, databases)
+            results = bench(db, databases, args.rows)
+        finally:
+            os.chdir(cwd)
+    write_results("parallel", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""RiskEngine: vectorized batch scoring vs the per-student scalar path.
+
+First runs a randomized parity check (many seeds, threshold edge values,
+missing values and missing columns) asserting the batch results are
+bit-identical to calculate_risk_score, then times both paths.
+
+    cd backend && python -m benchmarks.bench_risk_engine [--sizes 1000,100000,1000000]
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine, records_frame
+
+# Above this many rows the scalar path is extrapolated from its per-row cost
+SCALAR_MAX_ROWS = 100000
+
+
+def scalar_scores(engine: RiskEngine, df):
+    """The previous implementation: one scalar call per row"""
+    scores, levels = [], []
+    for record in df.to_dict('records'):
+        result = engine._calculate_risk_score(record)
+        scores.append(result['composite_score'])
+        levels.append(result['risk_level'])
+    return scores, levels
+
+
+def check_parity(seeds: int = 25, rows: int = 2000):
+    engine = RiskEngine()
+    for seed in range(seeds):
+        df = make_cohort(rows, seed=seed, edge_cases=True)
+        if seed % 5 == 4:
+            # Absent columns fall back to the scalar path's defaults
+            df = df.drop(columns=['family_income', 'payment_status', 'distance_from_college'])
+
+        batch = engine.batch_calculate_risk(df)
+        expected_scores, expected_levels = scalar_scores(engine, df)
+
+        actual_scores = batch['risk_score'].to_numpy()
+        expected = np.array(expected_scores, dtype=float)
+        assert np.array_equal(actual_scores.view(np.int64), expected.view(np.int64)), f"score mismatch (seed {seed})"
+        assert list(batch['risk_level']) == expected_levels, f"level mismatch (seed {seed})"
+    print(f"parity: {seeds} cohorts x {rows} rows bit-identical")
+
+
+def check_stored_breakdown(rows: int = 2000):
+    """Breakdowns rebuilt from stored columns equal a fresh scalar rescore"""
+    engine = RiskEngine()
+    df = make_cohort(rows, seed=7, edge_cases=True)
+    with sqlite3.connect(":memory:") as conn:
+        engine.batch_calculate_risk(df, with_breakdown=True).to_sql('students', conn, index=False)
+        stored = pd.read_sql_query("SELECT * FROM students", conn).to_dict('records')
+
+    for student in stored:
+        rebuilt = engine.breakdown_from_stored(student)
+        # repr() so NaN values (missing fees_due) compare equal
+        assert repr(rebuilt) == repr(engine._calculate_risk_score(student)), \
+            f"breakdown mismatch for {student['student_id']}"
+    print(f"stored breakdown: {rows} rows identical to rescoring")
+
+
+def check_assess(rows: int = 2000):
+    """assess_batch over merged-upload style dicts (some keys absent) equals per-student assess"""
+    engine = RiskEngine(cache_size=0)
+    rng = np.random.default_rng(11)
+    records = make_cohort(rows, seed=11, edge_cases=True).to_dict('records')
+    for record in records:
+        for field in ['total_fees', 'fees_due', 'payment_status', 'family_income', 'region']:
+            if rng.random() < 0.2:
+                del record[field]
+
+    assessed = engine.assess_batch(records_frame(records), with_breakdown=True).to_dict('records')
+    for record, row in zip(records, assessed):
+        expected = engine.assess(record)
+        multi_area = expected['multi_area']
+        actual = (row['risk_score'], row['risk_level'], row['multi_area_risk'], row['risk_areas_count'],
+                  row['multi_area_severity'], row['intervention_priority'],
+                  {column: row[column] for column in engine.breakdown_columns(expected)})
+        wanted = (expected['composite_score'], expected['risk_level'], multi_area['is_multi_area_risk'],
+                  multi_area['risk_areas_count'], multi_area['severity'], multi_area['intervention_priority'],
+                  engine.breakdown_columns(expected))
+        assert repr(actual) == repr(wanted), f"assess mismatch for {record['student_id']}: {actual} != {wanted}"
+    print(f"assess: {rows} rows with absent keys identical to per-student assess")
+
+
+def bench(sizes):
+    engine = RiskEngine()
+    results = {}
+    for n in sizes:
+        df = make_cohort(n)
+
+        start = time.perf_counter()
+        engine.batch_calculate_risk(df)
+        batch_s = time.perf_counter() - start
+
+        sample = df if n <= SCALAR_MAX_ROWS else df.iloc[:SCALAR_MAX_ROWS]
+        start = time.perf_counter()
+        scalar_scores(engine, sample)
+        scalar_s = (time.perf_counter() - start) * (n / len(sample))
+
+        results[n] = {
+            'batch_s': batch_s,
+            'scalar_s': scalar_s,
+            'scalar_extrapolated': len(sample) < n,
+            'speedup': scalar_s / batch_s
+        }
+        print(f"{n:>9} rows  batch {batch_s:8.3f}s  scalar {scalar_s:9.3f}s"
+              f"{' (extrapolated)' if len(sample) < n else ''}  speedup {scalar_s / batch_s:7.1f}x")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    args = parser.parse_args()
+
+    check_parity()
+    check_stored_breakdown()
+    check_assess()
+    results = bench([int(s) for s in args.sizes.split(",")])
+    write_results("risk_engine", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Risk history: delta-encoded snapshots, trajectories and daily trends.
+
+Checks first, on a temporary database: re-recording an unchanged cohort
+appends nothing, only students whose score or level changed are appended,
+trajectories list each student's distinct values in order, and
+daily_trend reproduces the actual level distribution after every
+ingestion day, also when a replacing upload removes students, and
+snapshots taken within the same millisecond keep both rows. Then times
+snapshots of a large cohort and the two queries, and reports the storage
+cost per ingestion.
+
+    cd backend && python -m benchmarks.bench_risk_history [--rows 100000 --days 30]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+from models.risk_history import daily_trend, record_snapshot, student_trajectory
+from models.risk_rules import LEVELS
+
+DAY = 86400 * 1000
+MINUTE = 60 * 1000
+START = 1767225600 * 1000  # 2026-01-01 UTC, milliseconds
+
+
+def ingestions(rows: int, days: int, change_rate: float, seed: int = 3):
+    """Scored cohort per day; each day a share of students' attendance/marks drift"""
+    engine = RiskEngine(cache_size=0)
+    rng = np.random.default_rng(seed)
+    df = make_cohort(rows, seed=seed)
+    for day in range(days):
+        if day:
+            drift = rng.random(rows) < change_rate
+            df.loc[drift, 'attendance_percentage'] = np.clip(
+                df.loc[drift, 'attendance_percentage'] + rng.normal(0, 8, int(drift.sum())), 0, 100).round(1)
+            df.loc[drift, 'marks'] = np.clip(df.loc[drift, 'marks'] + rng.normal(0, 8, int(drift.sum())), 0, 100).round(1)
+        yield START + day * DAY, engine.batch_calculate_risk(df)[['student_id', 'risk_score', 'risk_level']].copy()
+
+
+def database_bytes(conn) -> int:
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def check(rows: int = 3000, days: int = 6):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "history.db")
+        expected_distributions, values = [], {}
+        previous = None
+        with sqlite3.connect(db_path) as conn:
+            for recorded_at, scored in ingestions(rows, days, change_rate=0.1):
+                appended = record_snapshot(conn, scored, recorded_at=recorded_at)
+                conn.commit()
+                if previous is None:
+                    assert appended == rows
+                else:
+                    changed = ((scored['risk_score'].to_numpy() != previous['risk_score'].to_numpy())
+                               | (scored['risk_level'].to_numpy() != previous['risk_level'].to_numpy()))
+                    assert appended == int(changed.sum()), (appended, int(changed.sum()))
+                assert record_snapshot(conn, scored, recorded_at=recorded_at + MINUTE) == 0
+                conn.commit()
+
+                for student_id, score, level in scored.itertuples(index=False):
+                    history = values.setdefault(student_id, [])
+                    if not history or history[-1] != (score, level):
+                        history.append((score, level))
+                counts = scored['risk_level'].value_counts()
+                expected_distributions.append({level: int(counts.get(level, 0)) for level in LEVELS})
+                previous = scored
+
+        for student_id in list(values)[:300]:
+            trajectory = [(point['risk_score'], point['risk_level']) for point in student_trajectory(db_path, student_id)]
+            assert trajectory == values[student_id], student_id
+
+        trend = daily_trend(db_path)
+        assert len(trend) == days
+        for point, expected in zip(trend, expected_distributions):
+            assert {level: point[level] for level in LEVELS} == expected, (point, expected)
+
+        # A replacing upload without the first 100 students removes them from the trend; a later one re-adds them
+        dropped = previous['student_id'].iloc[0]
+        with sqlite3.connect(db_path) as conn:
+            assert record_snapshot(conn, previous.iloc[100:], recorded_at=START + days * DAY, complete=True) == 100
+            assert record_snapshot(conn, previous.iloc[100:], recorded_at=START + days * DAY + MINUTE, complete=True) == 0
+            assert record_snapshot(conn, previous, recorded_at=START + (days + 1) * DAY, complete=True) == 100
+            conn.commit()
+        trend = daily_trend(db_path)
+        counts = previous.iloc[100:]['risk_level'].value_counts()
+        assert trend[-2]['total_students'] == rows - 100
+        assert {level: trend[-2][level] for level in LEVELS} == {level: int(counts.get(level, 0)) for level in LEVELS}
+        assert {level: trend[-1][level] for level in LEVELS} == expected_distributions[-1]
+        levels = [point['risk_level'] for point in student_trajectory(db_path, dropped)]
+        assert levels[-2:] == ['Removed', values[dropped][-1][1]], levels
+
+        # Snapshots in the same instant (an upload, then its rescoring) both keep their rows
+        first = previous.iloc[:10].assign(risk_score=1.0, risk_level='Low')
+        second = previous.iloc[:10].assign(risk_score=95.0, risk_level='Critical')
+        with sqlite3.connect(db_path) as conn:
+            assert record_snapshot(conn, first) == 10 and record_snapshot(conn, second) == 10
+            conn.commit()
+        student_id = previous['student_id'].iloc[0]
+        assert [point['risk_score'] for point in student_trajectory(db_path, student_id)][-2:] == [1.0, 95.0]
+        # An explicit timestamp that is already taken is an error, not a silent overwrite
+        with sqlite3.connect(db_path) as conn:
+            recorded_at = conn.execute("SELECT MAX(recorded_at) FROM risk_history").fetchone()[0]
+            try:
+                record_snapshot(conn, first, recorded_at=recorded_at)
+                raise AssertionError("colliding snapshot was written")
+            except sqlite3.IntegrityError:
+                conn.rollback()
+    print(f"risk history: {days} ingestions x {rows} rows delta-encoded; trajectories and daily trend replay exactly, "
+          "including students removed and re-added by replacing uploads and back-to-back snapshots")
+
+
+def bench(rows: int, days: int):
+    results = {'rows': rows, 'days': days}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "history.db")
+        snapshot_s, appended, sizes = [], [], []
+        with sqlite3.connect(db_path) as conn:
+            for recorded_at, scored in ingestions(rows, days, change_rate=0.05):
+                start = time.perf_counter()
+                appended.append(record_snapshot(conn, scored, recorded_at=recorded_at))
+                conn.commit()
+                snapshot_s.append(time.perf_counter() - start)
+                sizes.append(database_bytes(conn))
+
+            start = time.perf_counter()
+            assert record_snapshot(conn, scored, recorded_at=recorded_at + MINUTE) == 0
+            conn.commit()
+            results['unchanged_snapshot_s'] = time.perf_counter() - start
+
+        growth = np.diff(sizes)
+        results['first_snapshot_s'] = snapshot_s[0]
+        results['incremental_snapshot_mean_s'] = float(np.mean(snapshot_s[1:])) if days > 1 else None
+        results['rows_per_incremental_snapshot'] = float(np.mean(appended[1:])) if days > 1 else None
+        results['database_mb'] = sizes[-1] / 1e6
+        results['bytes_per_incremental_snapshot'] = float(growth.mean()) if days > 1 else None
+        results['bytes_per_full_copy'] = sizes[0]
+
+        student_id = scored['student_id'].iloc[rows // 2]
+        results['trajectory_query'] = time_call(lambda: student_trajectory(db_path, student_id), repeat=5, number=20)
+        results['daily_trend_query'] = time_call(lambda: daily_trend(db_path), repeat=3)
+
+    print(f"first snapshot {results['first_snapshot_s']:.3f}s, incremental {results['incremental_snapshot_mean_s']:.3f}s "
+          f"({results['rows_per_incremental_snapshot']:.0f} rows), unchanged {results['unchanged_snapshot_s']:.3f}s")
+    print(f"storage {results['database_mb']:.1f} MB total, {results['bytes_per_incremental_snapshot'] / 1e3:.0f} kB per "
+          f"incremental snapshot vs {results['bytes_per_full_copy'] / 1e6:.1f} MB for a full copy")
+    print(f"trajectory {results['trajectory_query']['best_s'] * 1e3:.2f} ms, "
+          f"daily trend {results['daily_trend_query']['best_s']:.3f}s")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    check()
+    write_results("risk_history", bench(args.rows, args.days))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
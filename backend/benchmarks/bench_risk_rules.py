@@ -0,0 +1,100 @@
+"""Risk rule profiles vs the hand-coded scorers they replaced.
+
+Parity with benchmarks.legacy_scorers is tested in
+tests/test_risk_rules.py. This checks that EnhancedRiskEngine's batch
+rows render exactly like calculate_comprehensive_risk, then times (best
+of 3) legacy scalar, compiled scalar and compiled vectorized scoring.
+The compiled scalar evaluators are plain closures over the profile
+data. For the 'standard' profile they take about 1.4x the time of the
+bare legacy if/elif scorer, which returns less per component.
+
+    cd backend && python -m benchmarks.bench_risk_rules [--rows 20000]
+"""
+import argparse
+import sys
+import time
+
+from api.multi_file_upload import multi_factor_rules
+from benchmarks import legacy_scorers
+from benchmarks.harness import write_results
+from benchmarks.synthetic import rule_edge_cohort
+from models.enhanced_risk_engine import EnhancedRiskEngine
+from models.risk_engine import RiskEngine
+
+
+def check_enhanced_batch(seeds: int, rows: int):
+    """calculate_batch rows render exactly like calculate_comprehensive_risk, bad inputs included"""
+    engine = EnhancedRiskEngine()
+    for seed in range(seeds):
+        df = rule_edge_cohort(rows, seed)
+        if seed % 2:
+            df['attendance_percentage'] = df['attendance_percentage'].astype(object)
+            df.loc[df.sample(frac=0.02, random_state=seed).index, 'attendance_percentage'] = 'absent'
+
+        batch = engine.calculate_batch(df)
+        assert batch.frame['calculated_at'].nunique() == 1
+        for position, student in enumerate(df.to_dict('records')):
+            expected = engine.calculate_comprehensive_risk(student)
+            actual = batch.details(position)
+            assert actual['calculated_at'] == batch.calculated_at
+            expected.pop('calculated_at')
+            actual.pop('calculated_at')
+            assert repr(actual) == repr(expected), f"enhanced batch mismatch (seed {seed}): {actual} != {expected}"
+            assert batch.frame['risk_level'].iat[position] == expected['risk_level']
+    print(f"enhanced batch: {seeds} cohorts x {rows} rows render identically to calculate_comprehensive_risk")
+
+
+def timed(fn, repeat: int = 3) -> float:
+    """Best of `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(rows: int):
+    df = rule_edge_cohort(rows, 99)
+    records = df.to_dict('records')
+    standard = RiskEngine()
+    enhanced, legacy_enhanced = EnhancedRiskEngine(), legacy_scorers.LegacyEnhancedRiskEngine()
+
+    results = {
+        'standard': {
+            'legacy_scalar_s': timed(lambda: [legacy_scorers.standard_score(r, standard.thresholds, standard.weights)
+                                              for r in records]),
+            'compiled_scalar_s': timed(lambda: [standard._rules.evaluate(r) for r in records]),
+            'compiled_batch_s': timed(lambda: standard._rules.evaluate_frame(df)),
+        },
+        'enhanced': {
+            'legacy_scalar_s': timed(lambda: [legacy_enhanced.calculate_comprehensive_risk(r) for r in records]),
+            'compiled_scalar_s': timed(lambda: [enhanced._rules.evaluate(r) for r in records]),
+            'compiled_batch_s': timed(lambda: enhanced._rules.evaluate_frame(df)),
+            'calculate_batch_s': timed(lambda: enhanced.calculate_batch(df)),
+            'calculate_batch_render_50_s': timed(lambda: enhanced.calculate_batch(df).records(range(50))),
+        },
+        'multi_factor': {
+            'legacy_batch_s': timed(lambda: legacy_scorers.multi_factor_risk(df)),
+            'compiled_scalar_s': timed(lambda: [multi_factor_rules.evaluate(r) for r in records]),
+            'compiled_batch_s': timed(lambda: multi_factor_rules.evaluate_frame(df)),
+        },
+    }
+    for profile, timings in results.items():
+        print(f"{profile:<13}" + "  ".join(f"{key} {value:7.3f}s" for key, value in timings.items()))
+    return {'rows': rows, 'profiles': results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seeds", type=int, default=10)
+    args = parser.parse_args()
+
+    check_enhanced_batch(args.seeds, 2000)
+    write_results("risk_rules", bench(args.rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
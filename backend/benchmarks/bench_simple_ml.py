@@ -0,0 +1,120 @@
+"""SimpleMLModel: vectorized labelling and batch prediction vs per-row loops.
+
+The per-row references below are the loops the model used before: labels
+built one student at a time, and batch_predict calling predict_risk for
+each row. Both must produce identical results to the vectorized code.
+The per-row batch_predict is timed on --loop-rows and extrapolated
+linearly; everything else runs at --rows. The model file lives in a
+temporary directory.
+
+    cd backend && python -m benchmarks.bench_simple_ml [--rows 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import time_call, write_results
+from models.simple_ml import SimpleMLModel
+
+
+def loop_labels(attendance, marks, fees_due):
+    labels = []
+    for i in range(len(attendance)):
+        score = 0
+        if attendance[i] < 60: score += 2
+        elif attendance[i] < 75: score += 1
+        if marks[i] < 50: score += 2
+        elif marks[i] < 65: score += 1
+        if fees_due[i] > 25000: score += 2
+        elif fees_due[i] > 15000: score += 1
+        if score >= 5: labels.append(3)
+        elif score >= 3: labels.append(2)
+        elif score >= 1: labels.append(1)
+        else: labels.append(0)
+    return labels
+
+
+def loop_batch_predict(model: SimpleMLModel, students_df: pd.DataFrame):
+    results = []
+    for _, student in students_df.iterrows():
+        prediction = model.predict_risk(student.get('attendance_percentage', 75), student.get('marks', 70),
+                                        student.get('fees_due', 10000))
+        results.append({'student_id': student.get('student_id', ''), 'risk_level': prediction['risk_level'],
+                        'risk_score': prediction['risk_score']})
+    return results
+
+
+def students(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(rows)
+    df = pd.DataFrame({
+        'student_id': [f"S{i:07d}" for i in range(rows)],
+        'attendance_percentage': np.round(rng.uniform(20, 100, rows), 1),
+        'marks': np.round(rng.uniform(10, 100, rows), 1),
+        'fees_due': rng.choice([0, 10000, 15000, 25000, 40000], rows).astype(float),
+    })
+    # Scores exactly on the thresholds exercise the bin edges
+    df.loc[:9, 'attendance_percentage'] = [60, 75, 59.9, 74.9, 60, 75, 60, 75, 60, 75]
+    return df
+
+
+def check(model: SimpleMLModel):
+    df = model.create_sample_data(20000)
+    expected = loop_labels(df['attendance_percentage'].to_numpy(), df['marks'].to_numpy(), df['fees_due'].to_numpy())
+    assert df['risk_level'].tolist() == expected
+
+    sample = students(2000)
+    assert model.batch_predict(sample) == loop_batch_predict(model, sample)
+    without_fees = sample.drop(columns=['fees_due', 'student_id'])
+    assert model.batch_predict(without_fees) == loop_batch_predict(model, without_fees)
+    print("simple_ml: vectorized labels and batch_predict match the per-row loops")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--loop-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    import warnings
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            model = SimpleMLModel()
+            model.train_model()
+            check(model)
+
+            df = students(args.rows)
+            loop_df = df.head(args.loop_rows)
+            start = time.perf_counter()
+            loop_batch_predict(model, loop_df)
+            loop_s = (time.perf_counter() - start) * args.rows / len(loop_df)
+
+            sample = model.create_sample_data(args.rows)
+            columns = [sample[c].to_numpy() for c in ('attendance_percentage', 'marks', 'fees_due')]
+            results = {
+                'rows': args.rows,
+                'labels_loop': time_call(lambda: loop_labels(*columns), repeat=1),
+                'labels_vectorized': time_call(lambda: model.create_sample_data(args.rows)),
+                'batch_predict_loop': {'best_s': loop_s, 'extrapolated_from': len(loop_df)},
+                'batch_predict_vectorized': time_call(lambda: model.batch_predict(df)),
+            }
+        finally:
+            os.chdir(cwd)
+
+    for name in ('labels_loop', 'labels_vectorized', 'batch_predict_loop', 'batch_predict_vectorized'):
+        best = results[name]['best_s']
+        print(f"{name:<26}{best:>10.3f}s {best / args.rows * 1e6:>10.2f} us/student")
+    write_results("simple_ml", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""What-if simulation on a 100k cohort.
+
+Checks first: an empty perturbation list changes nothing, transition
+rows/columns sum to the before/after distributions, rescoring only the
+affected rows matches rescoring the whole perturbed cohort, sampled rows
+match calculate_risk_score on the perturbed dicts, and an add on a column
+the cohort lacks starts from the engine's default for it, and the cohort
+cache keeps at most MAX_CACHED_COHORTS tenants. Then times
+load_cohort (cold and cached) and simulate for typical questions.
+
+    cd backend && python -m benchmarks.bench_simulation [--rows 100000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models import simulation
+from models.risk_engine import RiskEngine
+from models.risk_rules import LEVELS
+
+SCENARIOS = {
+    'attendance_plus_10': [{'field': 'attendance_percentage', 'op': 'add', 'value': 10}],
+    'fee_waiver_low_income': [
+        {'field': 'fees_due', 'op': 'set', 'value': 0,
+         'where': [{'field': 'family_income', 'op': '<', 'value': 100000}]},
+        {'field': 'payment_status', 'op': 'set', 'value': 'Paid',
+         'where': [{'field': 'family_income', 'op': '<', 'value': 100000}]},
+    ],
+    'marks_tutoring_rural': [
+        {'field': 'marks', 'op': 'multiply', 'value': 1.15,
+         'where': [{'field': 'region', 'op': '==', 'value': 'Rural'}, {'field': 'marks', 'op': '<', 'value': 40}]},
+    ],
+}
+
+
+def check(rows: int = 20000):
+    engine = RiskEngine(cache_size=0)
+    df = make_cohort(rows, seed=7, edge_cases=True)[simulation.COHORT_COLUMNS]
+
+    unchanged = simulation.simulate(engine, df, [])
+    assert unchanged['before'] == unchanged['after'] and unchanged['affected_students'] == 0
+
+    for name, perturbations in SCENARIOS.items():
+        assert simulation.validate_perturbations(perturbations) == [], name
+        result = simulation.simulate(engine, df, perturbations)
+        transitions = result['transitions']
+        assert {level: sum(transitions[level].values()) for level in LEVELS} == result['before']
+        assert {level: sum(transitions[f][level] for f in LEVELS) for level in LEVELS} == result['after']
+
+        perturbed, affected = simulation.apply_perturbations(df, perturbations)
+        full = engine.score_arrays(perturbed)
+        assert simulation.level_counts(full['risk_level'].astype(np.int64)) == result['after'], name
+        assert round(float(full['composite_score'].mean()), 2) == result['mean_score']['after'], name
+
+        sample = np.flatnonzero(affected)[:200]
+        for position in sample:
+            record = perturbed.iloc[position].to_dict()
+            assert engine.calculate_risk_score(record)['risk_level'] == LEVELS[full['risk_level'][position]]
+
+    # A column the cohort lacks starts from the engine's default; a field without one is left alone
+    lacking = df.drop(columns=['distance_from_college', 'fees_paid'])
+    commute = [{'field': 'distance_from_college', 'op': 'add', 'value': 20}]
+    result = simulation.simulate(engine, lacking, commute)
+    expected = simulation.simulate(engine, df.assign(distance_from_college=0), commute)
+    assert result['affected_students'] == rows and result['after'] == expected['after']
+    assert result['after'] != result['before']
+    _, affected = simulation.apply_perturbations(lacking, [{'field': 'fees_paid', 'op': 'add', 'value': 1000}])
+    assert not affected.any()
+
+    bad = [{'field': 'name', 'value': 1}, {'field': 'region', 'op': 'add', 'value': 1},
+           {'field': 'marks', 'value': 5, 'where': [{'field': 'marks', 'op': '<', 'value': 'x'}]}]
+    assert len(simulation.validate_perturbations(bad)) == 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"tenant_{i}.db") for i in range(simulation.MAX_CACHED_COHORTS + 2)]
+        for i, path in enumerate(paths):
+            with sqlite3.connect(path) as conn:
+                df.iloc[i * 10:(i + 1) * 10].to_sql('students', conn, index=False)
+        simulation._cohorts.clear()
+        for path in paths:
+            simulation.load_cohort(path)
+        oldest_kept = paths[-simulation.MAX_CACHED_COHORTS]
+        simulation.load_cohort(oldest_kept)
+        assert list(simulation._cohorts) == paths[-simulation.MAX_CACHED_COHORTS + 1:] + [oldest_kept]
+    print(f"simulation: {len(SCENARIOS)} scenarios x {rows} rows consistent with full rescoring")
+
+
+def bench(rows: int):
+    engine = RiskEngine(cache_size=0)
+    cohort = make_cohort(rows, seed=11)
+    results = {'rows': rows}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_students.db")
+        with sqlite3.connect(db_path) as conn:
+            cohort.to_sql('students', conn, index=False)
+
+        results['load_cohort_cold'] = time_call(lambda: (simulation._cohorts.clear(), simulation.load_cohort(db_path)),
+                                                repeat=3)
+        results['load_cohort_cached'] = time_call(lambda: simulation.load_cohort(db_path), repeat=3)
+        df = simulation.load_cohort(db_path)
+
+    for name, perturbations in SCENARIOS.items():
+        results[name] = time_call(lambda: simulation.simulate(engine, df, perturbations), repeat=3)
+        outcome = simulation.simulate(engine, df, perturbations)
+        results[name]['affected_students'] = outcome['affected_students']
+        results[name]['improved'] = outcome['improved']
+
+    for name, timing in results.items():
+        if isinstance(timing, dict):
+            print(f"{name:<24} best {timing['best_s']:.3f}s  mean {timing['mean_s']:.3f}s")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    check()
+    write_results("simulation", bench(args.rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Transfer-size measurements for the static asset pipeline.
+
+Requests every page route and static asset through the app with different
+Accept-Encoding headers and records the bytes on the wire, then repeats
+with If-None-Match to confirm revalidation costs no body. Static assets
+must also answer HEAD with the GET headers.
+
+    cd backend && python -m benchmarks.bench_static_assets
+"""
+import os
+import sys
+
+from benchmarks.harness import write_results
+
+PAGE_ROUTES = ["/", "/login-college", "/dashboard", "/upload", "/students", "/alerts", "/email-config"]
+
+ENCODINGS = {
+    'identity': "identity",
+    'gzip': "gzip",
+    'br': "br, gzip",
+}
+
+
+def wire_bytes(response) -> int:
+    return int(response.headers.get("content-length", 0))
+
+
+def measure(client, url: str) -> dict:
+    row = {}
+    for label, header in ENCODINGS.items():
+        response = client.get(url, headers={"Accept-Encoding": header})
+        row[label] = wire_bytes(response)
+        row[f"{label}_content_encoding"] = response.headers.get("content-encoding", "identity")
+        revisit = client.get(url, headers={"Accept-Encoding": header, "If-None-Match": response.headers["etag"]})
+        row[f"{label}_revisit_status"] = revisit.status_code
+    row['cache_control'] = response.headers.get("cache-control")
+    return row
+
+
+def main() -> int:
+    from fastapi.testclient import TestClient
+    from app_factory import create_app
+    from utils.static_assets import static_assets
+
+    results = {}
+    with TestClient(create_app()) as client:
+        urls = PAGE_ROUTES + [f"/static/{fp}" for fp in static_assets.manifest.values()]
+        for url in urls:
+            results[url] = measure(client, url)
+        for url in urls[len(PAGE_ROUTES):]:
+            head, get = client.head(url), client.get(url)
+            assert head.status_code == 200, f"HEAD {url}: {head.status_code}"
+            assert head.headers["etag"] == get.headers["etag"] and head.content == b""
+
+    original = sum(os.path.getsize(os.path.join(static_assets.directory, name))
+                   for name in os.listdir(static_assets.directory))
+    totals = {label: sum(r[label] for r in results.values()) for label in ENCODINGS}
+
+    print(f"{'url':<48}{'identity':>10}{'gzip':>10}{'br':>10}  cache-control")
+    for url, row in results.items():
+        print(f"{url:<48}{row['identity']:>10}{row['gzip']:>10}{row['br']:>10}  {row['cache_control']}")
+    print(f"{'total':<48}{totals['identity']:>10}{totals['gzip']:>10}{totals['br']:>10}")
+    print(f"static directory on disk: {original} bytes")
+
+    write_results("static_assets", {'urls': results, 'totals': totals, 'static_dir_bytes': original})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""/process-data latency with background training, and registry checks.
+
+Before this change the upload trained both models inside the request, so
+its latency was persistence plus training. 'upload_inline_training' times
+that (the request path plus train_models on the same rows); 'upload' times
+the route itself, which now returns once the students are stored and a
+training job is queued. The job is then awaited and its model checked in
+the registry: a version directory appears complete or not at all, the
+ACTIVE pointer moves only on promotion, and a clearly worse candidate is
+not promoted. A fresh app must then load the active model during startup
+and report it in /health.
+
+Everything runs in a temporary working directory; the repository
+databases and model_registry are never touched.
+
+    cd backend && python -m benchmarks.bench_training [--rows 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort, upload_files
+
+
+def post_upload(client, content: bytes, session_id: str):
+    files = {'file': ('students.csv', content, 'text/csv')}
+    data = {'mappings': json.dumps({}), 'session_id': session_id}
+    return client.post("/api/process-data", files=files, data=data)
+
+
+def check_registry(services, job_id: str):
+    from models.training import PROMOTION_TOLERANCE
+
+    services.training.wait(timeout=600)
+    job = services.training.get_job(job_id)
+    assert job['status'] == 'completed', job
+    registry = services.training.registry
+    version = job['model_version']
+    assert job['promoted'] and registry.active_version() == version
+    assert services.ml_predictor.version == version and services.ml_predictor.is_trained
+
+    # An interrupted save leaves only a hidden staging directory, never a version
+    os.makedirs(os.path.join(registry.directory, ".staging-interrupted"))
+    assert [v['version'] for v in registry.versions()] == [version]
+
+    # A clearly worse candidate is registered but stays inactive
+    worse = dict(job['metrics'], random_forest_accuracy=job['metrics']['random_forest_accuracy']
+                 - 2 * PROMOTION_TOLERANCE)
+    assert not services.training.should_promote(worse)
+    candidate = registry.save(registry.load(version), worse)
+    assert registry.active_version() == version and len(registry.versions()) == 2
+    registry.promote(candidate)
+    assert registry.active_version() == candidate
+    registry.promote(version)
+    print(f"training: job {job_id[:8]} produced {version} "
+          f"(accuracy {job['metrics']['random_forest_accuracy']:.3f}); registry promotion checks passed")
+    return job
+
+
+def check_warm_start(services, version: str):
+    """A fresh app loads the active model during startup and reports it in /health"""
+    from fastapi.testclient import TestClient
+    from app_factory import create_app
+
+    services.reset()
+    with TestClient(create_app()) as client:
+        assert services.is_initialized('ml_predictor')
+        health = client.get("/health").json()
+    assert health['ready'] and health['ml_model'] == {'loaded': True, 'trained': True, 'version': version}, health
+    print(f"training: model {version} loaded at startup; /health reports it ready")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from models.ml_models import DropoutPredictor
+    from models.risk_engine import RiskEngine
+
+    content = upload_files(args.rows, seed=args.rows, colleges=['gpj'])['combined']
+    labelled = RiskEngine(cache_size=0).batch_calculate_risk(make_cohort(args.rows, seed=args.rows, colleges=['gpj']))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            from app_factory import create_app
+            from utils.services import services
+
+            services.reset()
+            with TestClient(create_app()) as client:
+                response = post_upload(client, content, "bench-check")
+                assert response.status_code == 200, response.text
+                job = check_registry(services, response.json()['stats']['ml_training']['job_id'])
+            check_warm_start(services, job['model_version'])
+            with TestClient(create_app()) as client:
+
+                def upload():
+                    assert post_upload(client, content, "bench").status_code == 200
+
+                def upload_inline_training():
+                    upload()
+                    DropoutPredictor().train_models(labelled)
+
+                results = {
+                    'rows': args.rows,
+                    'training_accuracy': job['metrics']['random_forest_accuracy'],
+                    'upload': time_call(upload, repeat=args.repeat),
+                    'upload_inline_training': time_call(upload_inline_training, repeat=args.repeat),
+                    'model_load': time_call(services.model_registry.load, repeat=args.repeat),
+                }
+                start = time.perf_counter()
+                services.training.wait(timeout=600)
+                results['queue_drain_s'] = time.perf_counter() - start
+        finally:
+            services.reset()
+            os.chdir(cwd)
+
+    for name in ('upload', 'upload_inline_training', 'model_load'):
+        print(f"{name:<24} best {results[name]['best_s']:.3f}s")
+    write_results("training", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
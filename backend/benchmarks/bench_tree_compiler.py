@@ -0,0 +1,130 @@
+"""CompiledForest (models.tree_compiler) vs scikit-learn predict_proba.
+
+Parity first: for every model the app serves, the compiled evaluator's
+probabilities must equal sklearn's bit for bit, and its labels must match
+sklearn's predict. The models checked are:
+- DropoutPredictor's forest and decision tree
+- the same forest after warm-start updates
+- SimpleMLModel's 100-tree forest of unlimited depth
+
+Decision-tree inputs with NaNs and a save/load(mmap_mode='r') round trip are checked
+too. Then both evaluators are timed on batches of --sizes rows; the
+compiled path is what predict_risk uses for one student.
+
+    cd backend && python -m benchmarks.bench_tree_compiler [--sizes 1,8,64,256,1024]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import time_call, write_results
+from benchmarks.synthetic import make_cohort
+from models.risk_engine import RiskEngine
+from models.tree_compiler import COMPILED_MAX_ROWS, CompiledForest, compile_model
+
+ENGINE = RiskEngine(cache_size=0)
+
+
+def assert_same(model, X: np.ndarray, label: str):
+    compiled = compile_model(model)
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    assert actual.shape == expected.shape and np.array_equal(actual, expected), label
+    assert np.array_equal(compiled.predict(X), model.predict(X)), label
+    return compiled
+
+
+def dropout_models():
+    from models.ml_models import DropoutPredictor
+
+    predictor = DropoutPredictor()
+    predictor.train_models(ENGINE.batch_calculate_risk(make_cohort(20000, seed=1)))
+    X = predictor.prepare_features(make_cohort(5000, seed=2)).to_numpy(dtype=float)
+    return predictor, X
+
+
+def check(predictor, X: np.ndarray):
+    from models.simple_ml import SimpleMLModel
+
+    assert_same(predictor.rf_model, X, "forest")
+    assert_same(predictor.dt_model, X, "decision tree")
+
+    holes = X.copy()
+    holes[::7, 0] = np.nan
+    holes[::11, -1] = np.nan
+    # Of these models, only the decision tree accepts NaN (sklearn routes it per node)
+    assert_same(predictor.dt_model, holes, "decision tree with NaN inputs")
+
+    simple = SimpleMLModel()
+    sample = simple.create_sample_data(2000)
+    features = sample[['attendance_percentage', 'marks', 'fees_due']].to_numpy()
+    from sklearn.ensemble import RandomForestClassifier
+    simple.model = RandomForestClassifier(n_estimators=100, random_state=42).fit(features, sample['risk_level'])
+    assert_same(simple.model, simple.create_sample_data(3000)[['attendance_percentage', 'marks', 'fees_due']]
+                .to_numpy(), "simple_ml forest")
+    one = simple.model.predict_proba(features[:1])[0]
+    level = simple.predict_risk(*features[0])['risk_level']
+    assert level == ['Low', 'Medium', 'High', 'Critical'][simple.model.classes_[one.argmax()]]
+
+    # predict_risk / predict_many / batch_predict give the same answers on both sides of COMPILED_MAX_ROWS
+    students = make_cohort(COMPILED_MAX_ROWS + 1, seed=3)
+    large = predictor.batch_predict(students)
+    small = predictor.batch_predict(students.head(COMPILED_MAX_ROWS))
+    assert small.equals(large.head(COMPILED_MAX_ROWS))
+    single = predictor.predict_risk(students.iloc[0].to_dict())
+    assert single['prediction'] == large['predicted_risk'].iloc[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        predictor.update_models(ENGINE.batch_calculate_risk(make_cohort(3000, seed=4)), new_trees=10)
+        compiled = assert_same(predictor.rf_model, X, "warm-started forest")
+        compiled.save(os.path.join(tmp, "rf"))
+        mapped = CompiledForest.load(os.path.join(tmp, "rf"), mmap_mode='r')
+        assert isinstance(mapped.threshold, np.memmap)
+        assert np.array_equal(mapped.predict_proba(X), predictor.rf_model.predict_proba(X))
+
+        updated = predictor.batch_predict(students.head(8))
+        predictor.save_models(tmp)
+        predictor.load_models(tmp, mmap_mode='r')
+        assert isinstance(predictor.compiled()[0].value, np.memmap)
+        assert predictor.batch_predict(students.head(8)).equals(updated)
+    print("tree_compiler: compiled probabilities and labels identical to sklearn (RF, DT, warm start, NaN, mmap)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,8,64,256,1024")
+    args = parser.parse_args()
+
+    import warnings
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    predictor, X = dropout_models()
+    check(predictor, X)
+    forest = predictor.rf_model
+    compiled = compile_model(forest)
+    frame = predictor.prepare_features(make_cohort(1, seed=5))
+
+    results = {'trees': compiled.n_trees, 'depth': compiled.depth, 'sizes': {}}
+    for rows in [int(s) for s in args.sizes.split(",")]:
+        batch = X[:rows]
+        number = max(1, 200 // rows)
+        sklearn_t = time_call(lambda: forest.predict_proba(batch), number=number)
+        compiled_t = time_call(lambda: compiled.predict_proba(batch), number=number)
+        results['sizes'][str(rows)] = {'sklearn': sklearn_t, 'compiled': compiled_t,
+                                       'speedup': sklearn_t['best_s'] / compiled_t['best_s']}
+        print(f"{rows:>6} rows  sklearn {sklearn_t['best_s'] * 1e6:>9.0f} us  compiled {compiled_t['best_s'] * 1e6:>9.0f} us"
+              f"  {results['sizes'][str(rows)]['speedup']:.1f}x")
+
+    student = make_cohort(1, seed=6).iloc[0].to_dict()
+    results['predict_risk'] = time_call(lambda: predictor.predict_risk(student), number=50)
+    results['one_row_frame_sklearn'] = time_call(lambda: forest.predict_proba(frame), number=50)
+    print(f"predict_risk (one student, end to end) {results['predict_risk']['best_s'] * 1e6:.0f} us")
+    write_results("tree_compiler", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Compare two result files of the same benchmark.
+
+Every timing in the two files (keys ending in _s, matched by their path
+in the results tree) is listed with the new/old ratio; ratios beyond
+--threshold are flagged. With only a benchmark name, the two most recent
+runs of it are compared.
+
+    cd backend && python -m benchmarks.compare OLD.json NEW.json [--threshold 1.2]
+    cd backend && python -m benchmarks.compare hot_paths
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict
+
+from benchmarks.harness import RESULTS_DIR
+
+
+def timings(node, prefix: str = "") -> Dict[str, float]:
+    """Flatten a results tree to {'a.b.best_s': seconds}"""
+    found = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and str(key).endswith("_s"):
+                found[path] = float(value)
+            else:
+                found.update(timings(value, path))
+    return found
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def latest_runs(name: str):
+    runs = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith(f"{name}-") and f.endswith(".json"))
+    if len(runs) < 2:
+        raise SystemExit(f"Need two runs of '{name}' in {RESULTS_DIR}, found {len(runs)}")
+    return os.path.join(RESULTS_DIR, runs[-2]), os.path.join(RESULTS_DIR, runs[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old", help="older result file, or a benchmark name")
+    parser.add_argument("new", nargs="?", help="newer result file")
+    parser.add_argument("--threshold", type=float, default=1.2, help="flag ratios above this (or below its inverse)")
+    args = parser.parse_args()
+
+    old_path, new_path = (args.old, args.new) if args.new else latest_runs(args.old)
+    old, new = load(old_path), load(new_path)
+    if old.get('benchmark') != new.get('benchmark'):
+        print(f"Different benchmarks: {old.get('benchmark')} vs {new.get('benchmark')}")
+        return 2
+
+    print(f"{old.get('benchmark')}: {old.get('recorded_at')} -> {new.get('recorded_at')}")
+    old_times, new_times = timings(old['results']), timings(new['results'])
+    regressions = 0
+    for path in sorted(old_times.keys() & new_times.keys()):
+        before, after = old_times[path], new_times[path]
+        ratio = after / before if before else float('inf')
+        flag = ""
+        if ratio > args.threshold:
+            flag, regressions = "  SLOWER", regressions + 1
+        elif ratio < 1 / args.threshold:
+            flag = "  faster"
+        print(f"{path:<70}{before:>11.4f}s{after:>11.4f}s{ratio:>8.2f}x{flag}")
+    for path in sorted(old_times.keys() ^ new_times.keys()):
+        print(f"{path:<70}  only in {'old' if path in old_times else 'new'}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def time_call(fn: Callable, repeat: int = 3, number: int = 1) -> Dict:
+    """Run fn `number` times per round for `repeat` rounds; report per-call seconds"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        'best_s': min(rounds),
+        'mean_s': sum(rounds) / len(rounds),
+        'repeat': repeat,
+        'number': number
+    }
+
+
+def write_results(name: str, results: Dict) -> str:
+    """Write a benchmark run to benchmarks/results/<name>-<timestamp>.json"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+    payload = {
+        'benchmark': name,
+        'recorded_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+    print(f"Results written to {path}")
+    return path
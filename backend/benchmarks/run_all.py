@@ -0,0 +1,82 @@
+"""Run every benchmark and record one suite summary.
+
+Each benchmark runs in its own interpreter (so imports and caches never
+leak between them) with the arguments of the chosen preset. Every
+benchmark writes its own benchmarks/results/<name>-<timestamp>.json; the
+suite summary lists those files with exit codes and wall times. Compare
+two runs with benchmarks.compare.
+
+    cd backend && python -m benchmarks.run_all [--preset quick|full] [--only hot_paths,risk_engine]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import BACKEND_DIR, RESULTS_DIR, write_results
+
+# module -> (quick arguments, full arguments)
+SUITE = {
+    'bench_risk_engine': (['--sizes', '1000,100000'], ['--sizes', '1000,100000,1000000']),
+    'bench_risk_rules': (['--rows', '20000', '--seeds', '3'], ['--rows', '100000']),
+    'bench_hot_paths': (['--sizes', '1000,100000'], ['--sizes', '1000,100000,1000000']),
+    'bench_simulation': (['--rows', '100000'], ['--rows', '100000']),
+    'bench_risk_history': (['--rows', '20000', '--days', '10'], ['--rows', '100000', '--days', '30']),
+    'bench_parallel': (['--rows', '10000'], ['--rows', '50000']),
+    'bench_training': (['--rows', '5000'], ['--rows', '20000']),
+    'bench_inference': (['--requests', '1000'], ['--requests', '5000']),
+    'bench_simple_ml': (['--rows', '100000', '--loop-rows', '500'], ['--rows', '100000']),
+    'bench_feature_encoder': (['--sizes', '1,64,100000'], ['--sizes', '1,64,10000,100000,1000000']),
+    'bench_incremental': (['--history', '30000', '--uploads', '1000,5000'], ['--history', '100000']),
+    'bench_model_search': (['--rows', '5000', '--candidates', '6', '--folds', '3'], ['--rows', '20000']),
+    'bench_feature_store': (['--rows', '50000', '--append', '2000'], ['--rows', '200000', '--append', '10000']),
+    'bench_tree_compiler': (['--sizes', '1,8,64,256'], ['--sizes', '1,8,64,256,1024,4096']),
+    'bench_csv_sniffer': (['--mb', '10'], ['--mb', '10']),
+    'bench_attributions': (['--rows', '20000', '--loop-rows', '200'], ['--rows', '100000', '--loop-rows', '1000']),
+    'bench_cold_start': ([], []),
+    'bench_static_assets': ([], []),
+}
+
+
+def result_files() -> set:
+    return set(os.listdir(RESULTS_DIR)) if os.path.isdir(RESULTS_DIR) else set()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only", default="", help="comma-separated benchmark names (without bench_)")
+    args = parser.parse_args()
+
+    only = {f"bench_{name}" for name in filter(None, args.only.split(","))}
+    summary = {'preset': args.preset, 'benchmarks': {}}
+    failed = []
+    for module, presets in SUITE.items():
+        if only and module not in only:
+            continue
+        arguments = presets[0] if args.preset == "quick" else presets[1]
+        print(f"== {module} {' '.join(arguments)}", flush=True)
+
+        before = result_files()
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-m", f"benchmarks.{module}", *arguments], cwd=BACKEND_DIR)
+        elapsed = time.perf_counter() - start
+
+        summary['benchmarks'][module] = {
+            'arguments': arguments,
+            'exit_code': completed.returncode,
+            'elapsed_s': round(elapsed, 2),
+            'results': sorted(result_files() - before)
+        }
+        if completed.returncode != 0:
+            failed.append(module)
+
+    write_results("suite", summary)
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Synthetic student cohorts for benchmarks and parity checks"""
+import numpy as np
+import pandas as pd
+
+COLLEGES = ['gpj', 'geca', 'rtu', 'itij', 'polu']
+DEPARTMENTS = ["Computer Science", "Mechanical", "Electrical", "Civil", "Electronics"]
+
+
+def make_cohort(n: int, seed: int = 42, colleges=COLLEGES, edge_cases: bool = False) -> pd.DataFrame:
+    """Random students shaped like a cleaned upload.
+
+    With edge_cases=True a share of values sit exactly on scoring thresholds
+    or are missing, which is what parity checks need to exercise.
+    """
+    rng = np.random.default_rng(seed)
+    college = rng.choice(colleges, n)
+
+    df = pd.DataFrame({
+        'student_id': [f"{c.upper()}{i:07d}" for i, c in enumerate(college)],
+        'name': [f"Student {i}" for i in range(n)],
+        'college_id': college,
+        'department': rng.choice(DEPARTMENTS, n),
+        'semester': rng.integers(1, 9, n),
+        'gender': rng.choice(['Male', 'Female'], n),
+        'attendance_percentage': np.round(np.clip(rng.normal(72, 18, n), 0, 100), 1),
+        'marks': np.round(np.clip(rng.normal(62, 18, n), 0, 100), 1),
+        'family_income': rng.integers(30000, 900000, n),
+        'family_size': rng.integers(2, 11, n),
+        'distance_from_college': rng.integers(0, 60, n),
+        'region': rng.choice(['Urban', 'Rural'], n, p=[0.6, 0.4]),
+        'electricity': rng.choice(['Regular', 'Irregular'], n, p=[0.8, 0.2]),
+        'internet_access': rng.choice(['Yes', 'No'], n, p=[0.7, 0.3]),
+        'caste_category': rng.choice(['General', 'OBC', 'SC', 'ST'], n),
+        'total_fees': rng.choice([0, 25000, 50000, 75000], n, p=[0.05, 0.3, 0.5, 0.15]),
+        'payment_status': rng.choice(['Paid', 'Partial', 'Pending'], n, p=[0.6, 0.25, 0.15]),
+    })
+    df['fees_due'] = np.round(df['total_fees'] * rng.uniform(0, 1, n))
+    df['fees_paid'] = df['total_fees'] - df['fees_due']
+
+    if edge_cases:
+        edges = {
+            'attendance_percentage': [45, 60, 75, 44.99, 75.0001],
+            'marks': [40, 55, 70, 39.5],
+            'family_income': [100000, 200000, 300000],
+            'distance_from_college': [15, 30, 16, 31],
+            'family_size': [7, 8],
+        }
+        for column, values in edges.items():
+            mask = rng.random(n) < 0.2
+            df.loc[mask, column] = rng.choice(values, int(mask.sum()))
+        for column in ['attendance_percentage', 'marks', 'fees_due']:
+            df.loc[rng.random(n) < 0.03, column] = np.nan
+
+    return df
+
+
+def upload_files(n: int, seed: int = 42, colleges=COLLEGES) -> dict:
+    """CSV bytes as users upload them: one combined sheet plus the attendance/marks/fees split"""
+    df = make_cohort(n, seed=seed, colleges=colleges)
+    rng = np.random.default_rng(seed + 1)
+    total_classes = rng.integers(80, 121, n)
+    attendance = pd.DataFrame({
+        'student_id': df['student_id'],
+        'name': df['name'],
+        'department': df['department'],
+        'attendance_percentage': df['attendance_percentage'],
+        'total_classes': total_classes,
+        'attended_classes': np.round(total_classes * df['attendance_percentage'] / 100).astype(int),
+    })
+    marks = df[['student_id', 'name', 'department', 'marks']]
+    fees = df[['student_id', 'fees_paid', 'fees_due', 'total_fees', 'payment_status']]
+    return {
+        'combined': df.to_csv(index=False).encode(),
+        'attendance': attendance.to_csv(index=False).encode(),
+        'marks': marks.to_csv(index=False).encode(),
+        'fees': fees.to_csv(index=False).encode(),
+    }
+
+
+def rule_edge_cohort(rows: int, seed: int) -> pd.DataFrame:
+    """Edge-case cohort plus values on the enhanced and multi-factor cut-offs"""
+    df = make_cohort(rows, seed=seed, edge_cases=True)
+    rng = np.random.default_rng(seed + 1000)
+    edges = {
+        'family_income': [100000, 200000, 99999],
+        'distance_from_college': [25, 50, 26, 51],
+        'fees_due': [20000, 30000, 20001, 30001],
+    }
+    for column, values in edges.items():
+        mask = rng.random(rows) < 0.15
+        df.loc[mask, column] = rng.choice(values, int(mask.sum()))
+    df.loc[rng.random(rows) < 0.03, 'fees_paid'] = np.nan
+    df.loc[rng.random(rows) < 0.03, 'payment_status'] = None
+    return df
+
+
+def perturbed_rules(thresholds: dict, weights: dict, rng):
+    """Random thresholds/weights of the same shape"""
+    new_thresholds = {group: {key: value * rng.uniform(0.6, 1.4) for key, value in cuts.items()}
+                      for group, cuts in thresholds.items()}
+    new_weights = {name: round(rng.uniform(0.05, 0.5), 3) for name in weights}
+    return new_thresholds, new_weights
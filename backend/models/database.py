@@ -4,6 +4,15 @@ import os
 from typing import Dict, List, Optional
 import json
 
+from models.risk_engine import BREAKDOWN_COLUMNS
+
+def ensure_columns(conn, table: str, columns: Dict[str, str]):
+    """Add any missing columns (name -> SQL type) to an existing table"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, sql_type in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
 class Database:
     def __init__(self, db_path="dte_rajasthan.db"):
         self.db_path = db_path
@@ -43,6 +52,7 @@ class Database:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
         
         # Column mappings table
         cursor.execute('''
@@ -74,6 +84,8 @@ class Database:
         try:
             conn = sqlite3.connect(self.db_path)
             students_df.to_sql('students', conn, if_exists='replace', index=False)
+            ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
+            conn.commit()
             conn.close()
             return True
         except Exception as e:
@@ -231,6 +243,22 @@ class Database:
         conn.commit()
         conn.close()
     
+    def save_risk_overrides(self, thresholds: Dict, weights: Dict):
+        """Persist risk threshold/weight overrides (read back by risk_rules.load_overrides)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        rows = [(component, threshold_type, value)
+                for component, values in thresholds.items() for threshold_type, value in values.items()]
+        rows += [(component, 'weight', weight) for component, weight in weights.items()]
+        cursor.executemany('''
+            INSERT INTO risk_thresholds (component, threshold_type, value)
+            VALUES (?, ?, ?)
+        ''', rows)
+        
+        conn.commit()
+        conn.close()
+    
     def get_students_by_filter(self, filters: Dict, limit: int = 1000, offset: int = 0) -> List[Dict]:
         """Get students with filters including college filtering"""
         # Use college-specific database if filter provided
@@ -4,57 +4,96 @@ from typing import Dict, List, Any, Optional
 import sqlite3
 from datetime import datetime
 
-class EnhancedRiskEngine:
-    def __init__(self):
-        self.risk_thresholds = {
-            'attendance': {'critical': 45, 'high': 60, 'medium': 75},
-            'academic': {'critical': 40, 'high': 55, 'medium': 70},
-            'financial': {'critical': 80, 'high': 60, 'medium': 40},  # % of fees unpaid
-            'engagement': {'critical': 30, 'high': 50, 'medium': 70}
-        }
+from models.risk_rules import LEVELS, RISK_LEVELS, compile_profile, profile_defaults
+
+# Component message per level code (Low..Critical)
+ATTENDANCE_MESSAGES = ['Good attendance: {value}%', 'Below average attendance: {value}%',
+                       'Low attendance: {value}%', 'Very low attendance: {value}%']
+ACADEMIC_MESSAGES = ['Good performance: {value}%', 'Below average performance: {value}%',
+                     'Poor performance: {value}%', 'Failing grades: {value}%']
+
+class EnhancedBatchResult:
+    """Column-wise result of EnhancedRiskEngine.calculate_batch.
+    
+    `frame` holds scores, levels and intervention priority for every row
+    (aligned with the input index). details() renders the full
+    calculate_comprehensive_risk dict, with messages and recommendations,
+    only for the rows it is asked for.
+    """
+    
+    def __init__(self, engine: 'EnhancedRiskEngine', df: pd.DataFrame, components: Dict, frame: pd.DataFrame,
+                 invalid: np.ndarray, calculated_at: str):
+        self.engine = engine
+        self.df = df
+        self.components = components
+        self.frame = frame
+        self.invalid = invalid
+        self.calculated_at = calculated_at
+    
+    def __len__(self) -> int:
+        return len(self.frame)
+    
+    def details(self, position: int) -> Dict[str, Any]:
+        """Full result for the row at `position` (0-based)"""
+        student = self.df.iloc[position].to_dict()
+        if self.invalid[position]:
+            # Same error shape as the scalar path, stamped with the batch time
+            result = self.engine.calculate_comprehensive_risk(student)
+            result['calculated_at'] = self.calculated_at
+            return result
+        
+        risk_factors = {}
+        for name, component in self.components.items():
+            level = int(component['level'][position])
+            score = component['score'][position].item()
+            if name == 'attendance':
+                value = student.get('attendance_percentage', 100)
+            elif name == 'academic':
+                value = student.get('marks', 100)
+            elif name == 'financial':
+                value = None if component['undefined'][position] else component['value'][position].item()
+            else:
+                value = score
+            factors = [factor for factor, mask in component['factors'].items() if mask[position]]
+            risk_factors[name] = self.engine._component_result(name, score, level, value, factors)
         
-        self.risk_weights = {
-            'attendance': 0.35,
-            'academic': 0.30,
-            'financial': 0.20,
-            'engagement': 0.15
+        return {
+            'composite_score': float(self.frame['composite_score'].iat[position]),
+            'risk_level': self.frame['risk_level'].iat[position],
+            'risk_factors': risk_factors,
+            'recommendations': self.engine._generate_recommendations(risk_factors, student),
+            'intervention_priority': self.frame['intervention_priority'].iat[position],
+            'calculated_at': self.calculated_at
         }
     
+    def records(self, positions: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """details() for the given row positions (all rows when omitted)"""
+        if positions is None:
+            positions = range(len(self))
+        return [self.details(position) for position in positions]
+
+class EnhancedRiskEngine:
+    def __init__(self):
+        # Scoring rules are the 'enhanced' profile in models.risk_rules
+        self.risk_thresholds, self.risk_weights = profile_defaults('enhanced')
+        self._rules = compile_profile('enhanced', self.risk_thresholds, self.risk_weights)
+    
     def calculate_comprehensive_risk(self, student_data: Dict) -> Dict[str, Any]:
         """Calculate comprehensive risk score with multiple factors"""
         try:
-            risk_factors = {}
-            
-            # Attendance Risk
-            attendance = student_data.get('attendance_percentage', 100)
-            risk_factors['attendance'] = self._calculate_attendance_risk(attendance)
-            
-            # Academic Risk
-            marks = student_data.get('marks', 100)
-            risk_factors['academic'] = self._calculate_academic_risk(marks)
-            
-            # Financial Risk
-            fees_paid = student_data.get('fees_paid', 0)
-            total_fees = student_data.get('total_fees', 1)
-            risk_factors['financial'] = self._calculate_financial_risk(fees_paid, total_fees)
-            
-            # Engagement Risk (based on multiple factors)
-            risk_factors['engagement'] = self._calculate_engagement_risk(student_data)
-            
-            # Calculate composite score
-            composite_score = sum(
-                risk_factors[factor]['score'] * self.risk_weights[factor]
-                for factor in risk_factors
-            )
-            
-            # Determine overall risk level
-            risk_level = self._determine_risk_level(composite_score)
+            result = self._rules.evaluate(student_data)
+            risk_factors = {
+                name: self._component_result(name, score, level, value, factors)
+                for name, (score, level, value, factors) in result['components'].items()
+            }
+            composite_score = result['composite_score']
+            risk_level = result['risk_level']
             
             # Generate recommendations
             recommendations = self._generate_recommendations(risk_factors, student_data)
             
             return {
-                'composite_score': round(composite_score, 2),
+                'composite_score': composite_score,
                 'risk_level': risk_level,
                 'risk_factors': risk_factors,
                 'recommendations': recommendations,
@@ -70,106 +109,77 @@ class EnhancedRiskEngine:
                 'calculated_at': datetime.now().isoformat()
             }
     
-    def _calculate_attendance_risk(self, attendance: float) -> Dict:
-        """Calculate attendance-based risk"""
-        if attendance < self.risk_thresholds['attendance']['critical']:
-            return {'score': 90, 'level': 'Critical', 'message': f'Very low attendance: {attendance}%'}
-        elif attendance < self.risk_thresholds['attendance']['high']:
-            return {'score': 70, 'level': 'High', 'message': f'Low attendance: {attendance}%'}
-        elif attendance < self.risk_thresholds['attendance']['medium']:
-            return {'score': 40, 'level': 'Medium', 'message': f'Below average attendance: {attendance}%'}
-        else:
-            return {'score': 10, 'level': 'Low', 'message': f'Good attendance: {attendance}%'}
-    
-    def _calculate_academic_risk(self, marks: float) -> Dict:
-        """Calculate academic performance risk"""
-        if marks < self.risk_thresholds['academic']['critical']:
-            return {'score': 85, 'level': 'Critical', 'message': f'Failing grades: {marks}%'}
-        elif marks < self.risk_thresholds['academic']['high']:
-            return {'score': 65, 'level': 'High', 'message': f'Poor performance: {marks}%'}
-        elif marks < self.risk_thresholds['academic']['medium']:
-            return {'score': 35, 'level': 'Medium', 'message': f'Below average performance: {marks}%'}
-        else:
-            return {'score': 5, 'level': 'Low', 'message': f'Good performance: {marks}%'}
-    
-    def _calculate_financial_risk(self, fees_paid: float, total_fees: float) -> Dict:
-        """Calculate financial risk based on fee payment"""
-        if total_fees <= 0:
-            return {'score': 0, 'level': 'Low', 'message': 'No fee information available'}
-        
-        payment_percentage = (fees_paid / total_fees) * 100
-        unpaid_percentage = 100 - payment_percentage
-        
-        if unpaid_percentage > self.risk_thresholds['financial']['critical']:
-            return {'score': 80, 'level': 'Critical', 'message': f'{unpaid_percentage:.1f}% fees unpaid'}
-        elif unpaid_percentage > self.risk_thresholds['financial']['high']:
-            return {'score': 60, 'level': 'High', 'message': f'{unpaid_percentage:.1f}% fees unpaid'}
-        elif unpaid_percentage > self.risk_thresholds['financial']['medium']:
-            return {'score': 30, 'level': 'Medium', 'message': f'{unpaid_percentage:.1f}% fees unpaid'}
-        else:
-            return {'score': 5, 'level': 'Low', 'message': 'Fees up to date'}
-    
-    def _calculate_engagement_risk(self, student_data: Dict) -> Dict:
-        """Calculate engagement risk based on multiple indicators"""
-        engagement_score = 0
-        factors = []
+    def calculate_batch(self, df: pd.DataFrame) -> EnhancedBatchResult:
+        """Vectorized calculate_comprehensive_risk for every row of df.
         
-        # Family income factor
-        family_income = student_data.get('family_income', 300000)
-        if family_income < 100000:
-            engagement_score += 30
-            factors.append('Low family income')
-        elif family_income < 200000:
-            engagement_score += 15
-            factors.append('Below average family income')
+        Components are computed column-wise and share one calculated_at
+        timestamp. Rows whose numeric inputs are not numbers get risk_level
+        'Unknown' (where the scalar path would have raised).
+        """
+        calculated_at = datetime.now().isoformat()
+        clean, invalid = self._numeric_inputs(df)
+        result = self._rules.evaluate_frame(clean)
+        components = result['components']
         
-        # Distance factor
-        distance = student_data.get('distance_from_college', 10)
-        if distance > 50:
-            engagement_score += 25
-            factors.append('Long commute distance')
-        elif distance > 25:
-            engagement_score += 10
-            factors.append('Moderate commute distance')
+        frame = pd.DataFrame(index=df.index)
+        frame['composite_score'] = np.where(invalid, 0, result['composite_score'])
+        frame['risk_level'] = np.where(invalid, 'Unknown', RISK_LEVELS[result['risk_level']])
+        for name, component in components.items():
+            frame[f'{name}_score'] = component['score']
+            frame[f'{name}_level'] = RISK_LEVELS[component['level']]
         
-        # Infrastructure factors
-        if student_data.get('electricity') == 'Irregular':
-            engagement_score += 15
-            factors.append('Irregular electricity')
+        # Same rules as _get_intervention_priority
+        risk_level = result['risk_level']
+        critical_factors = sum((component['level'] == 3).astype(int) for component in components.values())
+        priority = np.select(
+            [(risk_level == 3) | (critical_factors >= 2), (risk_level == 2) | (critical_factors >= 1), risk_level == 1],
+            ['Immediate', 'Urgent', 'Moderate'], 'Monitor'
+        ).astype(object)
+        frame['intervention_priority'] = np.where(invalid, None, priority)
+        frame['calculated_at'] = calculated_at
         
-        if student_data.get('internet_access') == 'No':
-            engagement_score += 20
-            factors.append('No internet access')
+        if invalid.any():
+            component_columns = [f'{name}_{column}' for name in components for column in ('score', 'level')]
+            frame[component_columns] = frame[component_columns].astype(object)
+            frame.loc[invalid, component_columns] = None
         
-        # Region factor
-        if student_data.get('region') == 'Rural':
-            engagement_score += 10
-            factors.append('Rural background')
-        
-        # Determine level
-        if engagement_score > 60:
-            level = 'Critical'
-        elif engagement_score > 40:
-            level = 'High'
-        elif engagement_score > 20:
-            level = 'Medium'
+        return EnhancedBatchResult(self, df, components, frame, invalid, calculated_at)
+    
+    def _numeric_inputs(self, df: pd.DataFrame):
+        """df with non-numeric values in numeric inputs blanked, and a mask of those rows"""
+        clean = df
+        invalid = np.zeros(len(df), dtype=bool)
+        for field in self._rules.numeric_fields:
+            if field not in df.columns or df[field].dtype != object:
+                continue
+            numeric = df[field].map(lambda value: isinstance(value, (int, float, np.number))).to_numpy(dtype=bool)
+            if not numeric.all():
+                if clean is df:
+                    clean = df.copy()
+                clean[field] = pd.to_numeric(df[field].where(numeric), errors='coerce')
+                invalid |= ~numeric
+        return clean, invalid
+    
+    def _component_result(self, name: str, score, level: int, value, factors: List[str]) -> Dict:
+        """Score, level and message for one component"""
+        if name == 'attendance':
+            message = ATTENDANCE_MESSAGES[level].format(value=value)
+        elif name == 'academic':
+            message = ACADEMIC_MESSAGES[level].format(value=value)
+        elif name == 'financial':
+            if value is None:
+                message = 'No fee information available'
+            elif level == 0:
+                message = 'Fees up to date'
+            else:
+                message = f'{value:.1f}% fees unpaid'
         else:
-            level = 'Low'
-        
-        message = f"Engagement factors: {', '.join(factors) if factors else 'No major concerns'}"
-        
-        return {'score': min(engagement_score, 100), 'level': level, 'message': message}
+            message = f"Engagement factors: {', '.join(factors) if factors else 'No major concerns'}"
+        return {'score': score, 'level': LEVELS[level], 'message': message}
     
     def _determine_risk_level(self, composite_score: float) -> str:
         """Determine overall risk level from composite score"""
-        if composite_score >= 75:
-            return 'Critical'
-        elif composite_score >= 55:
-            return 'High'
-        elif composite_score >= 35:
-            return 'Medium'
-        else:
-            return 'Low'
+        return self._rules.level(composite_score)
     
     def _generate_recommendations(self, risk_factors: Dict, student_data: Dict) -> List[str]:
         """Generate specific recommendations based on risk factors"""
@@ -218,9 +228,17 @@ class EnhancedRiskEngine:
     
     def detect_multi_area_risk(self, student_data: Dict) -> Dict:
         """Detect if student has risks in multiple areas"""
+        return self.assess(student_data)['multi_area']
+    
+    def assess(self, student_data: Dict) -> Dict[str, Any]:
+        """calculate_comprehensive_risk result plus multi-area flags, from a single evaluation"""
         risk_result = self.calculate_comprehensive_risk(student_data)
-        risk_factors = risk_result.get('risk_factors', {})
-        
+        risk_result['multi_area'] = self.multi_area_summary(risk_result.get('risk_factors', {}))
+        return risk_result
+    
+    @staticmethod
+    def multi_area_summary(risk_factors: Dict) -> Dict:
+        """Multi-area flags from a result's risk factors"""
         high_risk_areas = [
             area for area, data in risk_factors.items() 
             if data.get('level') in ['Critical', 'High']
@@ -0,0 +1,154 @@
+"""Feature encoding for the dropout models, fitted once at training time.
+
+FeatureEncoder replaces the per-column LabelEncoders of DropoutPredictor.
+Categories map to the same codes LabelEncoder gave them (sorted string
+values, so models trained before keep working). A value never seen in
+training gets UNKNOWN_CODE instead of raising. Missing numerical values
+(and missing columns) are filled with the training median, so a single
+student is imputed exactly like the same student in a large batch.
+
+transform() reads only the feature columns and builds the model input
+column by column; it never copies the incoming frame. Encoding costs one
+hash lookup per value (values that are not already strings are str()'d
+only when they miss), or one per distinct value for pandas categorical
+columns. Frames of up to SMALL_FRAME_ROWS rows (single predictions) use
+plain dict lookups instead, which skips the per-column pandas overhead.
+"""
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+UNKNOWN_CODE = -1
+
+# Up to this many rows, categories are looked up in a dict one value at a time:
+# a single prediction then skips building pandas indexes per column
+SMALL_FRAME_ROWS = 64
+
+
+def _as_category_strings(values: pd.Series) -> pd.Series:
+    """The str() of every value, as LabelEncoder saw them via astype(str)"""
+    if infer_dtype(values, skipna=False) == 'string':
+        return values
+    return values.astype(str)
+
+
+def _lookup_codes(lookup: pd.Index, values: np.ndarray) -> np.ndarray:
+    # Most values are already the category strings: one hash lookup over the
+    # raw array. Only misses (NaN, None, numbers, unseen values) are turned
+    # into str() and looked up again; what is still missing is unknown.
+    codes = lookup.get_indexer(values)
+    missed = np.flatnonzero(codes < 0)
+    if len(missed):
+        codes[missed] = lookup.get_indexer(values[missed].astype(str).astype(object))
+    return codes
+
+
+def _lookup_code(codes: Dict[str, int], value) -> int:
+    # _lookup_codes for one value, for frames too small to amortise pandas
+    code = codes.get(value) if isinstance(value, str) else None
+    return code if code is not None else codes.get(str(value), UNKNOWN_CODE)
+
+
+class FeatureEncoder:
+    """Category->code maps and imputation medians learned from a training frame"""
+
+    def __init__(self, numerical: Optional[Dict[str, float]] = None, categorical: Optional[Dict[str, List[str]]] = None):
+        # numerical: feature -> training median; categorical: feature -> sorted categories
+        self.numerical = numerical or {}
+        self.categorical = categorical or {}
+        self._lookups: Dict[str, pd.Index] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self.numerical or self.categorical)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(self.numerical) + [f'{col}_encoded' for col in self.categorical]
+
+    def fit(self, df: pd.DataFrame, numerical_features: List[str], categorical_features: List[str]) -> 'FeatureEncoder':
+        """Learn medians and categories from the columns of `df` that exist"""
+        self.numerical = {
+            col: float(pd.to_numeric(df[col], errors='coerce').median())
+            for col in numerical_features if col in df.columns
+        }
+        self.categorical = {
+            col: sorted(_as_category_strings(df[col]).unique().tolist())
+            for col in categorical_features if col in df.columns
+        }
+        self._lookups = {}
+        self._codes = {}
+        return self
+
+    def encode(self, col: str, values: Optional[pd.Series], rows: int) -> np.ndarray:
+        """Codes for one categorical column; a missing column counts as all-missing values"""
+        if values is None:
+            values = pd.Series(np.full(rows, np.nan, dtype=object))
+        if rows <= SMALL_FRAME_ROWS:
+            codes = self._codes.get(col)
+            if codes is None:
+                codes = self._codes[col] = {category: i for i, category in enumerate(self.categorical[col])}
+            return np.array([_lookup_code(codes, value) for value in values.tolist()], dtype=np.intp)
+        lookup = self._lookups.get(col)
+        if lookup is None:
+            lookup = self._lookups[col] = pd.Index(self.categorical[col], dtype=object)
+        # Unseen values come back as -1 == UNKNOWN_CODE
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Look up each distinct category once, then gather by the frame's own codes
+            category_codes = _lookup_codes(lookup, values.cat.categories.to_numpy(dtype=object))
+            value_codes = values.cat.codes.to_numpy()
+            # Missing values have code -1, which picks the appended code of str(nan)
+            return np.append(category_codes, lookup.get_indexer(np.array(['nan'], dtype=object)))[value_codes]
+        return _lookup_codes(lookup, values.to_numpy(dtype=object))
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Model input for `df`, one column per feature in feature_names order"""
+        rows = len(df)
+        columns = {}
+        for col, median in self.numerical.items():
+            if col in df.columns:
+                values = df[col].to_numpy()
+                if values.dtype.kind not in 'fiub':
+                    values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                values = values.astype(float, copy=False)
+                columns[col] = np.where(np.isnan(values), median, values)
+            else:
+                columns[col] = np.full(rows, median)
+        for col in self.categorical:
+            columns[f'{col}_encoded'] = self.encode(col, df[col] if col in df.columns else None, rows)
+        return pd.DataFrame(columns, index=df.index, copy=False)
+
+    def to_dict(self) -> Dict:
+        return {'numerical': self.numerical, 'categorical': self.categorical}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FeatureEncoder':
+        return cls(data['numerical'], data['categorical'])
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureEncoder':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_label_encoders(cls, label_encoders: Dict, feature_names: List[str],
+                            defaults: Optional[Dict[str, float]] = None) -> 'FeatureEncoder':
+        """Encoder for artifacts saved before feature_encoder.json existed.
+
+        Those artifacts have no training medians, and the forests cannot take
+        NaN, so missing numerical values are filled from `defaults` (0.0 for
+        features without one).
+        """
+        defaults = defaults or {}
+        numerical = {name: float(defaults.get(name, 0.0)) for name in feature_names if not name.endswith('_encoded')}
+        categorical = {col: [str(c) for c in encoder.classes_] for col, encoder in label_encoders.items()
+                       if f'{col}_encoded' in feature_names}
+        return cls(numerical, categorical)
@@ -0,0 +1,194 @@
+"""Prepared model inputs of every tenant, memory-mapped from disk.
+
+For one FeatureEncoder, feature_store/<encoder version>/<tenant>/ holds
+generations of:
+- features.npy: float32 matrix, one row per student, columns in
+  encoder.feature_names order
+- rowids.npy: the SQLite rowid of each row, ascending
+- meta.json: the fingerprint of the table the generation was built from
+
+A CURRENT file names the live generation. Consumers map both arrays
+read-only and never parse or encode a student again. float32 loses
+nothing: the tree models compare features at float32, and category codes
+are small integers.
+
+The encoder version is a hash of its categories and medians, so features
+prepared for one encoder are never read for another. refresh() brings a
+tenant up to date:
+- If rows were only appended since the last build (same schema, and the
+  stored rows are all still there with the same latest updated_at), only
+  the new rows are read and encoded.
+- Otherwise the tenant is rebuilt. That happens when the table was
+  replaced, rows were deleted, columns were added or a student was
+  edited.
+
+A new generation is written completely before CURRENT moves to it.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.feature_encoder import FeatureEncoder
+
+FEATURE_STORE_DIR = "feature_store"
+
+
+def encoder_version(encoder: FeatureEncoder) -> str:
+    payload = json.dumps(encoder.to_dict(), sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def _fingerprint(conn: sqlite3.Connection, through_rowid: Optional[int] = None) -> Optional[Dict]:
+    """What refresh() compares to decide between appending and rebuilding; None without a students table.
+
+    With through_rowid, only the rows up to that rowid are described.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+    if not columns:
+        return None
+    updated_at = "MAX(updated_at)" if 'updated_at' in columns else "NULL"
+    where, params = ("WHERE rowid <= ?", (through_rowid,)) if through_rowid is not None else ("", ())
+    count, last_rowid, latest = conn.execute(
+        f"SELECT COUNT(*), COALESCE(MAX(rowid), 0), {updated_at} FROM students {where}", params
+    ).fetchone()
+    return {
+        'schema_version': conn.execute("PRAGMA schema_version").fetchone()[0],
+        'rows': count,
+        'last_rowid': last_rowid,
+        'updated_at': latest
+    }
+
+
+class FeatureStore:
+    """Per-tenant float32 feature matrices for one encoder"""
+
+    def __init__(self, encoder: FeatureEncoder, directory: str = FEATURE_STORE_DIR):
+        self.encoder = encoder
+        self.root = directory
+        self.version = encoder_version(encoder)
+        self.directory = os.path.join(directory, self.version)
+        self._lock = threading.Lock()
+
+    def tenant_path(self, tenant: str) -> str:
+        return os.path.join(self.directory, tenant)
+
+    def _generation(self, tenant: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.tenant_path(tenant), "CURRENT")) as f:
+                return os.path.join(self.tenant_path(tenant), f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def meta(self, tenant: str) -> Optional[Dict]:
+        generation = self._generation(tenant)
+        if generation is None:
+            return None
+        with open(os.path.join(generation, "meta.json")) as f:
+            return json.load(f)
+
+    def load(self, tenant: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(features, rowids) of the live generation, mapped read-only"""
+        generation = self._generation(tenant)
+        if generation is None:
+            raise FileNotFoundError(f"No stored features for {tenant}")
+        return (np.load(os.path.join(generation, "features.npy"), mmap_mode='r'),
+                np.load(os.path.join(generation, "rowids.npy"), mmap_mode='r'))
+
+    def features(self, tenant: str, db_path: str) -> Tuple[np.ndarray, np.ndarray]:
+        """refresh(), then load()"""
+        self.refresh(tenant, db_path)
+        return self.load(tenant)
+
+    def _read(self, conn: sqlite3.Connection, after_rowid: int, last_rowid: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Bounded by the fingerprint's last rowid: rows inserted meanwhile belong to the next refresh
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+        columns = [c for c in list(self.encoder.numerical) + list(self.encoder.categorical) if c in existing]
+        select = ', '.join(['rowid AS _rowid'] + columns)
+        df = pd.read_sql_query(f"SELECT {select} FROM students WHERE rowid > ? AND rowid <= ? "
+                               "ORDER BY rowid", conn, params=(after_rowid, last_rowid))
+        return self.encoder.transform(df).to_numpy(dtype=np.float32), df['_rowid'].to_numpy(dtype=np.int64)
+
+    def _write(self, tenant: str, features: np.ndarray, rowids: np.ndarray, meta: Dict):
+        tenant_dir = self.tenant_path(tenant)
+        previous = self._generation(tenant)
+        name = uuid.uuid4().hex[:12]
+        generation = os.path.join(tenant_dir, name)
+        os.makedirs(generation)
+        try:
+            np.save(os.path.join(generation, "features.npy"), np.ascontiguousarray(features, dtype=np.float32))
+            np.save(os.path.join(generation, "rowids.npy"), rowids)
+            with open(os.path.join(generation, "meta.json"), "w") as f:
+                json.dump({**meta, 'encoder_version': self.version}, f)
+            pointer = os.path.join(tenant_dir, "CURRENT")
+            with open(f"{pointer}.{name}", "w") as f:
+                f.write(name)
+            os.replace(f"{pointer}.{name}", pointer)
+        except Exception:
+            shutil.rmtree(generation, ignore_errors=True)
+            raise
+        # Readers still mapping the old files keep them until they close them
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def refresh(self, tenant: str, db_path: str) -> Dict:
+        """Bring the tenant's features up to date with its database: 'unchanged', 'appended' or 'rebuilt'"""
+        with self._lock, sqlite3.connect(db_path) as conn:
+            fingerprint = _fingerprint(conn)
+            if fingerprint is None:
+                return {'tenant': tenant, 'mode': 'unchanged', 'rows': 0}
+            meta = self.meta(tenant)
+            if meta is not None and meta['fingerprint'] == fingerprint:
+                return {'tenant': tenant, 'mode': 'unchanged', 'rows': meta['fingerprint']['rows']}
+
+            # Only appended to: the stored rows are all still there, unedited (appended
+            # rows may carry a fresh updated_at, so they are left out of the comparison)
+            appendable = meta is not None and \
+                _fingerprint(conn, meta['fingerprint']['last_rowid']) == meta['fingerprint']
+            if appendable:
+                new_features, new_rowids = self._read(conn, meta['fingerprint']['last_rowid'], fingerprint['last_rowid'])
+                old_features, old_rowids = self.load(tenant)
+                features = np.concatenate([old_features, new_features])
+                rowids = np.concatenate([old_rowids, new_rowids])
+            else:
+                features, rowids = self._read(conn, 0, fingerprint['last_rowid'])
+                new_rowids = rowids
+
+            self._write(tenant, features, rowids,
+                        {'fingerprint': fingerprint, 'feature_names': self.encoder.feature_names})
+        return {'tenant': tenant, 'mode': 'appended' if appendable else 'rebuilt', 'rows': len(rowids),
+                'new_rows': len(new_rowids)}
+
+    def prune(self):
+        """Delete the features of every other encoder version"""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if name != self.version:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def labelled_matrix(store: FeatureStore, sources: Dict[str, str], levels: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Stored features and risk levels of every student whose level is one of `levels`.
+
+    Only student rowids and risk levels are read from the databases.
+    """
+    features, labels = [], []
+    for tenant, db_path in sources.items():
+        matrix, rowids = store.features(tenant, db_path)
+        with sqlite3.connect(db_path) as conn:
+            stored = pd.read_sql_query("SELECT rowid AS _rowid, risk_level FROM students", conn)
+        y = stored.set_index('_rowid')['risk_level'].reindex(rowids).to_numpy(dtype=object)
+        keep = np.isin(y, levels)
+        features.append(matrix[keep])
+        labels.append(y[keep])
+    if not features:
+        return np.empty((0, len(store.encoder.feature_names)), dtype=np.float32), np.empty(0, dtype=object)
+    return np.concatenate(features), np.concatenate(labels)
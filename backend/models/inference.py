@@ -0,0 +1,144 @@
+"""Micro-batching for single-student ML predictions.
+
+A lone predict_risk call spends most of its time on per-call overhead:
+building a one-row DataFrame, encoding it and running predict_proba
+through every tree for a single row. MicroBatcher queues
+concurrent requests. A worker thread collects them until max_batch_size
+are waiting or max_wait_ms has passed since the first one arrived, then
+predicts them together with DropoutPredictor.predict_many.
+
+Batchmates never influence each other's result: the FeatureEncoder
+imputes from training statistics and encodes missing fields the same
+way whether a column is absent or a cell is empty. If a batch still
+fails, its records are retried one by one so that only the bad record
+fails.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5.0
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+class Histogram:
+    """Fixed-bucket histogram: counts of values <= each bound, plus an overflow bucket"""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'max': round(self.max, 3)
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-student predictions into batched predict_proba calls"""
+
+    def __init__(self, predictor: Callable, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        # A callable, so each batch uses the predictor that is live at that moment
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    def submit(self, record: Dict) -> Future:
+        future = Future()
+        self._queue.put((record, future, time.perf_counter()))
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._work, name="ml-inference", daemon=True)
+                    self._worker.start()
+        return future
+
+    def predict(self, record: Dict) -> Dict:
+        """Blocking single-student prediction through the batcher"""
+        return self.submit(record).result()
+
+    async def predict_async(self, record: Dict) -> Dict:
+        return await asyncio.wrap_future(self.submit(record))
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._run(batch)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run(self, batch: List):
+        predictor = self.predictor()
+        records = [record for record, _, _ in batch]
+        try:
+            outcomes = predictor.predict_many(records)
+        except Exception as e:
+            if len(batch) == 1:
+                outcomes = [e]
+            else:
+                outcomes = []
+                for record in records:
+                    try:
+                        outcomes.append(predictor.predict_many([record])[0])
+                    except Exception as single_error:
+                        outcomes.append(single_error)
+
+        finished = time.perf_counter()
+        with self._lock:
+            self.batch_sizes.observe(len(batch))
+            for _, _, submitted in batch:
+                self.latency_ms.observe((finished - submitted) * 1000)
+        for (_, future, _), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'queued': self._queue.qsize(),
+                'batch_size': self.batch_sizes.as_dict(),
+                'latency_ms': self.latency_ms.as_dict()
+            }
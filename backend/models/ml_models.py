@@ -1,60 +1,58 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-import joblib
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from models.feature_encoder import FeatureEncoder
+from models.risk_engine import SCORING_INPUTS
+from models.tree_compiler import COMPILED_MAX_ROWS, CompiledForest, compile_model
+
+# scikit-learn and joblib are imported on first ML use so that importing the
+# app (and every cold start) does not pay for them
+
+NUMERICAL_FEATURES = ['attendance_percentage', 'marks', 'family_income', 'family_size']
+CATEGORICAL_FEATURES = [
+    'electricity', 'internet_access', 'caste_category', 'region',
+    'family_education_background', 'gender', 'city_village_name', 'puc_college'
+]
+# Forest settings used unless a hyperparameter search (models.model_search) chose others
+DEFAULT_RF_PARAMS = {'n_estimators': 50, 'max_depth': 6, 'min_samples_leaf': 1, 'max_features': 'sqrt'}
 
 class DropoutPredictor:
     def __init__(self):
-        self.rf_model = RandomForestClassifier(n_estimators=50, max_depth=6, random_state=42)
-        self.dt_model = DecisionTreeClassifier(max_depth=6, random_state=42)
-        self.label_encoders = {}
+        self.rf_model = None
+        self.dt_model = None
+        self.encoder = FeatureEncoder()
         self.feature_names = []
         self.is_trained = False
+        self._compiled = None  # (forest, tree) as CompiledForest, built on first small prediction
+        self.version = None  # registry version when loaded from model_registry/
+    
+    def _build_models(self, rf_params: Optional[Dict] = None):
+        """Create fresh, untrained estimators; rf_params override DEFAULT_RF_PARAMS"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.tree import DecisionTreeClassifier
         
-    def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Prepare features for ML models"""
-        df_processed = df.copy()
-        
-        # Numerical features
-        numerical_features = [
-            'attendance_percentage', 'marks', 'family_income', 'family_size'
-        ]
-        
-        # Encode categorical features
-        categorical_features = [
-            'electricity', 'internet_access', 'caste_category', 'region',
-            'family_education_background', 'gender', 'city_village_name', 'puc_college'
-        ]
+        self.rf_model = RandomForestClassifier(**{**DEFAULT_RF_PARAMS, **(rf_params or {})}, random_state=42)
+        self.dt_model = DecisionTreeClassifier(max_depth=6, random_state=42)
         
-        for col in categorical_features:
-            if col in df.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    df_processed[f'{col}_encoded'] = self.label_encoders[col].fit_transform(df[col].astype(str))
-                else:
-                    df_processed[f'{col}_encoded'] = self.label_encoders[col].transform(df[col].astype(str))
-                numerical_features.append(f'{col}_encoded')
-        
-        # Fill missing values
-        for col in numerical_features:
-            if col in df_processed.columns:
-                df_processed[col] = df_processed[col].fillna(df_processed[col].median())
-        
-        self.feature_names = [col for col in numerical_features if col in df_processed.columns]
-        return df_processed[self.feature_names]
+    def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Prepare features for ML models (fits the encoder on first use)"""
+        if not self.encoder.is_fitted:
+            self.encoder.fit(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES)
+            self.feature_names = self.encoder.feature_names
+        return self.encoder.transform(df)
     
-    def train_models(self, df: pd.DataFrame) -> Dict:
-        """Train ML models on the data"""
+    def train_models(self, df: pd.DataFrame, rf_params: Optional[Dict] = None) -> Dict:
+        """Train ML models on the data (with rf_params, on a forest built with them)"""
         if 'risk_level' not in df.columns:
             raise ValueError("Dataset must have 'risk_level' column for training")
         
-        # Prepare features
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score
+        
+        # Prepare features; encodings and medians always come from the training data
+        self.encoder = FeatureEncoder()
         X = self.prepare_features(df)
         y = df['risk_level']
         
@@ -64,8 +62,11 @@ class DropoutPredictor:
         )
         
         # Train models
+        if self.rf_model is None or rf_params is not None:
+            self._build_models(rf_params)
         self.rf_model.fit(X_train, y_train)
         self.dt_model.fit(X_train, y_train)
+        self._compiled = None
         
         # Evaluate
         rf_pred = self.rf_model.predict(X_test)
@@ -79,9 +80,90 @@ class DropoutPredictor:
         return {
             'random_forest_accuracy': rf_accuracy,
             'decision_tree_accuracy': dt_accuracy,
+            'rf_params': {name: self.rf_model.get_params()[name] for name in DEFAULT_RF_PARAMS},
+            'feature_importance': dict(zip(self.feature_names, self.rf_model.feature_importances_))
+        }
+    
+    def update_models(self, df: pd.DataFrame, new_trees: int = 10, max_trees: int = 200) -> Dict:
+        """Grow `new_trees` more forest trees on df (warm start) and refit the decision tree on it.
+        
+        The encoder is kept, so categories first seen in df fall in the unknown
+        bucket. Beyond max_trees the oldest trees are dropped. df must contain
+        every risk level the forest knows: warm-started trees share classes_.
+        """
+        if not self.is_trained:
+            raise ValueError("Models not trained yet!")
+        levels = set(df['risk_level'].unique())
+        if levels != set(self.rf_model.classes_):
+            raise ValueError(f"Update data has risk levels {sorted(levels)}, "
+                             f"the model has {sorted(self.rf_model.classes_)}")
+        
+        X = self.encoder.transform(df)
+        y = df['risk_level']
+        self.rf_model.set_params(warm_start=True, n_estimators=len(self.rf_model.estimators_) + new_trees)
+        self.rf_model.fit(X, y)
+        if len(self.rf_model.estimators_) > max_trees:
+            self.rf_model.estimators_ = self.rf_model.estimators_[-max_trees:]
+        self.rf_model.set_params(warm_start=False, n_estimators=len(self.rf_model.estimators_))
+        self.dt_model.fit(X, y)
+        self._compiled = None
+        
+        return {
+            'trees': len(self.rf_model.estimators_),
             'feature_importance': dict(zip(self.feature_names, self.rf_model.feature_importances_))
         }
     
+    def compiled(self):
+        """(forest, tree, forest feature importances), derived once per fit; the models as CompiledForests"""
+        if self._compiled is None:
+            self._compiled = (compile_model(self.rf_model), compile_model(self.dt_model),
+                              self.rf_model.feature_importances_)
+        return self._compiled
+    
+    def _predict_arrays(self, X: pd.DataFrame):
+        """Forest probabilities, forest labels and decision-tree labels; identical whichever evaluator runs"""
+        if len(X) <= COMPILED_MAX_ROWS:
+            forest, tree, _ = self.compiled()
+            features = X.to_numpy(dtype=float)
+            rf_proba = forest.predict_proba(features)
+            return rf_proba, forest.classes_.take(rf_proba.argmax(axis=1)), tree.predict(features)
+        rf_proba = self.rf_model.predict_proba(X)
+        # RandomForestClassifier.predict is exactly this argmax
+        return rf_proba, self.rf_model.classes_.take(rf_proba.argmax(axis=1)), self.dt_model.predict(X)
+    
+    @property
+    def input_features(self) -> List[str]:
+        """feature_names as the input fields they come from ('region_encoded' -> 'region')"""
+        return [name[:-len('_encoded')] if name.endswith('_encoded') else name for name in self.feature_names]
+    
+    def explain(self, X, predicted: np.ndarray):
+        """Per-student forest contributions toward each student's predicted level.
+        
+        Returns (bias, contributions): bias (rows,) is the forest's average root
+        probability of that level and contributions (rows, features) what each
+        feature added to it along the student's tree paths, so their sum is the
+        predicted probability (see CompiledForest.contributions).
+        """
+        bias, contributions = self.compiled()[0].contributions(np.asarray(X, dtype=float))
+        level = np.searchsorted(self.rf_model.classes_, predicted)
+        return bias[level], contributions[np.arange(len(level)), :, level]
+    
+    def predict_features(self, X: np.ndarray):
+        """_predict_arrays for already prepared rows (columns in feature_names order, e.g. from FeatureStore)"""
+        if not self.is_trained:
+            raise ValueError("Models not trained yet!")
+        return self._predict_arrays(pd.DataFrame(X, columns=self.feature_names, copy=False))
+    
+    def evaluate(self, df: pd.DataFrame) -> Dict:
+        """Accuracy of both models on labelled students"""
+        from sklearn.metrics import accuracy_score
+        
+        X = self.encoder.transform(df)
+        return {
+            'random_forest_accuracy': accuracy_score(df['risk_level'], self.rf_model.predict(X)),
+            'decision_tree_accuracy': accuracy_score(df['risk_level'], self.dt_model.predict(X))
+        }
+    
     def predict_risk(self, student_data: Dict) -> Dict:
         """Predict risk for a single student"""
         if not self.is_trained:
@@ -92,33 +174,49 @@ class DropoutPredictor:
         X = self.prepare_features(df)
         
         # Get predictions
-        rf_pred = self.rf_model.predict(X)[0]
-        rf_proba = self.rf_model.predict_proba(X)[0]
+        rf_probas, rf_preds, dt_preds = self._predict_arrays(X)
+        rf_pred, rf_proba, dt_pred = rf_preds[0], rf_probas[0], dt_preds[0]
         
-        dt_pred = self.dt_model.predict(X)[0]
-        
-        # Get feature importance for this prediction
-        feature_importance = {}
-        for i, feature in enumerate(self.feature_names):
-            if feature in student_data or feature.replace('_encoded', '') in student_data:
-                feature_importance[feature] = self.rf_model.feature_importances_[i]
+        # Why this student got this level
+        bias, contributions = self.explain(X, rf_preds[:1])
         
         return {
             'prediction': rf_pred,
             'probability': max(rf_proba),
             'probabilities': dict(zip(self.rf_model.classes_, rf_proba)),
             'decision_tree_prediction': dt_pred,
-            'feature_importance': feature_importance
+            'bias': float(bias[0]),
+            'contributions': dict(zip(self.input_features, contributions[0].tolist()))
         }
     
+    def predict_many(self, records: List[Dict]) -> List[Dict]:
+        """predict_risk for several students with one predict_proba call"""
+        if not self.is_trained:
+            raise ValueError("Models not trained yet!")
+        
+        X = self.prepare_features(pd.DataFrame(records))
+        rf_proba, rf_pred, dt_pred = self._predict_arrays(X)
+        bias, contributions = self.explain(X, rf_pred)
+        
+        return [
+            {
+                'prediction': rf_pred[i],
+                'probability': rf_proba[i].max(),
+                'probabilities': dict(zip(self.rf_model.classes_, rf_proba[i])),
+                'decision_tree_prediction': dt_pred[i],
+                'bias': float(bias[i]),
+                'contributions': dict(zip(self.input_features, contributions[i].tolist()))
+            }
+            for i, record in enumerate(records)
+        ]
+    
     def batch_predict(self, df: pd.DataFrame) -> pd.DataFrame:
         """Predict risk for multiple students"""
         if not self.is_trained:
             raise ValueError("Models not trained yet!")
         
         X = self.prepare_features(df)
-        predictions = self.rf_model.predict(X)
-        probabilities = self.rf_model.predict_proba(X)
+        probabilities, predictions, _ = self._predict_arrays(X)
         
         df_result = df.copy()
         df_result['predicted_risk'] = predictions
@@ -128,17 +226,32 @@ class DropoutPredictor:
     
     def save_models(self, path="models/"):
         """Save trained models"""
+        import joblib
         os.makedirs(path, exist_ok=True)
         
         joblib.dump(self.rf_model, f"{path}/random_forest.pkl")
         joblib.dump(self.dt_model, f"{path}/decision_tree.pkl")
-        joblib.dump(self.label_encoders, f"{path}/label_encoders.pkl")
+        self.encoder.save(f"{path}/feature_encoder.json")
         joblib.dump(self.feature_names, f"{path}/feature_names.pkl")
+        forest, tree, _ = self.compiled()
+        forest.save(f"{path}/compiled_rf")
+        tree.save(f"{path}/compiled_dt")
     
-    def load_models(self, path="models/"):
-        """Load trained models"""
-        self.rf_model = joblib.load(f"{path}/random_forest.pkl")
-        self.dt_model = joblib.load(f"{path}/decision_tree.pkl")
-        self.label_encoders = joblib.load(f"{path}/label_encoders.pkl")
+    def load_models(self, path="models/", mmap_mode=None):
+        """Load trained models; mmap_mode='r' maps array payloads read-only instead of copying them"""
+        import joblib
+        self.rf_model = joblib.load(f"{path}/random_forest.pkl", mmap_mode=mmap_mode)
+        self.dt_model = joblib.load(f"{path}/decision_tree.pkl", mmap_mode=mmap_mode)
         self.feature_names = joblib.load(f"{path}/feature_names.pkl")
+        if os.path.exists(f"{path}/feature_encoder.json"):
+            self.encoder = FeatureEncoder.load(f"{path}/feature_encoder.json")
+        else:
+            # No stored medians: impute what the risk engine assumes for a missing input
+            self.encoder = FeatureEncoder.from_label_encoders(joblib.load(f"{path}/label_encoders.pkl"),
+                                                              self.feature_names, dict(SCORING_INPUTS))
+        self._compiled = None
+        if os.path.isdir(f"{path}/compiled_rf"):
+            self._compiled = (CompiledForest.load(f"{path}/compiled_rf", mmap_mode=mmap_mode),
+                              CompiledForest.load(f"{path}/compiled_dt", mmap_mode=mmap_mode),
+                              self.rf_model.feature_importances_)
         self.is_trained = True
\ No newline at end of file
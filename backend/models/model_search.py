@@ -0,0 +1,190 @@
+"""Cross-validated hyperparameter search for the dropout forest.
+
+search() scores up to max_candidates random-forest settings drawn from
+SEARCH_SPACE with stratified k-fold cross-validation. The current
+defaults (DEFAULT_RF_PARAMS) always run first, so they are the baseline.
+Candidates run in a process pool, cheapest first. Each worker process
+receives the training matrix once, when it starts.
+
+Two limits keep a search bounded, both shared with the worker processes
+and checked after every fold, so they also apply to candidates already
+running (with workers >= max_candidates, every candidate starts at once):
+- cpu_budget_s: CPU seconds summed over every fold run so far. Once they
+  are spent, no further candidate starts (the rest are 'skipped'). A
+  running candidate stops after its current fold ('stopped'), unless no
+  candidate has completed yet, so a search always has a result.
+- early stopping: a candidate stops after any fold where its mean
+  accuracy so far trails the best completed candidate by more than
+  PRUNE_MARGIN. It is reported as 'pruned'.
+
+Every candidate is reported with its fold accuracies, mean fit time and
+the one-row latency of its forest as served (CompiledForest). The chosen
+settings are those with the lowest latency among the candidates within
+SELECTION_TOLERANCE of the best accuracy.
+"""
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.ml_models import DEFAULT_RF_PARAMS
+from models.tree_compiler import compile_model
+
+SEARCH_SPACE = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [4, 6, 8, 12, None],
+    'min_samples_leaf': [1, 5, 20],
+    'max_features': ['sqrt', 0.5],
+}
+CV_FOLDS = 5
+MAX_CANDIDATES = 12
+CPU_BUDGET_S = 600.0
+PRUNE_MARGIN = 0.02
+SELECTION_TOLERANCE = 0.005
+RANDOM_STATE = 42
+
+# State of a search worker process, set once by _init_worker: the training data, plus values
+# shared by every worker of one search (best completed accuracy, -1 before any; CPU seconds spent)
+_X: Optional[np.ndarray] = None
+_y: Optional[np.ndarray] = None
+_best = None
+_spent = None
+_budget: Optional[float] = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, best=None, spent=None, budget: Optional[float] = None):
+    global _X, _y, _best, _spent, _budget
+    _X, _y, _best, _spent, _budget = X, y, best, spent, budget
+
+
+def _cost(params: Dict) -> float:
+    """Rough relative fitting cost, used to run cheap candidates first"""
+    return params['n_estimators'] * (params['max_depth'] or 16) / params['min_samples_leaf'] ** 0.5
+
+
+def candidates(max_candidates: int = MAX_CANDIDATES, seed: int = RANDOM_STATE) -> List[Dict]:
+    """DEFAULT_RF_PARAMS, then a random draw from the SEARCH_SPACE grid ordered by cost"""
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    grid = [params for params in grid if params != DEFAULT_RF_PARAMS]
+    rng = np.random.default_rng(seed)
+    drawn = [grid[i] for i in rng.choice(len(grid), min(max(max_candidates - 1, 0), len(grid)), replace=False)]
+    return [dict(DEFAULT_RF_PARAMS)] + sorted(drawn, key=_cost)
+
+
+def one_row_latency_us(model, X: np.ndarray, repeat: int = 20) -> float:
+    """Best-of-`repeat` time to score one row through the model's CompiledForest"""
+    compiled = compile_model(model)
+    row = X[:1]
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compiled.predict_proba(row)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def evaluate_candidate(params: Dict, folds: int, stop_below: Optional[float] = None,
+                       seed: int = RANDOM_STATE) -> Dict:
+    """k-fold accuracy of one forest setting on the worker's training data"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold
+
+    cpu_start = fold_start = time.process_time()
+    accuracies, fit_s = [], []
+    status = 'completed'
+    for train, test in StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(_X, _y):
+        model = RandomForestClassifier(**params, random_state=seed)
+        start = time.perf_counter()
+        model.fit(_X[train], _y[train])
+        fit_s.append(time.perf_counter() - start)
+        accuracies.append(float((model.predict(_X[test]) == _y[test]).mean()))
+        if _spent is not None:
+            with _spent.get_lock():
+                _spent.value += time.process_time() - fold_start
+            fold_start = time.process_time()
+        if len(accuracies) == folds:
+            break
+        threshold = stop_below
+        best = _best.value if _best is not None else -1.0
+        if best >= 0:
+            threshold = max(threshold if threshold is not None else -1.0, best - PRUNE_MARGIN)
+        if threshold is not None and np.mean(accuracies) < threshold:
+            status = 'pruned'
+            break
+        if best >= 0 and _budget is not None and _spent.value >= _budget:
+            status = 'stopped'
+            break
+
+    if status == 'completed' and _best is not None:
+        with _best.get_lock():
+            _best.value = max(_best.value, float(np.mean(accuracies)))
+
+    return {
+        'params': params,
+        'status': status,
+        'accuracy': float(np.mean(accuracies)),
+        'accuracy_std': float(np.std(accuracies)),
+        'fold_accuracies': accuracies,
+        'fit_s': float(np.mean(fit_s)),
+        'predict_row_us': one_row_latency_us(model, _X),
+        'nodes': int(sum(tree.tree_.node_count for tree in model.estimators_)),
+        'cpu_s': time.process_time() - cpu_start
+    }
+
+
+def select(results: List[Dict], tolerance: float = SELECTION_TOLERANCE) -> Dict:
+    """Fastest-to-serve completed candidate within `tolerance` of the best accuracy"""
+    completed = [r for r in results if r['status'] == 'completed']
+    if not completed:
+        raise ValueError("No hyperparameter candidate completed")
+    best_accuracy = max(r['accuracy'] for r in completed)
+    return min((r for r in completed if r['accuracy'] >= best_accuracy - tolerance), key=lambda r: r['predict_row_us'])
+
+
+def search(X: np.ndarray, y: np.ndarray, max_candidates: int = MAX_CANDIDATES, folds: int = CV_FOLDS,
+           cpu_budget_s: float = CPU_BUDGET_S, workers: Optional[int] = None, seed: int = RANDOM_STATE) -> Dict:
+    """Cross-validate candidate forests in a process pool; returns every result and the chosen params"""
+    y = np.asarray(y)
+    # Stratified folds need every class in every fold
+    _, class_counts = np.unique(y, return_counts=True)
+    folds = max(2, min(folds, int(class_counts.min())))
+    pending = list(enumerate(candidates(max_candidates, seed)))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+
+    # In candidate order, whatever order they finish in
+    results: List[Dict] = [{'params': params, 'status': 'skipped'} for _, params in pending]
+    best = multiprocessing.Value('d', -1.0)
+    spent = multiprocessing.Value('d', 0.0)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, best, spent, cpu_budget_s)) as pool:
+        running = {}
+        while pending or running:
+            while pending and len(running) < workers and spent.value < cpu_budget_s:
+                index, params = pending.pop(0)
+                running[pool.submit(evaluate_candidate, params, folds, None, seed)] = index
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = {**results[index], 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+
+    chosen = select(results)
+    return {
+        'best_params': chosen['params'],
+        'best_accuracy': chosen['accuracy'],
+        'folds': folds,
+        'workers': workers,
+        'cpu_budget_s': cpu_budget_s,
+        'cpu_s': spent.value,
+        'wall_s': time.perf_counter() - start,
+        'candidates': results
+    }
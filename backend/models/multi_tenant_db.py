@@ -1,8 +1,13 @@
 import sqlite3
 import pandas as pd
 import os
+from functools import partial
 from typing import Dict, List, Optional
 from auth.auth import User, UserRole
+from models.database import ensure_columns
+from models.risk_engine import BREAKDOWN_COLUMNS
+from models.risk_history import ensure_baseline, record_snapshot
+from utils.parallel import map_tenants, reduce_partials
 
 class MultiTenantDatabase:
     def __init__(self):
@@ -107,6 +112,7 @@ class MultiTenantDatabase:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''', (college_id,))
+            ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
             
             conn.commit()
     
@@ -154,9 +160,13 @@ class MultiTenantDatabase:
             cursor.execute("SELECT college_id FROM colleges")
             colleges = cursor.fetchall()
         
+        per_college = map_tenants(partial(self.get_college_students, limit=limit, offset=offset),
+                                  [college_id for (college_id,) in colleges])
         for (college_id,) in colleges:
-            college_students = self.get_college_students(college_id, limit, offset)
-            all_students.extend(college_students)
+            if college_id in per_college.errors:
+                print(f"Error reading students for {college_id}: {per_college.errors[college_id]}")
+                continue
+            all_students.extend(per_college.results[college_id])
         
         # Sort by risk score and apply pagination
         all_students.sort(key=lambda x: x.get('risk_score', 0), reverse=True)
@@ -221,32 +231,19 @@ class MultiTenantDatabase:
             cursor.execute("SELECT college_id FROM colleges")
             colleges = [row[0] for row in cursor.fetchall()]
         
-        total_students = 0
-        total_high_risk = 0
+        # Per-college reads run in parallel; the partial stats are then reduced
+        per_college = map_tenants(self.get_college_dashboard_stats, colleges)
         college_stats = {}
-        combined_risk_dist = {}
-        combined_dept_dist = {}
-        
         for college_id in colleges:
-            stats = self.get_college_dashboard_stats(college_id)
-            college_stats[college_id] = stats
-            
-            total_students += stats['total_students']
-            total_high_risk += stats['high_risk_count']
-            
-            # Combine risk distributions
-            for risk, count in stats['risk_distribution'].items():
-                combined_risk_dist[risk] = combined_risk_dist.get(risk, 0) + count
-            
-            # Combine department distributions
-            for dept, count in stats['department_distribution'].items():
-                combined_dept_dist[dept] = combined_dept_dist.get(dept, 0) + count
+            if college_id in per_college.errors:
+                print(f"Error getting stats for {college_id}: {per_college.errors[college_id]}")
+                continue
+            college_stats[college_id] = per_college.results[college_id]
         
+        totals = reduce_partials(college_stats.values(), counts=['total_students', 'high_risk_count'],
+                                 distributions=['risk_distribution', 'department_distribution'])
         return {
-            'total_students': total_students,
-            'high_risk_count': total_high_risk,
-            'risk_distribution': combined_risk_dist,
-            'department_distribution': combined_dept_dist,
+            **totals,
             'college_breakdown': college_stats,
             'total_colleges': len(colleges)
         }
@@ -263,7 +260,10 @@ class MultiTenantDatabase:
             students_df['college_id'] = college_id
             
             with sqlite3.connect(db_path) as conn:
+                ensure_baseline(conn)
                 students_df.to_sql('students', conn, if_exists='replace', index=False)
+                ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
+                record_snapshot(conn, students_df, complete=True)
             
             # Update government stats
             self.update_government_stats(college_id)
@@ -275,20 +275,23 @@ class MultiTenantDatabase:
     def update_government_stats(self, college_id: str):
         """Update government master database with college statistics"""
         stats = self.get_college_dashboard_stats(college_id)
+        avg_attendance, avg_marks = self.get_college_averages(college_id)
         
         with sqlite3.connect(self.government_db) as conn:
             cursor = conn.cursor()
             
-            # Update college stats
+            # One row per college per day; the last update of the day wins
             cursor.execute('''
                 INSERT OR REPLACE INTO college_stats 
-                (college_id, stat_date, total_students, high_risk_count, critical_risk_count)
-                VALUES (?, DATE('now'), ?, ?, ?)
+                (college_id, stat_date, total_students, high_risk_count, critical_risk_count, avg_attendance, avg_marks)
+                VALUES (?, DATE('now'), ?, ?, ?, ?, ?)
             ''', (
                 college_id,
                 stats['total_students'],
                 stats['high_risk_count'],
-                stats['risk_distribution'].get('Critical', 0)
+                stats['risk_distribution'].get('Critical', 0),
+                avg_attendance,
+                avg_marks
             ))
             
             # Update colleges table
@@ -300,6 +303,31 @@ class MultiTenantDatabase:
             
             conn.commit()
     
+    def get_college_averages(self, college_id: str):
+        """Average attendance and marks of a college (None when unavailable)"""
+        db_path = self.get_college_database_path(college_id)
+        if not os.path.exists(db_path):
+            return None, None
+        
+        with sqlite3.connect(db_path) as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+            averages = [f"ROUND(AVG({c}), 2)" if c in columns else "NULL" for c in ('attendance_percentage', 'marks')]
+            avg_attendance, avg_marks = conn.execute(f"SELECT {', '.join(averages)} FROM students").fetchone()
+        return avg_attendance, avg_marks
+    
+    def get_college_daily_stats(self, college_id: str, days: int = 90) -> List[Dict]:
+        """college_stats rows for the last `days` days, oldest first"""
+        with sqlite3.connect(self.government_db) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT stat_date, total_students, high_risk_count, critical_risk_count, avg_attendance, avg_marks
+                FROM college_stats
+                WHERE college_id = ? AND stat_date >= DATE('now', ?)
+                ORDER BY stat_date
+            ''', (college_id, f"-{int(days)} days"))
+            return [dict(row) for row in cursor.fetchall()]
+    
     def log_user_action(self, user: User, action: str, resource: str, ip_address: str = None):
         """Log user actions for audit trail"""
         with sqlite3.connect(self.government_db) as conn:
@@ -0,0 +1,90 @@
+"""Stored ML predictions with per-student explanations.
+
+score_tenant() scores a tenant's students from the feature store and
+writes one ml_predictions row per student, in the tenant's own database.
+Each row holds the forest's predicted level and its probability. It also
+holds what every input field contributed to that probability along the
+student's tree paths (DropoutPredictor.explain), plus the bias those
+contributions start from. Counselors read the stored row with the student
+(GET /student/{id}), so no request ever walks the model.
+
+Rows carry the model version:
+- after an upload that only appended students, just those are scored;
+- when a tenant's table was replaced, every student is rescored;
+- when a model is promoted, every tenant is rescored.
+"""
+import json
+import sqlite3
+from typing import Dict, Optional
+
+import numpy as np
+
+SCORE_CHUNK_ROWS = 10000
+
+
+def init_predictions_table(conn: sqlite3.Connection):
+    """Creating the table changes the database's schema_version, which the feature
+    store fingerprints; callers create it before FeatureStore.refresh() so that the
+    refresh after the first scoring can still append."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ml_predictions (
+            student_id TEXT PRIMARY KEY,
+            model_version TEXT,
+            predicted_risk TEXT,
+            probability REAL,
+            bias REAL,
+            contributions TEXT,
+            scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def score_tenant(predictor, store, tenant: str, db_path: str, new_rows: Optional[int] = None) -> Dict:
+    """Score and store a tenant's students; new_rows=n scores only the last n stored rows (an append)"""
+    features, rowids = store.load(tenant)
+    start = len(rowids) - new_rows if new_rows is not None else 0
+    names = predictor.input_features
+
+    with sqlite3.connect(db_path) as conn:
+        init_predictions_table(conn)
+        first_rowid = int(rowids[start]) if start < len(rowids) else 0
+        student_ids = dict(conn.execute("SELECT rowid, student_id FROM students WHERE rowid >= ?", (first_rowid,)))
+        scored = 0
+        for chunk_start in range(start, len(rowids), SCORE_CHUNK_ROWS):
+            chunk = slice(chunk_start, min(chunk_start + SCORE_CHUNK_ROWS, len(rowids)))
+            probabilities, predicted, _ = predictor.predict_features(features[chunk])
+            bias, contributions = predictor.explain(features[chunk], predicted)
+            rows = [
+                (student_ids.get(int(rowid)), predictor.version, str(level), float(probability), float(start_value),
+                 json.dumps(dict(zip(names, np.round(values, 6).tolist()))))
+                for rowid, level, probability, start_value, values
+                in zip(rowids[chunk], predicted, probabilities.max(axis=1), bias, contributions)
+            ]
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO ml_predictions
+                    (student_id, model_version, predicted_risk, probability, bias, contributions)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [row for row in rows if row[0] is not None])
+            scored += len(rows)
+        if new_rows is None:
+            # A full rescore also forgets students that are no longer stored
+            with conn:
+                conn.execute("DELETE FROM ml_predictions WHERE student_id NOT IN (SELECT student_id FROM students)")
+    return {'tenant': tenant, 'scored': scored, 'model_version': predictor.version}
+
+
+def get_prediction(db_path: str, student_id: str) -> Optional[Dict]:
+    """The stored prediction of one student, strongest contributions first; None if never scored"""
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM ml_predictions WHERE student_id = ?", (student_id,)).fetchone()
+        except sqlite3.OperationalError:
+            return None  # no ml_predictions table yet
+    if row is None:
+        return None
+    prediction = dict(row)
+    contributions = json.loads(prediction['contributions'])
+    prediction['contributions'] = dict(sorted(contributions.items(), key=lambda item: -abs(item[1])))
+    return prediction
@@ -0,0 +1,287 @@
+"""Statewide rescoring of stored students after a thresholds/weights change.
+
+A job records the engine configuration it scores with, then each tenant
+database is streamed in rowid chunks, scored with the batch engine, and
+only rows whose stored risk columns differ are written back, together
+with their risk_history entries (one transaction per chunk). Tenants run
+in parallel worker processes.
+
+Progress is checkpointed per tenant in government_master.db after every
+chunk. Re-running a chunk is harmless (unchanged rows are not written), so
+an interrupted job resumes from its last checkpoint:
+
+    cd backend && python -m models.rescoring [--workers 4] [--resume JOB_ID]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import uuid
+from functools import partial
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from models.database import ensure_columns
+from models.risk_history import ensure_baseline, record_snapshot
+from utils.parallel import map_tenants
+from models.risk_engine import BREAKDOWN_COLUMNS, RiskEngine
+
+GOVERNMENT_DB = "government_master.db"
+DEFAULT_CHUNK_SIZE = 5000
+
+# Stored columns that make up a student's risk result
+RESULT_COLUMNS = ['risk_score', 'risk_level'] + [c for c in BREAKDOWN_COLUMNS if c != 'risk_version']
+
+
+def init_job_tables(government_db: str = GOVERNMENT_DB):
+    with sqlite3.connect(government_db) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rescoring_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT,
+                risk_version TEXT,
+                thresholds TEXT,
+                weights TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rescoring_progress (
+                job_id TEXT,
+                college_id TEXT,
+                status TEXT,
+                total_rows INTEGER DEFAULT 0,
+                processed_rows INTEGER DEFAULT 0,
+                changed_rows INTEGER DEFAULT 0,
+                last_rowid INTEGER DEFAULT 0,
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (job_id, college_id)
+            )
+        ''')
+        conn.commit()
+
+
+def create_job(engine: RiskEngine, colleges: List[str], government_db: str = GOVERNMENT_DB) -> str:
+    """Record a job scoring with engine's current thresholds and weights"""
+    init_job_tables(government_db)
+    job_id = str(uuid.uuid4())
+    with sqlite3.connect(government_db) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO rescoring_jobs (job_id, status, risk_version, thresholds, weights)
+            VALUES (?, 'pending', ?, ?, ?)
+        ''', (job_id, engine.version, json.dumps(engine.thresholds), json.dumps(engine.weights)))
+        cursor.executemany('''
+            INSERT INTO rescoring_progress (job_id, college_id, status) VALUES (?, ?, 'pending')
+        ''', [(job_id, college_id) for college_id in colleges])
+        conn.commit()
+    return job_id
+
+
+def engine_for_job(job: Dict) -> RiskEngine:
+    engine = RiskEngine(cache_size=0)
+    engine.update_thresholds(job['thresholds'])
+    engine.update_weights(job['weights'])
+    return engine
+
+
+def get_job(job_id: str, government_db: str = GOVERNMENT_DB) -> Optional[Dict]:
+    """Job configuration and per-tenant progress"""
+    init_job_tables(government_db)
+    with sqlite3.connect(government_db) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM rescoring_jobs WHERE job_id = ?", (job_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['thresholds'] = json.loads(job['thresholds'])
+        job['weights'] = json.loads(job['weights'])
+
+        cursor.execute('''
+            SELECT college_id, status, total_rows, processed_rows, changed_rows, last_rowid, error, updated_at
+            FROM rescoring_progress WHERE job_id = ? ORDER BY college_id
+        ''', (job_id,))
+        job['colleges'] = [dict(r) for r in cursor.fetchall()]
+
+    total = sum(c['total_rows'] for c in job['colleges'])
+    processed = sum(c['processed_rows'] for c in job['colleges'])
+    job['total_rows'] = total
+    job['processed_rows'] = processed
+    job['changed_rows'] = sum(c['changed_rows'] for c in job['colleges'])
+    job['progress'] = round(processed / total, 4) if total else (1.0 if job['status'] == 'completed' else 0.0)
+    return job
+
+
+def _set_job_status(job_id: str, status: str, government_db: str):
+    with sqlite3.connect(government_db) as conn:
+        finished = "CURRENT_TIMESTAMP" if status in ('completed', 'failed') else "NULL"
+        conn.execute(f"UPDATE rescoring_jobs SET status = ?, finished_at = {finished} WHERE job_id = ?",
+                     (status, job_id))
+        conn.commit()
+
+
+def _checkpoint(government_db: str, job_id: str, college_id: str, **fields):
+    columns = ', '.join(f"{name} = ?" for name in fields)
+    with sqlite3.connect(government_db, timeout=30) as conn:
+        conn.execute(f'''
+            UPDATE rescoring_progress SET {columns}, updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = ? AND college_id = ?
+        ''', list(fields.values()) + [job_id, college_id])
+        conn.commit()
+
+
+def changed_mask(stored: pd.DataFrame, rescored: pd.DataFrame) -> pd.Series:
+    """Rows whose stored risk columns differ from the fresh result (NULL counts as different)"""
+    changed = pd.Series(False, index=stored.index)
+    for column in RESULT_COLUMNS:
+        if column not in stored.columns:
+            return pd.Series(True, index=stored.index)
+        old, new = stored[column], rescored[column]
+        if column.endswith('_level'):
+            same = old.astype(object) == new.astype(object)
+        else:
+            same = pd.to_numeric(old, errors='coerce').to_numpy(dtype=float) == new.to_numpy(dtype=float)
+        changed |= ~same
+    return changed
+
+
+def rescore_college(job_id: str, college_id: str, db_path: str, government_db: str = GOVERNMENT_DB,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """Rescore one tenant from its checkpoint; runs in a worker process"""
+    job = get_job(job_id, government_db)
+    progress = next(c for c in job['colleges'] if c['college_id'] == college_id)
+    if progress['status'] == 'completed':
+        return progress
+
+    engine = engine_for_job(job)
+    last_rowid = progress['last_rowid']
+    processed, changed = progress['processed_rows'], progress['changed_rows']
+
+    try:
+        with sqlite3.connect(db_path, timeout=30) as conn:
+            ensure_columns(conn, 'students', BREAKDOWN_COLUMNS)
+            with conn:
+                ensure_baseline(conn)
+            total = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+            _checkpoint(government_db, job_id, college_id, status='running', total_rows=total)
+
+            while True:
+                chunk = pd.read_sql_query(
+                    "SELECT rowid AS _rowid, * FROM students WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    conn, params=(last_rowid, chunk_size)
+                )
+                if len(chunk) == 0:
+                    break
+
+                rescored = engine.batch_calculate_risk(chunk.drop(columns=['_rowid']), with_breakdown=True)
+                mask = changed_mask(chunk, rescored).to_numpy()
+                chunk_last = int(chunk['_rowid'].iloc[-1])
+
+                updates = rescored.loc[mask, RESULT_COLUMNS]
+                rows = [
+                    tuple(value.item() if hasattr(value, 'item') else value for value in row) + (engine.version, rowid)
+                    for row, rowid in zip(updates.itertuples(index=False), chunk.loc[mask, '_rowid'].tolist())
+                ]
+                set_clause = ', '.join(f"{column} = ?" for column in RESULT_COLUMNS + ['risk_version'])
+
+                # One transaction per chunk: changed rows get new results; the rest
+                # of the chunk already matches and only needs the version stamp
+                with conn:
+                    conn.executemany(f"UPDATE students SET {set_clause} WHERE rowid = ?", rows)
+                    conn.execute(
+                        "UPDATE students SET risk_version = ? WHERE rowid > ? AND rowid <= ? "
+                        "AND risk_version IS NOT ?",
+                        (engine.version, last_rowid, chunk_last, engine.version)
+                    )
+                    if 'student_id' in chunk.columns:
+                        record_snapshot(conn, rescored.loc[mask], source='rescoring')
+
+                last_rowid = chunk_last
+                processed += len(chunk)
+                changed += len(rows)
+                _checkpoint(government_db, job_id, college_id, processed_rows=processed, changed_rows=changed,
+                            last_rowid=last_rowid)
+
+        _checkpoint(government_db, job_id, college_id, status='completed')
+        return {'college_id': college_id, 'status': 'completed', 'processed_rows': processed, 'changed_rows': changed}
+    except Exception as e:
+        _checkpoint(government_db, job_id, college_id, status='failed', error=str(e))
+        return {'college_id': college_id, 'status': 'failed', 'error': str(e)}
+
+
+def tenant_databases(government_db: str = GOVERNMENT_DB) -> Dict[str, str]:
+    """college_id -> database path for every registered college with a database"""
+    with sqlite3.connect(government_db) as conn:
+        colleges = [row[0] for row in conn.execute("SELECT college_id FROM colleges ORDER BY college_id")]
+    return {c: f"{c}_students.db" for c in colleges if os.path.exists(f"{c}_students.db")}
+
+
+def run_job(job_id: str, workers: int = 4, government_db: str = GOVERNMENT_DB,
+            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """Run (or resume) a job: pending/failed/interrupted tenants in parallel processes"""
+    from utils.services import services
+
+    job = get_job(job_id, government_db)
+    if job is None:
+        raise ValueError(f"Unknown rescoring job: {job_id}")
+
+    databases = tenant_databases(government_db)
+    pending = [c['college_id'] for c in job['colleges'] if c['status'] != 'completed' and c['college_id'] in databases]
+    _set_job_status(job_id, 'running', government_db)
+
+    def finished(college_id: str, result: Dict):
+        print(f"Rescoring {job_id[:8]} {college_id}: {result['status']}")
+        if result['status'] == 'completed':
+            services.multi_db.update_government_stats(college_id)
+
+    outcome = map_tenants(
+        partial(rescore_college, job_id, government_db=government_db, chunk_size=chunk_size),
+        {college_id: databases[college_id] for college_id in pending},
+        processes=True, max_workers=workers, timeout=None, on_result=finished
+    )
+    for college_id, error in outcome.errors.items():
+        print(f"Rescoring {job_id[:8]} {college_id}: failed ({error})")
+
+    failed = bool(outcome.errors) or any(r['status'] == 'failed' for r in outcome.results.values())
+    _set_job_status(job_id, 'failed' if failed else 'completed', government_db)
+    return get_job(job_id, government_db)
+
+
+def start_rescoring(engine: RiskEngine, government_db: str = GOVERNMENT_DB) -> str:
+    """Create a job for every tenant database with engine's configuration"""
+    return create_job(engine, list(tenant_databases(government_db)), government_db)
+
+
+def main() -> int:
+    from models.risk_rules import load_overrides
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", help="job id to resume")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.resume:
+        job_id = args.resume
+    else:
+        engine = RiskEngine()
+        engine.apply_overrides(load_overrides("dte_rajasthan.db"))
+        job_id = start_rescoring(engine)
+    print(f"Rescoring job {job_id}")
+
+    job = run_job(job_id, workers=args.workers, chunk_size=args.chunk_size)
+    for college in job['colleges']:
+        print(f"  {college['college_id']:<6} {college['status']:<10} "
+              f"{college['processed_rows']}/{college['total_rows']} rows, {college['changed_rows']} changed")
+    return 0 if job['status'] == 'completed' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
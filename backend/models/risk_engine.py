@@ -1,188 +1,213 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
 from typing import Dict, List
 
+from models.risk_rules import LEVELS, RISK_LEVELS, compile_profile, profile_defaults
+
+# Every input read by calculate_risk_score, with the default it falls back to
+SCORING_INPUTS = (
+    ('attendance_percentage', 100),
+    ('marks', 100),
+    ('family_income', 500000),
+    ('total_fees', 50000),
+    ('fees_due', 0),
+    ('payment_status', 'Paid'),
+    ('internet_access', 'Yes'),
+    ('electricity', 'Regular'),
+    ('distance_from_college', 0),
+    ('family_size', 4),
+    ('region', 'Urban'),
+)
+
+_NAN_KEY = ('nan',)
+
+COMPONENTS = ['attendance', 'academic', 'financial', 'fees', 'socioeconomic']
+
+# Recommendations in output order; persisted as a bitmask where bit i is RECOMMENDATIONS[i]
+RECOMMENDATIONS = [
+    'Schedule immediate counseling for attendance issues',
+    'Contact parents/guardians about attendance concerns',
+    'Arrange academic support/tutoring sessions',
+    'Consider peer mentoring program',
+    'Discuss scholarship/financial aid options',
+    'Connect with financial counselor',
+    'Immediate fee payment discussion required',
+    'Explore installment payment options',
+    'Risk of academic suspension due to unpaid fees',
+    'Provide offline study materials',
+    'Arrange computer lab access',
+    'Discuss hostel accommodation options',
+    'Continue regular monitoring',
+]
+_RECOMMENDATION_BITS = {text: 1 << i for i, text in enumerate(RECOMMENDATIONS)}
+
+# Socioeconomic factors in output order, persisted as a bitmask the same way
+SOCIO_FACTORS = ['No internet access', 'Irregular electricity', 'Long commute', 'Moderate commute',
+                 'Large family', 'Rural background']
+
+# Columns written at ingestion so detail and alert views need not rescore
+BREAKDOWN_COLUMNS = {}
+for _component in COMPONENTS:
+    BREAKDOWN_COLUMNS[f'{_component}_risk_score'] = 'INTEGER'
+    BREAKDOWN_COLUMNS[f'{_component}_risk_level'] = 'TEXT'
+BREAKDOWN_COLUMNS.update({
+    'socio_factor_codes': 'INTEGER',
+    'recommendation_codes': 'INTEGER',
+    'risk_version': 'TEXT'
+})
+
+def records_frame(records: List[Dict]) -> pd.DataFrame:
+    """DataFrame of student dicts for batch scoring.
+    
+    A key absent from a dict takes the scalar path's default rather than
+    NaN, so batch results match calculate_risk_score on the same dicts.
+    """
+    df = pd.DataFrame.from_records(records)
+    for field, default in SCORING_INPUTS:
+        if field not in df.columns:
+            continue
+        absent = np.fromiter((field not in record for record in records), dtype=bool, count=len(records))
+        if absent.any():
+            df[field] = df[field].where(~absent, default)
+    return df
+
 class RiskEngine:
-    def __init__(self):
-        self.thresholds = {
-            'attendance': {'critical': 45, 'high': 60, 'medium': 75},
-            'academic': {'critical': 40, 'high': 55, 'medium': 70},
-            'income': {'critical': 100000, 'high': 200000, 'medium': 300000},
-            'fees': {'critical': 0.7, 'high': 0.4, 'medium': 0.2},  # Fee due ratio
-            'distance': {'high': 30, 'medium': 15}
-        }
+    def __init__(self, cache_size: int = 10000):
+        # Scoring rules are data (models.risk_rules 'standard' profile),
+        # compiled against the current thresholds and weights
+        self.thresholds, self.weights = profile_defaults('standard')
+        self._rules = compile_profile('standard', self.thresholds, self.weights)
         
-        self.weights = {
-            'attendance': 0.30,
-            'academic': 0.25,
-            'financial': 0.15,
-            'fees': 0.20,  # New fees component
-            'socioeconomic': 0.10
-        }
+        # Bounded LRU memo of scoring results, keyed on the exact inputs plus
+        # the thresholds/weights version so updates invalidate it
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self.version = self._compute_version()
+    
+    def _compute_version(self) -> str:
+        """Fingerprint of the current thresholds and weights"""
+        config = json.dumps({'thresholds': self.thresholds, 'weights': self.weights}, sort_keys=True)
+        return hashlib.sha1(config.encode()).hexdigest()[:12]
+    
+    def _cache_key(self, student_data: Dict):
+        key = [self.version]
+        for field, default in SCORING_INPUTS:
+            value = student_data.get(field, default)
+            if isinstance(value, float) and math.isnan(value):
+                key.append(_NAN_KEY)
+            else:
+                # Type is part of the key: 45 and 45.0 format differently
+                key.append((type(value), value))
+        return tuple(key)
     
     def calculate_risk_score(self, student_data: Dict) -> Dict:
-        """Calculate comprehensive risk score"""
+        """Calculate comprehensive risk score (memoized; treat the result as read-only)"""
+        try:
+            key = self._cache_key(student_data)
+            hash(key)
+        except TypeError:
+            # Unhashable input values: score without caching
+            return self._calculate_risk_score(student_data)
         
-        # Attendance risk
-        attendance = student_data.get('attendance_percentage', 100)
-        if attendance < self.thresholds['attendance']['critical']:
-            attendance_score = 90
-            attendance_level = 'Critical'
-        elif attendance < self.thresholds['attendance']['high']:
-            attendance_score = 70
-            attendance_level = 'High'
-        elif attendance < self.thresholds['attendance']['medium']:
-            attendance_score = 40
-            attendance_level = 'Medium'
-        else:
-            attendance_score = 10
-            attendance_level = 'Low'
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return result
+            self._cache_misses += 1
         
-        # Academic risk
-        marks = student_data.get('marks', 100)
-        if marks < self.thresholds['academic']['critical']:
-            academic_score = 85
-            academic_level = 'Critical'
-        elif marks < self.thresholds['academic']['high']:
-            academic_score = 65
-            academic_level = 'High'
-        elif marks < self.thresholds['academic']['medium']:
-            academic_score = 35
-            academic_level = 'Medium'
-        else:
-            academic_score = 5
-            academic_level = 'Low'
+        result = self._calculate_risk_score(student_data)
         
-        # Financial risk (family income)
-        income = student_data.get('family_income', 500000)
-        if income < self.thresholds['income']['critical']:
-            financial_score = 70
-            financial_level = 'Critical'
-        elif income < self.thresholds['income']['high']:
-            financial_score = 50
-            financial_level = 'High'
-        elif income < self.thresholds['income']['medium']:
-            financial_score = 25
-            financial_level = 'Medium'
-        else:
-            financial_score = 5
-            financial_level = 'Low'
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+    
+    def cache_info(self) -> Dict:
+        """Hit/miss statistics of the scoring memo"""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'hit_rate': round(self._cache_hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._cache),
+                'max_size': self.cache_size,
+                'version': self.version
+            }
+    
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def _calculate_risk_score(self, student_data: Dict) -> Dict:
+        """Score one student from scratch"""
+        result = self._rules.evaluate(student_data)
+        
+        components = {name: (score, LEVELS[level]) for name, (score, level, _, _) in result['components'].items()}
+        risk_factors = result['components']['socioeconomic'][3]
         
-        # Fees payment risk
-        fees_paid = student_data.get('fees_paid', 0)
+        recommendations = self._generate_recommendations(
+            components['attendance'][1], components['academic'][1], components['financial'][1],
+            components['fees'][1], components['socioeconomic'][1], risk_factors
+        )
+        return self._assemble_result(student_data, result['composite_score'], result['risk_level'], components,
+                                     risk_factors, recommendations)
+    
+    def _assemble_result(self, student_data: Dict, composite_score: float, risk_level: str, components: Dict,
+                         risk_factors: List[str], recommendations: List[str]) -> Dict:
+        """Build the breakdown structure returned by calculate_risk_score"""
+        attendance = student_data.get('attendance_percentage', 100)
+        marks = student_data.get('marks', 100)
+        income = student_data.get('family_income', 500000)
         total_fees = student_data.get('total_fees', 50000)
         fees_due = student_data.get('fees_due', 0)
         payment_status = student_data.get('payment_status', 'Paid')
-        
-        # Calculate fee due ratio
         fee_due_ratio = fees_due / total_fees if total_fees > 0 else 0
         
-        if payment_status == 'Pending' or fee_due_ratio > self.thresholds['fees']['critical']:
-            fees_score = 85
-            fees_level = 'Critical'
-        elif payment_status == 'Partial' or fee_due_ratio > self.thresholds['fees']['high']:
-            fees_score = 60
-            fees_level = 'High'
-        elif fee_due_ratio > self.thresholds['fees']['medium']:
-            fees_score = 30
-            fees_level = 'Medium'
-        else:
-            fees_score = 5
-            fees_level = 'Low'
-        
-        # Socioeconomic risk
-        socio_score = 0
-        risk_factors = []
-        
-        # Internet access
-        if student_data.get('internet_access', 'Yes') == 'No':
-            socio_score += 20
-            risk_factors.append('No internet access')
-        
-        # Electricity
-        if student_data.get('electricity', 'Regular') == 'Irregular':
-            socio_score += 15
-            risk_factors.append('Irregular electricity')
-        
-        # Distance
-        distance = student_data.get('distance_from_college', 0)
-        if distance > self.thresholds['distance']['high']:
-            socio_score += 25
-            risk_factors.append(f'Long commute: {distance}km')
-        elif distance > self.thresholds['distance']['medium']:
-            socio_score += 15
-            risk_factors.append(f'Moderate commute: {distance}km')
-        
-        # Family size
-        family_size = student_data.get('family_size', 4)
-        if family_size > 7:
-            socio_score += 15
-            risk_factors.append('Large family')
-        
-        # Region
-        if student_data.get('region', 'Urban') == 'Rural':
-            socio_score += 10
-            risk_factors.append('Rural background')
-        
-        socio_level = 'Critical' if socio_score > 60 else 'High' if socio_score > 35 else 'Medium' if socio_score > 15 else 'Low'
-        
-        # Calculate composite score with fees component
-        composite_score = (
-            attendance_score * self.weights['attendance'] +
-            academic_score * self.weights['academic'] +
-            financial_score * self.weights['financial'] +
-            fees_score * self.weights['fees'] +
-            socio_score * self.weights['socioeconomic']
-        )
-        
-        # Determine overall risk level
-        if composite_score >= 70:
-            risk_level = 'Critical'
-        elif composite_score >= 50:
-            risk_level = 'High'
-        elif composite_score >= 30:
-            risk_level = 'Medium'
-        else:
-            risk_level = 'Low'
-        
-        # Generate recommendations
-        recommendations = self._generate_recommendations(
-            attendance_level, academic_level, financial_level, fees_level, socio_level, risk_factors
-        )
-        
         return {
-            'composite_score': round(composite_score, 2),
+            'composite_score': composite_score,
             'risk_level': risk_level,
             'components': {
                 'attendance': {
-                    'score': attendance_score,
-                    'level': attendance_level,
+                    'score': components['attendance'][0],
+                    'level': components['attendance'][1],
                     'value': attendance,
                     'message': f'Attendance: {attendance}%'
                 },
                 'academic': {
-                    'score': academic_score,
-                    'level': academic_level,
+                    'score': components['academic'][0],
+                    'level': components['academic'][1],
                     'value': marks,
                     'message': f'Theory marks: {marks}%'
                 },
                 'financial': {
-                    'score': financial_score,
-                    'level': financial_level,
+                    'score': components['financial'][0],
+                    'level': components['financial'][1],
                     'value': income,
                     'message': f'Family income: Rs.{income:,}'
                 },
                 'fees': {
-                    'score': fees_score,
-                    'level': fees_level,
+                    'score': components['fees'][0],
+                    'level': components['fees'][1],
                     'value': fee_due_ratio,
                     'payment_status': payment_status,
                     'fees_due': fees_due,
                     'message': f'Payment status: {payment_status}, Due: Rs.{fees_due:,}'
                 },
                 'socioeconomic': {
-                    'score': socio_score,
-                    'level': socio_level,
+                    'score': components['socioeconomic'][0],
+                    'level': components['socioeconomic'][1],
                     'factors': risk_factors,
                     'message': '; '.join(risk_factors) if risk_factors else 'No significant socioeconomic risks'
                 }
@@ -223,9 +248,16 @@ class RiskEngine:
     
     def detect_multi_area_risk(self, student_data: Dict) -> Dict:
         """Detect students with risk in multiple areas"""
+        return self.assess(student_data)['multi_area']
+    
+    def assess(self, student_data: Dict) -> Dict:
+        """calculate_risk_score result plus multi-area flags, from a single evaluation"""
         risk_result = self.calculate_risk_score(student_data)
-        components = risk_result['components']
-        
+        return {**risk_result, 'multi_area': self.multi_area_summary(risk_result['components'])}
+    
+    @staticmethod
+    def multi_area_summary(components: Dict) -> Dict:
+        """Multi-area flags from a result's component breakdown"""
         # Count high-risk areas
         high_risk_areas = []
         for area, data in components.items():
@@ -242,23 +274,158 @@ class RiskEngine:
             'intervention_priority': 'Immediate' if len(high_risk_areas) >= 3 else 'High' if len(high_risk_areas) >= 2 else 'Normal'
         }
     
-    def batch_calculate_risk(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate risk for multiple students"""
-        results = []
+    def score_arrays(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Vectorized equivalent of calculate_risk_score for every row of df.
+        
+        Returns component scores, component level codes (index into
+        RISK_LEVELS), the rounded composite score and the overall level
+        code. Results match the scalar path bit for bit.
+        """
+        result = self._rules.evaluate_frame(df)
+        components = result['components']
+        levels = {name: components[name]['level'] for name in COMPONENTS}
+        
+        factors = components['socioeconomic']['factors']
+        socio_factor_codes = 0
+        for bit, factor in enumerate(SOCIO_FACTORS):
+            socio_factor_codes = socio_factor_codes | factors[factor] * (1 << bit)
+        
+        commute = factors['Long commute'] | factors['Moderate commute']
+        recommendation_codes = (
+            (levels['attendance'] >= 2) * 0b11
+            | (levels['academic'] >= 2) * 0b1100
+            | (levels['financial'] >= 2) * 0b110000
+            | (levels['fees'] >= 2) * 0b11000000
+            | (levels['fees'] == 3) * (1 << 8)
+            | factors['No internet access'] * (0b11 << 9)
+            | commute * (1 << 11)
+        )
+        recommendation_codes = np.where(recommendation_codes == 0, 1 << 12, recommendation_codes)
+        
+        arrays = {}
+        for name in COMPONENTS:
+            arrays[f'{name}_score'] = components[name]['score']
+            arrays[f'{name}_level'] = levels[name]
+        arrays.update({
+            'socio_factor_codes': socio_factor_codes,
+            'recommendation_codes': recommendation_codes,
+            'composite_score': result['composite_score'],
+            'risk_level': result['risk_level']
+        })
+        return arrays
+    
+    def batch_calculate_risk(self, df: pd.DataFrame, with_breakdown: bool = False) -> pd.DataFrame:
+        """Calculate risk for multiple students
         
-        for _, student in df.iterrows():
-            risk_data = self.calculate_risk_score(student.to_dict())
-            results.append({
-                'student_id': student.get('student_id', ''),
-                'risk_score': risk_data['composite_score'],
-                'risk_level': risk_data['risk_level']
-            })
+        with_breakdown also adds the BREAKDOWN_COLUMNS so the stored rows can
+        serve detail views without rescoring.
+        """
+        return self._result_frame(df, self.score_arrays(df), with_breakdown)
+    
+    def assess_batch(self, df: pd.DataFrame, with_breakdown: bool = False) -> pd.DataFrame:
+        """Vectorized assess(): batch_calculate_risk columns plus multi-area flags
+        
+        Adds multi_area_risk, risk_areas_count, multi_area_severity and
+        intervention_priority, matching detect_multi_area_risk per row.
+        """
+        scores = self.score_arrays(df)
+        df_result = self._result_frame(df, scores, with_breakdown)
         
-        results_df = pd.DataFrame(results)
-        return df.merge(results_df, on='student_id', how='left')
+        areas = sum((scores[f'{component}_level'] >= 2).astype(int) for component in COMPONENTS)
+        df_result['multi_area_risk'] = areas >= 2
+        df_result['risk_areas_count'] = areas
+        df_result['multi_area_severity'] = np.select([areas >= 3, areas >= 2], ['Critical', 'High'], 'Medium')
+        df_result['intervention_priority'] = np.select([areas >= 3, areas >= 2], ['Immediate', 'High'], 'Normal')
+        return df_result
+    
+    def _result_frame(self, df: pd.DataFrame, scores: Dict[str, np.ndarray], with_breakdown: bool) -> pd.DataFrame:
+        df_result = df.copy()
+        df_result['risk_score'] = scores['composite_score']
+        df_result['risk_level'] = RISK_LEVELS[scores['risk_level']]
+        
+        if with_breakdown:
+            for component in COMPONENTS:
+                df_result[f'{component}_risk_score'] = scores[f'{component}_score']
+                df_result[f'{component}_risk_level'] = RISK_LEVELS[scores[f'{component}_level']]
+            df_result['socio_factor_codes'] = scores['socio_factor_codes']
+            df_result['recommendation_codes'] = scores['recommendation_codes']
+            df_result['risk_version'] = self.version
+        return df_result
+    
+    def breakdown_columns(self, risk_result: Dict) -> Dict:
+        """Stored breakdown columns for a calculate_risk_score result"""
+        columns = {}
+        for component in COMPONENTS:
+            columns[f'{component}_risk_score'] = risk_result['components'][component]['score']
+            columns[f'{component}_risk_level'] = risk_result['components'][component]['level']
+        
+        factor_codes = 0
+        for factor in risk_result['components']['socioeconomic']['factors']:
+            name = factor.split(':')[0]
+            factor_codes |= 1 << SOCIO_FACTORS.index(name)
+        columns['socio_factor_codes'] = factor_codes
+        columns['recommendation_codes'] = sum(_RECOMMENDATION_BITS[r] for r in risk_result['recommendations'])
+        columns['risk_version'] = self.version
+        return columns
+    
+    def breakdown_from_stored(self, student: Dict):
+        """Rebuild the calculate_risk_score result from stored breakdown columns.
+        
+        Returns None when the row has no breakdown or it was scored with
+        different thresholds/weights.
+        """
+        if student.get('risk_version') != self.version:
+            return None
+        if any(student.get(column) is None or student.get(column) != student.get(column)
+               for column in BREAKDOWN_COLUMNS):
+            return None
+        
+        components = {c: (int(student[f'{c}_risk_score']), student[f'{c}_risk_level']) for c in COMPONENTS}
+        
+        distance = student.get('distance_from_college', 0)
+        factor_codes = int(student['socio_factor_codes'])
+        risk_factors = []
+        for bit, factor in enumerate(SOCIO_FACTORS):
+            if factor_codes & (1 << bit):
+                risk_factors.append(f'{factor}: {distance}km' if 'commute' in factor else factor)
+        
+        recommendations = self.recommendations_from_codes(student['recommendation_codes'])
+        
+        return self._assemble_result(student, student['risk_score'], student['risk_level'], components,
+                                     risk_factors, recommendations)
+    
+    @staticmethod
+    def recommendations_from_codes(recommendation_codes) -> List[str]:
+        """Decode a stored recommendation bitmask"""
+        codes = int(recommendation_codes)
+        return [text for bit, text in enumerate(RECOMMENDATIONS) if codes & (1 << bit)]
+    
+    def get_breakdown(self, student: Dict) -> Dict:
+        """Stored breakdown when still current, otherwise a (memoized) rescore"""
+        stored = self.breakdown_from_stored(student)
+        return stored if stored is not None else self.calculate_risk_score(student)
     
     def update_thresholds(self, new_thresholds: Dict):
         """Update risk thresholds"""
         for category, thresholds in new_thresholds.items():
             if category in self.thresholds:
-                self.thresholds[category].update(thresholds)
\ No newline at end of file
+                self.thresholds[category].update(thresholds)
+        self._rules = compile_profile('standard', self.thresholds, self.weights)
+        self.version = self._compute_version()
+        self.clear_cache()
+    
+    def update_weights(self, new_weights: Dict):
+        """Update component weights"""
+        for component, weight in new_weights.items():
+            if component in self.weights:
+                self.weights[component] = weight
+        self._rules = compile_profile('standard', self.thresholds, self.weights)
+        self.version = self._compute_version()
+        self.clear_cache()
+    
+    def apply_overrides(self, overrides: Dict):
+        """Apply load_overrides() output (from the risk_thresholds table)"""
+        if overrides.get('thresholds'):
+            self.update_thresholds(overrides['thresholds'])
+        if overrides.get('weights'):
+            self.update_weights(overrides['weights'])
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""Append-only risk score history, one store per tenant database.
+
+record_snapshot() runs wherever student risk results are written
+(uploads, rescoring). It appends a row only for students whose score or
+level differs from their last recorded value. Re-ingesting an unchanged
+cohort therefore adds nothing.
+
+Rows are (student_id, recorded_at, risk_score, level code, source) in a
+WITHOUT ROWID table keyed by (student_id, recorded_at). recorded_at is
+unix milliseconds (UTC) and the level is its code in LEVELS, or REMOVED when
+an upload that replaced the students table no longer had the student. A
+student's trajectory is one primary-key range scan. The daily trend
+replays the level changes in the same key order.
+"""
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.risk_rules import LEVELS
+
+LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+REMOVED = -1
+REMOVED_LEVEL = 'Removed'
+
+def init_history_tables(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS risk_history (
+            student_id TEXT NOT NULL,
+            recorded_at INTEGER NOT NULL,
+            risk_score REAL,
+            risk_level INTEGER,
+            source TEXT,
+            PRIMARY KEY (student_id, recorded_at)
+        ) WITHOUT ROWID
+    ''')
+    # Last recorded value per student, so a snapshot is compared without scanning history
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS risk_history_latest (
+            student_id TEXT PRIMARY KEY,
+            recorded_at INTEGER,
+            risk_score REAL,
+            risk_level INTEGER
+        ) WITHOUT ROWID
+    ''')
+
+
+def record_snapshot(conn: sqlite3.Connection, students: pd.DataFrame, source: str = 'upload',
+                    recorded_at: Optional[int] = None, complete: bool = False) -> int:
+    """Append history rows for students whose score or level changed; returns how many.
+
+    complete=True means the snapshot is the tenant's whole cohort (the
+    students table was replaced): recorded students missing from it get a
+    REMOVED row. Runs inside the caller's transaction (the caller commits),
+    so a snapshot is stored atomically with the student rows it describes.
+
+    recorded_at is unix milliseconds; by default the current time, moved
+    past the latest recorded snapshot so back-to-back snapshots (an upload
+    and its rescoring) keep both rows. An explicit recorded_at that
+    collides with a stored row raises sqlite3.IntegrityError.
+    """
+    if len(students) == 0 or not {'student_id', 'risk_score', 'risk_level'} <= set(students.columns):
+        return 0
+    init_history_tables(conn)
+    if recorded_at is None:
+        latest = conn.execute("SELECT MAX(recorded_at) FROM risk_history_latest").fetchone()[0]
+        recorded_at = max(int(time.time() * 1000), (latest or 0) + 1)
+
+    snapshot = students[['student_id', 'risk_score', 'risk_level']].drop_duplicates('student_id', keep='last')
+    snapshot = snapshot[snapshot['student_id'].notna()]
+    scores = pd.to_numeric(snapshot['risk_score'], errors='coerce').round(2).to_numpy(dtype=float)
+    codes = snapshot['risk_level'].map(LEVEL_CODES).to_numpy(dtype=float)
+    rows = zip(
+        snapshot['student_id'].astype(str).tolist(),
+        np.where(np.isnan(scores), None, scores.astype(object)).tolist(),
+        np.where(np.isnan(codes), None, np.nan_to_num(codes).astype(np.int64).astype(object)).tolist()
+    )
+
+    # student_id is already unique; the join probes risk_history_latest's key
+    conn.execute("DROP TABLE IF EXISTS temp.risk_snapshot")
+    conn.execute("CREATE TEMP TABLE risk_snapshot (student_id TEXT, risk_score REAL, risk_level INTEGER)")
+    conn.executemany("INSERT INTO temp.risk_snapshot VALUES (?, ?, ?)", rows)
+
+    changed = '''
+        FROM temp.risk_snapshot s LEFT JOIN risk_history_latest l ON l.student_id = s.student_id
+        WHERE l.student_id IS NULL OR l.risk_score IS NOT s.risk_score OR l.risk_level IS NOT s.risk_level
+    '''
+    cursor = conn.execute(f'''
+        INSERT INTO risk_history (student_id, recorded_at, risk_score, risk_level, source)
+        SELECT s.student_id, ?, s.risk_score, s.risk_level, ? {changed}
+    ''', (recorded_at, source))
+    appended = cursor.rowcount
+    conn.execute(f'''
+        INSERT OR REPLACE INTO risk_history_latest (student_id, recorded_at, risk_score, risk_level)
+        SELECT s.student_id, ?, s.risk_score, s.risk_level {changed}
+    ''', (recorded_at,))
+
+    if complete:
+        removed = '''
+            FROM risk_history_latest l
+            WHERE l.risk_level IS NOT ? AND l.student_id NOT IN (SELECT student_id FROM temp.risk_snapshot)
+        '''
+        cursor = conn.execute(f'''
+            INSERT INTO risk_history (student_id, recorded_at, risk_score, risk_level, source)
+            SELECT l.student_id, ?, NULL, ?, ? {removed}
+        ''', (recorded_at, REMOVED, source, REMOVED))
+        appended += cursor.rowcount
+        conn.execute(f'''
+            UPDATE risk_history_latest SET recorded_at = ?, risk_score = NULL, risk_level = ?
+            WHERE student_id IN (SELECT l.student_id {removed})
+        ''', (recorded_at, REMOVED, REMOVED))
+    conn.execute("DROP TABLE temp.risk_snapshot")
+    return appended
+
+
+def ensure_baseline(conn: sqlite3.Connection) -> int:
+    """Seed an empty history from the stored students (source 'baseline').
+
+    Called before stored results are overwritten in place, so the first
+    change to a tenant that predates risk_history still has a before value.
+    """
+    init_history_tables(conn)
+    if conn.execute("SELECT 1 FROM risk_history_latest LIMIT 1").fetchone() is not None:
+        return 0
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+    if not {'student_id', 'risk_score', 'risk_level'} <= columns:
+        return 0
+    students = pd.read_sql_query("SELECT student_id, risk_score, risk_level FROM students", conn)
+    return record_snapshot(conn, students, source='baseline')
+
+
+def _has_history(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'risk_history'"
+    ).fetchone() is not None
+
+
+def _timestamp(recorded_at: int) -> str:
+    return datetime.fromtimestamp(recorded_at / 1000, timezone.utc).isoformat()
+
+
+def _level_name(level: Optional[int]) -> Optional[str]:
+    if level is None:
+        return None
+    return REMOVED_LEVEL if level == REMOVED else LEVELS[level]
+
+
+def student_trajectory(db_path: str, student_id: str) -> List[Dict]:
+    """Every recorded change of one student's risk, oldest first"""
+    if not os.path.exists(db_path):
+        return []
+    with sqlite3.connect(db_path) as conn:
+        if not _has_history(conn):
+            return []
+        rows = conn.execute('''
+            SELECT recorded_at, risk_score, risk_level, source FROM risk_history
+            WHERE student_id = ? ORDER BY recorded_at
+        ''', (student_id,)).fetchall()
+    return [{
+        'recorded_at': _timestamp(recorded_at),
+        'risk_score': score,
+        'risk_level': _level_name(level),
+        'source': source
+    } for recorded_at, score, level, source in rows]
+
+
+def daily_trend(db_path: str, days: Optional[int] = None) -> List[Dict]:
+    """Risk level distribution at the end of each day with changes.
+
+    Each history row moves a student from the previous row's level to its
+    own. Summing those moves per day and accumulating gives the
+    distribution as of each day. A REMOVED row only takes the student out
+    of their previous level, so removed students are no longer counted.
+    """
+    if not os.path.exists(db_path):
+        return []
+    with sqlite3.connect(db_path) as conn:
+        if not _has_history(conn):
+            return []
+        moves = ', '.join(
+            f"TOTAL(risk_level = {code}) - TOTAL(previous_level = {code})" for code in range(len(LEVELS))
+        )
+        rows = conn.execute(f'''
+            WITH changes AS (
+                SELECT date(recorded_at / 1000, 'unixepoch') AS day, risk_level,
+                       LAG(risk_level) OVER (PARTITION BY student_id ORDER BY recorded_at) AS previous_level
+                FROM risk_history
+            )
+            SELECT day, COUNT(*), {moves} FROM changes GROUP BY day ORDER BY day
+        ''').fetchall()
+
+    trend = []
+    distribution = np.zeros(len(LEVELS), dtype=np.int64)
+    for day, changed, *moves in rows:
+        distribution += np.array(moves).astype(np.int64)
+        point = {'date': day, 'changed_students': changed, 'total_students': int(distribution.sum())}
+        point.update({level: int(count) for level, count in zip(LEVELS, distribution)})
+        trend.append(point)
+    return trend[-days:] if days else trend
+
+
+def combine_trends(trends: List[List[Dict]]) -> List[Dict]:
+    """Sum per-college daily trends into one curve, carrying each college's last day forward"""
+    days = sorted({point['date'] for trend in trends for point in trend})
+    combined = []
+    positions = [0] * len(trends)
+    latest: List[Optional[Dict]] = [None] * len(trends)
+    for day in days:
+        point = {'date': day, 'changed_students': 0, 'total_students': 0, **{level: 0 for level in LEVELS}}
+        for i, trend in enumerate(trends):
+            if positions[i] < len(trend) and trend[positions[i]]['date'] == day:
+                latest[i] = trend[positions[i]]
+                point['changed_students'] += latest[i]['changed_students']
+                positions[i] += 1
+            if latest[i] is not None:
+                point['total_students'] += latest[i]['total_students']
+                for level in LEVELS:
+                    point[level] += latest[i][level]
+        combined.append(point)
+    return combined
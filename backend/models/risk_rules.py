@@ -0,0 +1,562 @@
+"""Data-driven risk rules.
+
+A profile describes a scorer as data: per-component inputs, level
+thresholds, scores and additive factors, the component weights and the
+overall level cut-offs. compile_profile() turns a profile into a scalar
+evaluator for single students and a vectorized evaluator for DataFrames;
+both give bit-identical results.
+
+Levels are coded 0=Low, 1=Medium, 2=High, 3=Critical (index into LEVELS).
+"""
+import copy
+import os
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+LEVELS = ['Low', 'Medium', 'High', 'Critical']
+RISK_LEVELS = np.array(LEVELS, dtype=object)
+
+
+def _fee_due_ratio(student: Dict) -> Tuple[Any, bool]:
+    fees_due = student.get('fees_due', 0)
+    total_fees = student.get('total_fees', 50000)
+    return (fees_due / total_fees if total_fees > 0 else 0), False
+
+
+def _fee_due_ratio_frame(df) -> Tuple[np.ndarray, np.ndarray]:
+    fees_due = column(df, 'fees_due', 0)
+    total_fees = column(df, 'total_fees', 50000)
+    return np.where(total_fees > 0, fees_due / total_fees, 0), np.zeros(len(df), dtype=bool)
+
+
+def _unpaid_fee_percent(student: Dict) -> Tuple[Any, bool]:
+    fees_paid = student.get('fees_paid', 0)
+    total_fees = student.get('total_fees', 1)
+    if total_fees <= 0:
+        return None, True
+    return 100 - (fees_paid / total_fees) * 100, False
+
+
+def _unpaid_fee_percent_frame(df) -> Tuple[np.ndarray, np.ndarray]:
+    fees_paid = column(df, 'fees_paid', 0)
+    total_fees = column(df, 'total_fees', 1)
+    return 100 - (fees_paid / total_fees) * 100, total_fees <= 0
+
+
+# Inputs computed from several fields: name -> (scalar, vectorized); each
+# returns (value, undefined) where undefined rows take the rule's 'undefined' outcome
+DERIVED_INPUTS = {
+    'fee_due_ratio': (_fee_due_ratio, _fee_due_ratio_frame),
+    'unpaid_fee_percent': (_unpaid_fee_percent, _unpaid_fee_percent_frame),
+}
+
+# Numeric fields each derived input reads
+DERIVED_INPUT_FIELDS = {
+    'fee_due_ratio': ('fees_due', 'total_fees'),
+    'unpaid_fee_percent': ('fees_paid', 'total_fees'),
+}
+
+PROFILES = {
+    # RiskEngine.calculate_risk_score: five banded components
+    'standard': {
+        'thresholds': {
+            'attendance': {'critical': 45, 'high': 60, 'medium': 75},
+            'academic': {'critical': 40, 'high': 55, 'medium': 70},
+            'income': {'critical': 100000, 'high': 200000, 'medium': 300000},
+            'fees': {'critical': 0.7, 'high': 0.4, 'medium': 0.2},  # Fee due ratio
+            'distance': {'high': 30, 'medium': 15}
+        },
+        'weights': {
+            'attendance': 0.30,
+            'academic': 0.25,
+            'financial': 0.15,
+            'fees': 0.20,
+            'socioeconomic': 0.10
+        },
+        'components': [
+            {'name': 'attendance', 'kind': 'banded', 'input': 'attendance_percentage', 'default': 100,
+             'thresholds': 'attendance', 'direction': 'below', 'scores': [10, 40, 70, 90]},
+            {'name': 'academic', 'kind': 'banded', 'input': 'marks', 'default': 100,
+             'thresholds': 'academic', 'direction': 'below', 'scores': [5, 35, 65, 85]},
+            {'name': 'financial', 'kind': 'banded', 'input': 'family_income', 'default': 500000,
+             'thresholds': 'income', 'direction': 'below', 'scores': [5, 25, 50, 70]},
+            {'name': 'fees', 'kind': 'banded', 'input': 'fee_due_ratio',
+             'thresholds': 'fees', 'direction': 'above', 'scores': [5, 30, 60, 85],
+             'escalate': {'field': 'payment_status', 'default': 'Paid', 'levels': {'Pending': 3, 'Partial': 2}}},
+            {'name': 'socioeconomic', 'kind': 'additive',
+             'levels': {'critical': 60, 'high': 35, 'medium': 15},
+             'factors': [
+                 {'name': 'No internet access', 'field': 'internet_access', 'default': 'Yes', 'equals': 'No',
+                  'points': 20},
+                 {'name': 'Irregular electricity', 'field': 'electricity', 'default': 'Regular',
+                  'equals': 'Irregular', 'points': 15},
+                 {'field': 'distance_from_college', 'default': 0, 'thresholds': 'distance', 'direction': 'above',
+                  'tiers': [
+                      {'name': 'Long commute', 'cut': 'high', 'points': 25, 'label': '{name}: {value}km'},
+                      {'name': 'Moderate commute', 'cut': 'medium', 'points': 15, 'label': '{name}: {value}km'}
+                  ]},
+                 {'field': 'family_size', 'default': 4, 'direction': 'above',
+                  'tiers': [{'name': 'Large family', 'cut': 7, 'points': 15}]},
+                 {'name': 'Rural background', 'field': 'region', 'default': 'Urban', 'equals': 'Rural',
+                  'points': 10}
+             ]}
+        ],
+        'overall': {'levels': {'critical': 70, 'high': 50, 'medium': 30}, 'round': 2}
+    },
+    # EnhancedRiskEngine.calculate_comprehensive_risk: four components, fee share unpaid
+    'enhanced': {
+        'thresholds': {
+            'attendance': {'critical': 45, 'high': 60, 'medium': 75},
+            'academic': {'critical': 40, 'high': 55, 'medium': 70},
+            'financial': {'critical': 80, 'high': 60, 'medium': 40},  # % of fees unpaid
+            'engagement': {'critical': 30, 'high': 50, 'medium': 70}
+        },
+        'weights': {
+            'attendance': 0.35,
+            'academic': 0.30,
+            'financial': 0.20,
+            'engagement': 0.15
+        },
+        'components': [
+            {'name': 'attendance', 'kind': 'banded', 'input': 'attendance_percentage', 'default': 100,
+             'thresholds': 'attendance', 'direction': 'below', 'scores': [10, 40, 70, 90]},
+            {'name': 'academic', 'kind': 'banded', 'input': 'marks', 'default': 100,
+             'thresholds': 'academic', 'direction': 'below', 'scores': [5, 35, 65, 85]},
+            {'name': 'financial', 'kind': 'banded', 'input': 'unpaid_fee_percent',
+             'thresholds': 'financial', 'direction': 'above', 'scores': [5, 30, 60, 80],
+             'undefined': {'score': 0, 'level': 0}},
+            {'name': 'engagement', 'kind': 'additive', 'cap': 100,
+             'levels': {'critical': 60, 'high': 40, 'medium': 20},
+             'factors': [
+                 {'field': 'family_income', 'default': 300000, 'direction': 'below',
+                  'tiers': [{'name': 'Low family income', 'cut': 100000, 'points': 30},
+                            {'name': 'Below average family income', 'cut': 200000, 'points': 15}]},
+                 {'field': 'distance_from_college', 'default': 10, 'direction': 'above',
+                  'tiers': [{'name': 'Long commute distance', 'cut': 50, 'points': 25},
+                            {'name': 'Moderate commute distance', 'cut': 25, 'points': 10}]},
+                 {'name': 'Irregular electricity', 'field': 'electricity', 'equals': 'Irregular', 'points': 15},
+                 {'name': 'No internet access', 'field': 'internet_access', 'equals': 'No', 'points': 20},
+                 {'name': 'Rural background', 'field': 'region', 'equals': 'Rural', 'points': 10}
+             ]}
+        ],
+        'overall': {'levels': {'critical': 75, 'high': 55, 'medium': 35}, 'round': 2}
+    },
+    # 3-file upload (attendance, marks, fees): linear in attendance and marks
+    'multi_factor': {
+        'thresholds': {},
+        'weights': {
+            'attendance': 0.4,
+            'academic': 0.35,
+            'fees': 1.0
+        },
+        'components': [
+            {'name': 'attendance', 'kind': 'linear', 'input': 'attendance_percentage', 'default': 50, 'fill': 50,
+             'base': 100},
+            {'name': 'academic', 'kind': 'linear', 'input': 'marks', 'default': 50, 'fill': 50, 'base': 100},
+            {'name': 'fees', 'kind': 'additive',
+             'factors': [
+                 {'name': 'Fees pending', 'field': 'payment_status', 'equals': 'Pending', 'points': 25},
+                 {'field': 'fees_due', 'default': 0, 'direction': 'above',
+                  'tiers': [{'name': 'Fees due over 20000', 'cut': 20000, 'points': 15}]},
+                 {'field': 'fees_due', 'default': 0, 'direction': 'above',
+                  'tiers': [{'name': 'Fees due over 30000', 'cut': 30000, 'points': 10}]}
+             ]}
+        ],
+        'overall': {'levels': {'critical': 80, 'high': 65, 'medium': 45}, 'clip': [0, 100]}
+    }
+}
+
+
+def column(df, field: str, default, numeric: bool = True, fill=None) -> np.ndarray:
+    """Column as an array, or the scalar path's default when the column is absent"""
+    if field not in df.columns:
+        values = np.full(len(df), default, dtype=float if numeric else object)
+    else:
+        values = df[field].to_numpy()
+        if numeric:
+            values = values.astype(float)
+    if fill is not None:
+        values = np.where(np.isnan(values), fill, values)
+    return values
+
+
+def round_scores(scores: np.ndarray, digits: int) -> np.ndarray:
+    """Python round(x, digits) per element; scores take few distinct values so round those only"""
+    unique_scores, inverse = np.unique(scores, return_inverse=True)
+    rounded = np.array([round(float(score), digits) for score in unique_scores], dtype=float)
+    return rounded[inverse.reshape(-1)]
+
+
+def _cuts(levels: Dict) -> Tuple:
+    return levels['critical'], levels['high'], levels['medium']
+
+
+def _scalar_reader(spec: Dict) -> Callable[[Dict], Tuple[Any, bool]]:
+    """Reads a rule input from one student: (value, undefined)"""
+    name = spec['input']
+    if name in DERIVED_INPUTS:
+        return DERIVED_INPUTS[name][0]
+    default = spec.get('default')
+    fill = spec.get('fill')
+
+    if fill is None:
+        return lambda student: (student.get(name, default), False)
+
+    def read(student):
+        value = student.get(name, default)
+        if value is None or value != value:
+            value = fill
+        return value, False
+    return read
+
+
+def _frame_reader(spec: Dict) -> Callable:
+    name = spec['input']
+    if name in DERIVED_INPUTS:
+        return DERIVED_INPUTS[name][1]
+    default = spec.get('default')
+    fill = spec.get('fill')
+    return lambda df: (column(df, name, default, fill=fill), np.zeros(len(df), dtype=bool))
+
+
+def _level_codes(values: np.ndarray, critical, high, medium, below: bool) -> np.ndarray:
+    if below:
+        conditions = [values < critical, values < high, values < medium]
+    else:
+        conditions = [values > critical, values > high, values > medium]
+    return np.select(conditions, [3, 2, 1], 0)
+
+
+def _plain_band(field: str, default, cuts: Tuple, below: bool, scores: Tuple) -> Callable:
+    """Scalar evaluate() of a banded rule on one field, without escalations"""
+    critical, high, medium = cuts
+    low_score, medium_score, high_score, critical_score = scores
+
+    if below:
+        def evaluate(student):
+            value = student.get(field, default)
+            if value < critical:
+                return critical_score, 3, value, ()
+            if value < high:
+                return high_score, 2, value, ()
+            if value < medium:
+                return medium_score, 1, value, ()
+            return low_score, 0, value, ()
+        return evaluate
+
+    def evaluate(student):
+        value = student.get(field, default)
+        if value > critical:
+            return critical_score, 3, value, ()
+        if value > high:
+            return high_score, 2, value, ()
+        if value > medium:
+            return medium_score, 1, value, ()
+        return low_score, 0, value, ()
+    return evaluate
+
+
+class CompiledRule:
+    """One component compiled for scalar and vectorized evaluation.
+
+    evaluate(student) returns (score, level code or None, input value,
+    factor labels; read-only); evaluate_frame(df) returns arrays {'score',
+    'level', 'value', 'factors'} where factors maps each factor name to a
+    boolean mask. numeric_fields lists the student fields the rule compares
+    as numbers.
+    """
+
+    def __init__(self, name: str, evaluate: Callable, evaluate_frame: Callable, numeric_fields=()):
+        self.name = name
+        self.evaluate = evaluate
+        self.evaluate_frame = evaluate_frame
+        self.numeric_fields = tuple(numeric_fields)
+
+
+def _compile_banded(spec: Dict, thresholds: Dict) -> CompiledRule:
+    critical, high, medium = _cuts(thresholds[spec['thresholds']])
+    below = spec['direction'] == 'below'
+    scores = tuple(spec['scores'])
+    score_array = np.array(scores)
+    read = _scalar_reader(spec)
+    read_frame = _frame_reader(spec)
+    undefined = spec.get('undefined')
+    escalate = spec.get('escalate')
+    escalations = tuple(escalate['levels'].items()) if escalate else ()
+    status_field, status_default = (escalate['field'], escalate['default']) if escalate else (None, None)
+    field, default = spec['input'], spec.get('default')
+    # Plain field inputs are read inline rather than through the reader
+    plain = field not in DERIVED_INPUTS and spec.get('fill') is None
+
+    def evaluate(student):
+        if plain:
+            value = student.get(field, default)
+        else:
+            value, is_undefined = read(student)
+            if is_undefined:
+                return undefined['score'], undefined['level'], value, ()
+        if below:
+            level = 3 if value < critical else 2 if value < high else 1 if value < medium else 0
+        else:
+            level = 3 if value > critical else 2 if value > high else 1 if value > medium else 0
+        if escalations:
+            status = student.get(status_field, status_default)
+            for match, escalated in escalations:
+                if status == match and escalated > level:
+                    level = escalated
+        return scores[level], level, value, ()
+
+    if plain and not escalations:
+        # The common case, without the checks above
+        evaluate = _plain_band(field, default, (critical, high, medium), below, scores)
+
+    def evaluate_frame(df):
+        values, is_undefined = read_frame(df)
+        level = _level_codes(values, critical, high, medium, below)
+        if escalate is not None:
+            status = column(df, status_field, status_default, numeric=False)
+            for match, escalated in escalations:
+                level = np.where(status == match, np.maximum(level, escalated), level)
+        score = score_array[level]
+        if undefined is not None:
+            score = np.where(is_undefined, undefined['score'], score)
+            level = np.where(is_undefined, undefined['level'], level)
+        return {'score': score, 'level': level, 'factors': {}, 'value': values, 'undefined': is_undefined}
+
+    return CompiledRule(spec['name'], evaluate, evaluate_frame, DERIVED_INPUT_FIELDS.get(field, (field,)))
+
+
+def _compile_factor(factor: Dict, thresholds: Dict):
+    """A factor as (scalar plan entry, frame fn -> (points, {name: mask})).
+
+    Plan entries are (field, default, tiers, match, points, name); tiers is
+    None for equality factors, else the (name, cut, points, label) tiers
+    and match holds the direction (True for 'below').
+    """
+    field = factor['field']
+    default = factor.get('default')
+
+    if 'equals' in factor:
+        name, match, points = factor['name'], factor['equals'], factor['points']
+
+        def evaluate_frame(df):
+            mask = column(df, field, default, numeric=False) == match
+            return np.where(mask, points, 0), {name: mask}
+
+        return (field, default, None, match, points, name), evaluate_frame
+
+    below = factor['direction'] == 'below'
+    group = thresholds.get(factor.get('thresholds'), {})
+    tiers = tuple((tier['name'], group[tier['cut']] if isinstance(tier['cut'], str) else tier['cut'],
+                   tier['points'], tier.get('label')) for tier in factor['tiers'])
+
+    def evaluate_frame(df):
+        values = column(df, field, default)
+        hits = [(values < cut) if below else (values > cut) for _, cut, _, _ in tiers]
+        masks, taken = {}, np.zeros(len(df), dtype=bool)
+        for (name, _, _, _), hit in zip(tiers, hits):
+            masks[name] = hit & ~taken
+            taken = taken | hit
+        return np.select(hits, [points for _, _, points, _ in tiers], 0), masks
+
+    return (field, default, tiers, below, None, None), evaluate_frame
+
+
+def _compile_additive(spec: Dict, thresholds: Dict) -> CompiledRule:
+    compiled = [_compile_factor(factor, thresholds) for factor in spec['factors']]
+    plan = tuple(entry for entry, _ in compiled)
+    frame_factors = [evaluate_frame for _, evaluate_frame in compiled]
+    levels = spec.get('levels')
+    cuts = _cuts(levels) if levels else None
+    critical, high, medium = cuts or (None, None, None)
+    cap = spec.get('cap')
+
+    def evaluate(student):
+        score = 0
+        labels = []
+        get = student.get
+        for field, default, tiers, match, points, name in plan:
+            value = get(field, default)
+            if tiers is None:
+                if value == match:
+                    score += points
+                    labels.append(name)
+                continue
+            # Threshold tiers: first matching tier wins
+            for tier_name, cut, tier_points, label in tiers:
+                if (value < cut) if match else (value > cut):
+                    score += tier_points
+                    labels.append(label.format(name=tier_name, value=value) if label else tier_name)
+                    break
+        if cap is not None:
+            score = min(score, cap)
+        if cuts is None:
+            return score, None, score, labels
+        level = 3 if score > critical else 2 if score > high else 1 if score > medium else 0
+        return score, level, score, labels
+
+    def evaluate_frame(df):
+        score = 0
+        masks = {}
+        for evaluate_factor in frame_factors:
+            points, factor_masks = evaluate_factor(df)
+            score = score + points
+            masks.update(factor_masks)
+        score = np.asarray(score)
+        if cap is not None:
+            score = np.minimum(score, cap)
+        level = _level_codes(score, *cuts, below=False) if cuts else None
+        return {'score': score, 'level': level, 'factors': masks, 'value': score}
+
+    numeric_fields = [factor['field'] for factor in spec['factors'] if 'tiers' in factor]
+    return CompiledRule(spec['name'], evaluate, evaluate_frame, numeric_fields)
+
+
+def _compile_linear(spec: Dict, thresholds: Dict) -> CompiledRule:
+    base = spec['base']
+    read = _scalar_reader(spec)
+    read_frame = _frame_reader(spec)
+
+    def evaluate(student):
+        value, _ = read(student)
+        return base - value, None, value, ()
+
+    def evaluate_frame(df):
+        values, _ = read_frame(df)
+        return {'score': base - values, 'level': None, 'factors': {}, 'value': values}
+
+    return CompiledRule(spec['name'], evaluate, evaluate_frame, (spec['input'],))
+
+
+RULE_KINDS = {
+    'banded': _compile_banded,
+    'additive': _compile_additive,
+    'linear': _compile_linear,
+}
+
+
+class CompiledProfile:
+    """A profile compiled against concrete thresholds and weights"""
+
+    def __init__(self, name: str, rules: List[CompiledRule], weights: Dict, overall: Dict):
+        self.name = name
+        self.rules = rules
+        self.weighted = [(rule, weights[rule.name]) for rule in rules]
+        self.overall_cuts = _cuts(overall['levels'])
+        self.clip = overall.get('clip')
+        self.round = overall.get('round')
+        # (name, evaluate, weight) of the first rule and of the others, for evaluate()
+        scalar = [(rule.name, rule.evaluate, weight) for rule, weight in self.weighted]
+        self._first, self._rest = scalar[0], tuple(scalar[1:])
+
+    @property
+    def components(self) -> List[str]:
+        return [rule.name for rule in self.rules]
+
+    @property
+    def numeric_fields(self) -> List[str]:
+        """Student fields compared as numbers, in first-use order"""
+        fields = []
+        for rule in self.rules:
+            fields.extend(field for field in rule.numeric_fields if field not in fields)
+        return fields
+
+    def level_code(self, composite) -> int:
+        critical, high, medium = self.overall_cuts
+        return 3 if composite >= critical else 2 if composite >= high else 1 if composite >= medium else 0
+
+    def level(self, composite) -> str:
+        return LEVELS[self.level_code(composite)]
+
+    def evaluate(self, student: Dict) -> Dict:
+        """Score one student.
+
+        Returns {'components': {name: (score, level code, value, factors)},
+        'composite_score', 'risk_level'}; the level is taken before rounding.
+        """
+        name, evaluate, weight = self._first
+        result = evaluate(student)
+        components = {name: result}
+        # Summed in rule order from the first term, as the hand-coded scorers did
+        composite = result[0] * weight
+        for name, evaluate, weight in self._rest:
+            result = components[name] = evaluate(student)
+            composite += result[0] * weight
+
+        if self.clip is not None:
+            low, high = self.clip
+            composite = float(low) if composite < low else float(high) if composite > high else composite
+        critical, high, medium = self.overall_cuts
+        level = 3 if composite >= critical else 2 if composite >= high else 1 if composite >= medium else 0
+        if self.round is not None:
+            composite = round(composite, self.round)
+        return {'components': components, 'composite_score': composite, 'risk_level': LEVELS[level]}
+
+    def evaluate_frame(self, df) -> Dict:
+        """Score every row of df.
+
+        Returns {'components': {name: {'score', 'level', 'factors', 'value'}},
+        'composite_score', 'risk_level' (codes)}, matching evaluate() exactly.
+        """
+        components = {}
+        composite = None
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for rule, weight in self.weighted:
+                result = rule.evaluate_frame(df)
+                components[rule.name] = result
+                term = result['score'] * weight
+                composite = term if composite is None else composite + term
+
+        composite = np.asarray(composite, dtype=float)
+        if self.clip is not None:
+            composite = np.clip(composite, *self.clip)
+        critical, high, medium = self.overall_cuts
+        level = np.select([composite >= critical, composite >= high, composite >= medium], [3, 2, 1], 0)
+        if self.round is not None:
+            composite = round_scores(composite, self.round)
+        return {'components': components, 'composite_score': composite, 'risk_level': level}
+
+
+def compile_profile(profile, thresholds: Optional[Dict] = None, weights: Optional[Dict] = None) -> CompiledProfile:
+    """Compile a profile (name or spec dict), optionally with overridden thresholds/weights"""
+    spec = PROFILES[profile] if isinstance(profile, str) else profile
+    thresholds = thresholds if thresholds is not None else spec['thresholds']
+    weights = weights if weights is not None else spec['weights']
+    rules = [RULE_KINDS[component['kind']](component, thresholds) for component in spec['components']]
+    return CompiledProfile(spec.get('name', profile if isinstance(profile, str) else 'custom'), rules, weights,
+                           spec['overall'])
+
+
+def profile_defaults(profile: str) -> Tuple[Dict, Dict]:
+    """Independent copies of a profile's thresholds and weights"""
+    spec = PROFILES[profile]
+    return copy.deepcopy(spec['thresholds']), dict(spec['weights'])
+
+
+def load_overrides(db_path: str) -> Dict[str, Dict]:
+    """Threshold and weight overrides from a database's risk_thresholds table.
+
+    Rows are (component, threshold_type, value); threshold_type 'weight'
+    sets a component weight, anything else a threshold. Later rows win.
+    """
+    overrides = {'thresholds': {}, 'weights': {}}
+    if not os.path.exists(db_path):
+        return overrides
+
+    try:
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT component, threshold_type, value FROM risk_thresholds ORDER BY updated_at, id"
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Could not load risk threshold overrides: {e}")
+        return overrides
+
+    for component, threshold_type, value in rows:
+        if threshold_type == 'weight':
+            overrides['weights'][component] = value
+        else:
+            overrides['thresholds'].setdefault(component, {})[threshold_type] = value
+    return overrides
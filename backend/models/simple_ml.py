@@ -1,43 +1,36 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import joblib
 import os
 
+from models.tree_compiler import COMPILED_MAX_ROWS, compile_model
+
+# scikit-learn and joblib are imported on first use, as in ml_models
+
+RISK_LABELS = ['Low', 'Medium', 'High', 'Critical']
+# Model inputs in column order, with the value used when a column is missing
+FEATURE_DEFAULTS = {'attendance_percentage': 75, 'marks': 70, 'fees_due': 10000}
+
 class SimpleMLModel:
     def __init__(self):
         self.model = None
         self.model_path = "dropout_model.pkl"
+        self._compiled = None  # self.model as a CompiledForest, built on first small prediction
         
-    def create_sample_data(self):
+    def create_sample_data(self, n_samples: int = 1000):
         """Create sample training data"""
         np.random.seed(42)
-        n_samples = 1000
         
         # Generate features
         attendance = np.random.normal(75, 15, n_samples)
         marks = np.random.normal(70, 20, n_samples)
         fees_due = np.random.exponential(15000, n_samples)
         
-        # Create target based on logical rules
-        dropout_risk = []
-        for i in range(n_samples):
-            score = 0
-            if attendance[i] < 60: score += 2
-            elif attendance[i] < 75: score += 1
-            
-            if marks[i] < 50: score += 2
-            elif marks[i] < 65: score += 1
-            
-            if fees_due[i] > 25000: score += 2
-            elif fees_due[i] > 15000: score += 1
-            
-            # 0=Low, 1=Medium, 2=High, 3=Critical
-            if score >= 5: dropout_risk.append(3)
-            elif score >= 3: dropout_risk.append(2)
-            elif score >= 1: dropout_risk.append(1)
-            else: dropout_risk.append(0)
+        # Points per factor: below 60/50 -> 2, below 75/65 -> 1; fees above 25000 -> 2, above 15000 -> 1
+        score = (2 - np.digitize(attendance, [60, 75])) + (2 - np.digitize(marks, [50, 65])) \
+            + np.digitize(fees_due, [15000, 25000], right=True)
+        
+        # 0=Low (score 0), 1=Medium (1-2), 2=High (3-4), 3=Critical (5+)
+        dropout_risk = np.digitize(score, [1, 3, 5])
         
         return pd.DataFrame({
             'attendance_percentage': attendance,
@@ -47,7 +40,10 @@ class SimpleMLModel:
         })
     
     def train_model(self):
-        """Train the ML model"""
+        """Train the ML model (offline: run this module directly)"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        import joblib
         print("Training ML model...")
         
         # Create sample data
@@ -63,6 +59,7 @@ class SimpleMLModel:
         # Train model
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.model.fit(X_train, y_train)
+        self._compiled = None
         
         # Calculate accuracy
         accuracy = self.model.score(X_test, y_test)
@@ -77,29 +74,39 @@ class SimpleMLModel:
     def load_model(self):
         """Load existing model"""
         if os.path.exists(self.model_path):
-            self.model = joblib.load(self.model_path)
+            import joblib
+            self.model = joblib.load(self.model_path, mmap_mode='r')
+            self._compiled = None
             print("Model loaded successfully")
             return True
         return False
     
+    def _require_model(self):
+        """Predictions never train; the model must have been trained offline"""
+        if self.model is None and not self.load_model():
+            raise ValueError(f"Model not trained yet! Run 'python -m models.simple_ml' to create {self.model_path}")
+    
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """predict_proba through the compiled forest for small inputs (same numbers as sklearn)"""
+        if len(features) > COMPILED_MAX_ROWS:
+            return self.model.predict_proba(features)
+        if self._compiled is None:
+            self._compiled = compile_model(self.model)
+        return self._compiled.predict_proba(features)
+    
     def predict_risk(self, attendance, marks, fees_due):
         """Predict dropout risk"""
-        if self.model is None:
-            if not self.load_model():
-                self.train_model()
+        self._require_model()
         
         # Prepare input
         features = np.array([[attendance, marks, fees_due]])
         
-        # Predict
-        risk_level = self.model.predict(features)[0]
-        risk_probability = self.model.predict_proba(features)[0]
-        
-        # Convert to readable format
-        risk_labels = ['Low', 'Medium', 'High', 'Critical']
+        # Predict; predict() is the argmax over classes_
+        risk_probability = self._predict_proba(features)[0]
+        risk_level = self.model.classes_[risk_probability.argmax()]
         
         return {
-            'risk_level': risk_labels[risk_level],
+            'risk_level': RISK_LABELS[risk_level],
             'risk_score': float(risk_probability[risk_level] * 100),
             'probabilities': {
                 'Low': float(risk_probability[0] * 100),
@@ -111,24 +118,29 @@ class SimpleMLModel:
     
     def batch_predict(self, students_df):
         """Predict risk for multiple students"""
-        if self.model is None:
-            if not self.load_model():
-                self.train_model()
-        
-        results = []
-        for _, student in students_df.iterrows():
-            attendance = student.get('attendance_percentage', 75)
-            marks = student.get('marks', 70)
-            fees_due = student.get('fees_due', 10000)
-            
-            prediction = self.predict_risk(attendance, marks, fees_due)
-            results.append({
-                'student_id': student.get('student_id', ''),
-                'risk_level': prediction['risk_level'],
-                'risk_score': prediction['risk_score']
-            })
-        
-        return results
+        self._require_model()
+        
+        # Columns the frame lacks fall back to FEATURE_DEFAULTS
+        features = np.column_stack([
+            students_df[col].to_numpy(dtype=float) if col in students_df.columns else np.full(len(students_df), default)
+            for col, default in FEATURE_DEFAULTS.items()
+        ])
+        
+        # One predict_proba for the batch; predict() is the argmax over classes_
+        probabilities = self._predict_proba(features)
+        best = probabilities.argmax(axis=1)
+        levels = np.asarray(RISK_LABELS, dtype=object)[self.model.classes_[best]]
+        scores = probabilities[np.arange(len(best)), best] * 100
+        
+        if 'student_id' in students_df.columns:
+            student_ids = students_df['student_id'].tolist()
+        else:
+            student_ids = [''] * len(students_df)
+        
+        return [
+            {'student_id': student_id, 'risk_level': level, 'risk_score': float(score)}
+            for student_id, level, score in zip(student_ids, levels, scores)
+        ]
 
 # Global instance
 ml_model = SimpleMLModel()
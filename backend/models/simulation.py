@@ -0,0 +1,216 @@
+"""What-if simulation: rescore a cohort in memory under perturbed inputs.
+
+A perturbation changes one scoring input for the students matching its
+conditions, e.g. attendance +10 points for everyone, or fees_due set to 0
+where family_income < 100000. The cohort is scored with the batch engine
+before and after, and the result is the two risk distributions plus the
+level transition matrix. Nothing is written back.
+
+    {'field': 'attendance_percentage', 'op': 'add', 'value': 10}
+    {'field': 'fees_due', 'op': 'set', 'value': 0,
+     'where': [{'field': 'family_income', 'op': '<', 'value': 100000}]}
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.risk_engine import SCORING_INPUTS, RiskEngine
+from models.risk_rules import LEVELS
+
+# Inputs a perturbation may change, with the range results are clipped to
+NUMERIC_FIELDS = {
+    'attendance_percentage': (0, 100),
+    'marks': (0, 100),
+    'family_income': (0, None),
+    'total_fees': (0, None),
+    'fees_due': (0, None),
+    'fees_paid': (0, None),
+    'distance_from_college': (0, None),
+    'family_size': (1, None),
+}
+CATEGORICAL_FIELDS = {
+    'payment_status': ('Paid', 'Partial', 'Pending'),
+    'internet_access': ('Yes', 'No'),
+    'electricity': ('Regular', 'Irregular'),
+    'region': ('Urban', 'Rural'),
+}
+
+# Value the engine scores a student with when the cohort lacks the column
+SCORING_DEFAULTS = dict(SCORING_INPUTS)
+
+# Columns loaded for a simulation: scoring inputs plus fields conditions can filter on
+COHORT_COLUMNS = list(dict.fromkeys([field for field, _ in SCORING_INPUTS] + list(NUMERIC_FIELDS)
+                                    + ['department', 'semester']))
+
+OPERATIONS = ('add', 'multiply', 'set')
+COMPARISONS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    '==': np.equal, '!=': np.not_equal,
+}
+
+# Tenant cohorts kept in memory, least recently simulated evicted first
+MAX_CACHED_COHORTS = 4
+
+_cohorts: 'OrderedDict[str, Tuple[Tuple, pd.DataFrame]]' = OrderedDict()
+_cohorts_lock = threading.Lock()
+
+
+def load_cohort(db_path: str) -> pd.DataFrame:
+    """Scoring inputs of every student in a tenant database.
+
+    Cached per database file until the file changes, so repeated
+    simulations on the same tenant skip the read. Only the
+    MAX_CACHED_COHORTS most recently used tenants are kept.
+    """
+    stat = os.stat(db_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cohorts_lock:
+        cached = _cohorts.get(db_path)
+        if cached and cached[0] == key:
+            _cohorts.move_to_end(db_path)
+            return cached[1]
+
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+        columns = [c for c in COHORT_COLUMNS if c in existing]
+        df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM students", conn) if columns else pd.DataFrame()
+
+    with _cohorts_lock:
+        _cohorts[db_path] = (key, df)
+        _cohorts.move_to_end(db_path)
+        while len(_cohorts) > MAX_CACHED_COHORTS:
+            _cohorts.popitem(last=False)
+    return df
+
+
+def validate_perturbations(perturbations: List[Dict]) -> List[str]:
+    """Problems with a perturbation list, empty when it can be applied"""
+    errors = []
+    for i, p in enumerate(perturbations):
+        field, op, value = p.get('field'), p.get('op', 'add'), p.get('value')
+        if op not in OPERATIONS:
+            errors.append(f"perturbations[{i}]: unknown op '{op}'")
+        elif field in NUMERIC_FIELDS:
+            if not isinstance(value, (int, float)):
+                errors.append(f"perturbations[{i}]: {field} needs a numeric value")
+        elif field in CATEGORICAL_FIELDS:
+            if op != 'set' or value not in CATEGORICAL_FIELDS[field]:
+                errors.append(f"perturbations[{i}]: {field} can only be set to one of "
+                              f"{', '.join(CATEGORICAL_FIELDS[field])}")
+        else:
+            errors.append(f"perturbations[{i}]: '{field}' cannot be changed")
+
+        for j, condition in enumerate(p.get('where') or []):
+            if condition.get('field') not in COHORT_COLUMNS:
+                errors.append(f"perturbations[{i}].where[{j}]: unknown field '{condition.get('field')}'")
+            elif condition.get('op', '==') not in COMPARISONS:
+                errors.append(f"perturbations[{i}].where[{j}]: unknown comparison '{condition.get('op')}'")
+            elif condition.get('op', '==') not in ('==', '!=') and not isinstance(condition.get('value'), (int, float)):
+                errors.append(f"perturbations[{i}].where[{j}]: '{condition.get('op')}' needs a numeric value")
+    return errors
+
+
+def _condition_mask(df: pd.DataFrame, conditions: List[Dict]) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for condition in conditions:
+        field, op, value = condition['field'], condition.get('op', '=='), condition.get('value')
+        if field not in df.columns:
+            # Absent column: nothing matches, except "!=" which everything does
+            mask &= op == '!='
+            continue
+        column = df[field]
+        if op in ('==', '!='):
+            matched = (column == value).to_numpy(dtype=bool)
+            mask &= matched if op == '==' else ~matched
+        else:
+            values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+            mask &= COMPARISONS[op](values, value)
+    return mask
+
+
+def apply_perturbations(df: pd.DataFrame, perturbations: List[Dict]) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Perturbed copy of df and the mask of rows any perturbation touched.
+
+    Perturbations apply in order; conditions are evaluated against the
+    values as left by the previous perturbations. A field the cohort lacks
+    starts from SCORING_DEFAULTS (what the engine scored it as). Rows an
+    add or multiply leaves without a value (missing, no default) are not
+    counted as touched.
+    """
+    perturbed = df.copy()
+    affected = np.zeros(len(df), dtype=bool)
+    for p in perturbations:
+        field, op, value = p['field'], p.get('op', 'add'), p['value']
+        mask = _condition_mask(perturbed, p.get('where') or [])
+        if not mask.any():
+            continue
+
+        if field not in perturbed.columns:
+            perturbed[field] = SCORING_DEFAULTS.get(field, None if field in CATEGORICAL_FIELDS else np.nan)
+        if field in CATEGORICAL_FIELDS:
+            perturbed.loc[mask, field] = value
+        else:
+            current = pd.to_numeric(perturbed[field], errors='coerce').to_numpy(dtype=float)
+            if op == 'add':
+                new = current + value
+            elif op == 'multiply':
+                new = current * value
+            else:
+                new = np.full(len(current), float(value))
+            low, high = NUMERIC_FIELDS[field]
+            new = np.clip(new, low, high)
+            mask &= ~np.isnan(new)
+            perturbed[field] = np.where(mask, new, current)
+        affected |= mask
+    return perturbed, affected
+
+
+def level_counts(codes: np.ndarray) -> Dict[str, int]:
+    counts = np.bincount(codes, minlength=len(LEVELS))
+    return {level: int(count) for level, count in zip(LEVELS, counts)}
+
+
+def simulate(engine: RiskEngine, df: pd.DataFrame, perturbations: List[Dict]) -> Dict:
+    """Before/after risk distributions and transitions for a perturbed cohort.
+
+    Both sides are scored with `engine` (not read from the stored
+    risk_level), so the comparison isolates the perturbation. Only the
+    affected rows are rescored for the "after" side.
+    """
+    start = time.perf_counter()
+    before = engine.score_arrays(df)
+    before_levels = before['risk_level'].astype(np.int64)
+    before_scores = before['composite_score']
+
+    perturbed, affected = apply_perturbations(df, perturbations)
+    after_levels = before_levels.copy()
+    after_scores = before_scores.copy()
+    if affected.any():
+        rescored = engine.score_arrays(perturbed.loc[affected])
+        after_levels[affected] = rescored['risk_level']
+        after_scores[affected] = rescored['composite_score']
+
+    n = len(LEVELS)
+    matrix = np.bincount(before_levels * n + after_levels, minlength=n * n).reshape(n, n)
+    total = len(df)
+    return {
+        'total_students': total,
+        'affected_students': int(affected.sum()),
+        'before': level_counts(before_levels),
+        'after': level_counts(after_levels),
+        # transitions[from_level][to_level] = number of students
+        'transitions': {LEVELS[i]: {LEVELS[j]: int(matrix[i, j]) for j in range(n)} for i in range(n)},
+        'improved': int((after_levels < before_levels).sum()),
+        'worsened': int((after_levels > before_levels).sum()),
+        'mean_score': {
+            'before': round(float(before_scores.mean()), 2) if total else 0.0,
+            'after': round(float(after_scores.mean()), 2) if total else 0.0,
+        },
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
@@ -0,0 +1,495 @@
+"""Background model training and the on-disk model registry.
+
+Uploads enqueue a training job instead of training inside the request.
+One worker thread per process takes jobs off the queue. A job runs in one
+of three modes, and either way the artifacts and metrics.json end up in
+model_registry/<version>/:
+
+- incremental: used when the job carries the uploaded rows and a model is
+  active. The active model grows TREES_PER_UPDATE more forest trees
+  (warm start) on the new rows plus an equal number of replayed rows from
+  the reservoir, so the cost follows the size of the upload.
+- full: retrains from scratch on every stored student (main database plus
+  tenant databases). It is used for the first model, for manual retrains,
+  and whenever an incremental update is not possible. The forest keeps
+  the settings of the active model.
+- search: a full retrain whose forest settings are first chosen by a
+  cross-validated hyperparameter search (models.model_search). Every
+  candidate's accuracy and timings are kept in the version's metrics.
+  Candidates are compared on the active model's stored features
+  (models.feature_store) when there is an active model.
+
+The reservoir (model_registry/reservoir.pkl) is a bounded uniform sample
+of every labelled row seen so far, across all colleges. It is what keeps
+incremental updates from drifting toward the latest uploads.
+
+A candidate becomes the active model by atomically replacing the
+model_registry/ACTIVE pointer. Automatically that happens only when its
+accuracy is not worse than the active model's by more than
+PROMOTION_TOLERANCE; otherwise it stays a candidate that an admin can
+promote. Jobs are recorded in government_master.db.
+"""
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.database import ensure_columns
+from models.feature_encoder import FeatureEncoder
+from models.ml_models import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, DropoutPredictor
+from models.risk_rules import LEVELS
+
+GOVERNMENT_DB = "government_master.db"
+MAIN_DB = "dte_rajasthan.db"
+REGISTRY_DIR = "model_registry"
+MIN_TRAINING_ROWS = 10
+MAX_TRAINING_ROWS = 200000
+PROMOTION_TOLERANCE = 0.02
+RESERVOIR_SIZE = 50000
+TREES_PER_UPDATE = 10
+MAX_TREES = 200
+# Replayed reservoir rows per new row in an incremental update
+REPLAY_RATIO = 1.0
+
+TRAINING_COLUMNS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES + ['risk_level']
+
+
+class ModelRegistry:
+    """Versioned model artifacts under one directory, with an ACTIVE pointer file"""
+
+    def __init__(self, directory: str = REGISTRY_DIR):
+        self.directory = directory
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.directory, version)
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "ACTIVE")) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and os.path.isdir(self.version_path(version)) else None
+
+    def metrics(self, version: str) -> Dict:
+        with open(os.path.join(self.version_path(version), "metrics.json")) as f:
+            return json.load(f)
+
+    def versions(self) -> List[Dict]:
+        """Every saved version with its metrics, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        active = self.active_version()
+        found = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.startswith('.') or not os.path.isfile(os.path.join(self.directory, name, "metrics.json")):
+                continue
+            found.append({'version': name, 'active': name == active, 'metrics': self.metrics(name)})
+        return found
+
+    def save(self, predictor: DropoutPredictor, metrics: Dict) -> str:
+        """Write a trained predictor as a new version; the directory appears complete or not at all"""
+        os.makedirs(self.directory, exist_ok=True)
+        version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        staging = os.path.join(self.directory, f".staging-{version}")
+        try:
+            predictor.save_models(staging)
+            with open(os.path.join(staging, "metrics.json"), "w") as f:
+                json.dump({**metrics, 'version': version}, f, indent=2)
+            os.replace(staging, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def promote(self, version: str):
+        """Make `version` the active model (atomic pointer swap)"""
+        if not os.path.isdir(self.version_path(version)):
+            raise ValueError(f"Unknown model version: {version}")
+        pointer = os.path.join(self.directory, "ACTIVE")
+        staging = f"{pointer}.{uuid.uuid4().hex[:6]}"
+        with open(staging, "w") as f:
+            f.write(version)
+        os.replace(staging, pointer)
+
+    def load(self, version: Optional[str] = None) -> Optional[DropoutPredictor]:
+        """Predictor for `version` (default: the active one), None when there is none"""
+        version = version or self.active_version()
+        if version is None:
+            return None
+        predictor = DropoutPredictor()
+        # Artifacts are never rewritten in place, so read-only maps are safe to share
+        predictor.load_models(self.version_path(version), mmap_mode='r')
+        predictor.version = version
+        return predictor
+
+
+class Reservoir:
+    """Uniform sample of at most `size` of all labelled rows ever added (algorithm R), persisted with joblib"""
+
+    def __init__(self, path: str, size: int = RESERVOIR_SIZE, seed: Optional[int] = None):
+        self.path = path
+        self.size = size
+        self.rows = pd.DataFrame(columns=TRAINING_COLUMNS)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path: str, size: int = RESERVOIR_SIZE) -> 'Reservoir':
+        reservoir = cls(path, size)
+        if os.path.exists(path):
+            import joblib
+            state = joblib.load(path)
+            reservoir.rows, reservoir.seen = state['rows'], state['seen']
+        return reservoir
+
+    def save(self):
+        import joblib
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        staging = f"{self.path}.{uuid.uuid4().hex[:6]}"
+        joblib.dump({'rows': self.rows, 'seen': self.seen}, staging)
+        os.replace(staging, self.path)
+
+    def add(self, df: pd.DataFrame):
+        """Offer every row of df, as if one at a time"""
+        df = df[[c for c in TRAINING_COLUMNS if c in df.columns]].reset_index(drop=True)
+        fill = min(max(self.size - len(self.rows), 0), len(df))
+        if not len(self.rows):
+            rows = df.iloc[:fill]
+        else:
+            rows = pd.concat([self.rows, df.iloc[:fill]], ignore_index=True) if fill else self.rows
+        rest = df.iloc[fill:]
+        if len(rest):
+            # Row number k (0-based, over everything ever offered) takes slot
+            # uniform(0, k) when that slot exists; a later row wins a shared slot
+            k = self.seen + fill + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (k + 1)).astype(np.int64)
+            chosen = pd.Series(np.arange(len(rest)), index=slots)[slots < self.size]
+            chosen = chosen[~chosen.index.duplicated(keep='last')]
+            kept = np.ones(len(rows), dtype=bool)
+            kept[chosen.index.to_numpy()] = False
+            # Slot order carries no meaning, so replaced rows can simply move to the end
+            rows = pd.concat([rows[kept], rest.iloc[chosen.to_numpy()]], ignore_index=True)
+        self.rows = rows
+        self.seen += len(df)
+
+    def sample(self, n: int) -> pd.DataFrame:
+        n = min(n, len(self.rows))
+        return self.rows.iloc[self.rng.choice(len(self.rows), n, replace=False)]
+
+
+def init_job_tables(government_db: str = GOVERNMENT_DB):
+    with sqlite3.connect(government_db) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS training_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT,
+                reason TEXT,
+                training_rows INTEGER,
+                model_version TEXT,
+                promoted INTEGER DEFAULT 0,
+                metrics TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        ensure_columns(conn, 'training_jobs', {'mode': 'TEXT'})
+        conn.commit()
+
+
+def _read_students(db_path: str) -> pd.DataFrame:
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+        columns = [c for c in TRAINING_COLUMNS if c in existing]
+        if 'risk_level' not in columns:
+            return pd.DataFrame()
+        return pd.read_sql_query(f"SELECT {', '.join(columns)} FROM students", conn)
+
+
+def labelled_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Training columns of the rows with a known risk level"""
+    df = df[[c for c in TRAINING_COLUMNS if c in df.columns]]
+    return df[df['risk_level'].isin(LEVELS)]
+
+
+def training_sources(main_db: str = MAIN_DB, government_db: str = GOVERNMENT_DB) -> Dict[str, str]:
+    """Tenant (and 'main') -> database path of every database students are trained on"""
+    from models.rescoring import tenant_databases
+
+    sources = dict(tenant_databases(government_db))
+    if os.path.exists(main_db):
+        sources['main'] = main_db
+    return sources
+
+
+def training_frame(main_db: str = MAIN_DB, government_db: str = GOVERNMENT_DB) -> pd.DataFrame:
+    """Labelled students from the main and tenant databases, sampled down to MAX_TRAINING_ROWS"""
+    from utils.parallel import map_tenants
+
+    sources = training_sources(main_db, government_db)
+    per_source = map_tenants(lambda name, path: _read_students(path), sources)
+    for name, error in per_source.errors.items():
+        print(f"Skipping {name} for training: {error}")
+
+    frames = [df for df in per_source.results.values() if len(df)]
+    if not frames:
+        return pd.DataFrame(columns=TRAINING_COLUMNS)
+    df = labelled_rows(pd.concat(frames, ignore_index=True))
+    if len(df) > MAX_TRAINING_ROWS:
+        df = df.sample(MAX_TRAINING_ROWS, random_state=42)
+
+    # train_models stratifies its split, which needs two students per level
+    counts = df['risk_level'].value_counts()
+    return df[df['risk_level'].isin(counts[counts >= 2].index)].reset_index(drop=True)
+
+
+class TrainingService:
+    """Job queue plus a single worker thread that trains, registers and promotes models"""
+
+    def __init__(self, registry: ModelRegistry = None, government_db: str = GOVERNMENT_DB, main_db: str = MAIN_DB,
+                 on_promote: Optional[Callable[[str], None]] = None):
+        self.registry = registry or ModelRegistry()
+        self.government_db = government_db
+        self.main_db = main_db
+        self.on_promote = on_promote
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._queued_job: Optional[str] = None
+        # job_id -> {'rows': [new rows], 'full': bool, 'search': options or None}, until the job starts
+        self._pending: Dict[str, Dict] = {}
+        self._reservoir: Optional[Reservoir] = None
+        self._worker: Optional[threading.Thread] = None
+        init_job_tables(government_db)
+
+    @property
+    def reservoir(self) -> Reservoir:
+        if self._reservoir is None:
+            self._reservoir = Reservoir.load(os.path.join(self.registry.directory, "reservoir.pkl"))
+        return self._reservoir
+
+    def submit(self, reason: str, rows: Optional[pd.DataFrame] = None, search: Optional[Dict] = None) -> str:
+        """Queue a training job; while one is still waiting, it is reused.
+
+        With `rows` (the students just uploaded) the job can update the active
+        model incrementally; without, it is a full retrain. `search` (keyword
+        arguments of model_search.search, possibly empty) makes it a search job.
+        """
+        with self._lock:
+            job_id = self._queued_job
+            if job_id is None:
+                job_id = str(uuid.uuid4())
+                with sqlite3.connect(self.government_db) as conn:
+                    conn.execute("INSERT INTO training_jobs (job_id, status, reason) VALUES (?, 'pending', ?)",
+                                 (job_id, reason))
+                    conn.commit()
+                self._pending[job_id] = {'rows': [], 'full': False, 'search': None}
+                self._queued_job = job_id
+                self._queue.put(job_id)
+            if search is not None:
+                self._pending[job_id]['search'] = search
+            if rows is None:
+                self._pending[job_id]['full'] = True
+            else:
+                self._pending[job_id]['rows'].append(labelled_rows(rows))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="model-training", daemon=True)
+                self._worker.start()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with sqlite3.connect(self.government_db) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM training_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['metrics'] = json.loads(job['metrics']) if job['metrics'] else None
+        job['promoted'] = bool(job['promoted'])
+        return job
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until every queued job has finished (scripts and benchmarks)"""
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self.run_job(job_id)
+            except Exception as e:
+                print(f"Training job {job_id[:8]} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _update(self, job_id: str, **fields):
+        finished = ", finished_at = CURRENT_TIMESTAMP" if fields.get('status') in ('completed', 'failed') else ""
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        with sqlite3.connect(self.government_db) as conn:
+            conn.execute(f"UPDATE training_jobs SET {columns}{finished} WHERE job_id = ?",
+                         list(fields.values()) + [job_id])
+            conn.commit()
+
+    def should_promote(self, metrics: Dict) -> bool:
+        active = self.registry.active_version()
+        if active is None:
+            return True
+        active_accuracy = self.registry.metrics(active).get('random_forest_accuracy', 0)
+        return metrics['random_forest_accuracy'] >= active_accuracy - PROMOTION_TOLERANCE
+
+    def replay_rows(self, new_rows: pd.DataFrame, classes) -> pd.DataFrame:
+        """Reservoir rows mixed into an update: REPLAY_RATIO per new row, plus a few of any level the upload lacks"""
+        replay = self.reservoir.sample(int(len(new_rows) * REPLAY_RATIO))
+        present = set(new_rows['risk_level']) | set(replay['risk_level'])
+        rows = self.reservoir.rows
+        for level in set(classes) - present:
+            candidates = rows[rows['risk_level'] == level]
+            replay = pd.concat([replay, candidates.head(5)])
+        return replay
+
+    def train_incremental(self, new_rows: pd.DataFrame) -> tuple:
+        """Warm-start the active model on new rows plus replayed history"""
+        base_version = self.registry.active_version()
+        predictor = self.registry.load(base_version)
+        replay = self.replay_rows(new_rows, predictor.rf_model.classes_)
+        mixture = pd.concat([new_rows, replay], ignore_index=True)
+
+        # Evaluate on a fifth of the mixture, keeping every level in the training part
+        holdout = self.reservoir.rng.random(len(mixture)) < 0.2
+        holdout &= mixture.groupby('risk_level').cumcount().to_numpy() >= 2
+        train, test = mixture[~holdout], mixture[holdout]
+        results = predictor.update_models(train, new_trees=TREES_PER_UPDATE, max_trees=MAX_TREES)
+        scores = predictor.evaluate(test if len(test) else train)
+        return predictor, {
+            **scores, **results,
+            'rf_params': self.registry.metrics(base_version).get('rf_params'),
+            'base_version': base_version,
+            'new_rows': len(new_rows),
+            'replay_rows': len(replay),
+            'training_rows': len(train)
+        }
+
+    def training_data(self) -> pd.DataFrame:
+        df = training_frame(self.main_db, self.government_db)
+        if len(df) < MIN_TRAINING_ROWS:
+            raise ValueError(f"Not enough labelled students to train ({len(df)} < {MIN_TRAINING_ROWS})")
+        return df
+
+    def train_full(self, df: Optional[pd.DataFrame] = None, rf_params: Optional[Dict] = None) -> tuple:
+        """Retrain from scratch; the forest settings default to those of the active model"""
+        df = self.training_data() if df is None else df
+        active = self.registry.active_version()
+        if rf_params is None and active is not None:
+            rf_params = self.registry.metrics(active).get('rf_params')
+        predictor = DropoutPredictor()
+        results = predictor.train_models(df, rf_params=rf_params)
+        return predictor, {**results, 'trees': len(predictor.rf_model.estimators_), 'training_rows': len(df),
+                           'class_counts': {k: int(v) for k, v in df['risk_level'].value_counts().items()}}, df
+
+    def train_search(self, options: Dict) -> tuple:
+        """Choose forest settings by cross-validated search, then retrain in full with them"""
+        from models.model_search import search
+
+        df = self.training_data()
+        stored = self.stored_features()
+        if stored is not None:
+            X, y = stored
+        else:
+            X = FeatureEncoder().fit(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES).transform(df).to_numpy(dtype=float)
+            y = df['risk_level'].to_numpy()
+        found = search(X, y, **options)
+        predictor, results, df = self.train_full(df, rf_params=found['best_params'])
+        return predictor, {**results, 'search': {**found, 'stored_features': stored is not None}}, df
+
+    def stored_features(self) -> Optional[tuple]:
+        """(X, y) of the labelled students from the active encoder's feature store; None without an active model"""
+        from models.feature_store import FeatureStore, labelled_matrix
+
+        active = self.registry.active_version()
+        encoder_path = os.path.join(self.registry.version_path(active), "feature_encoder.json") if active else None
+        if encoder_path is None or not os.path.exists(encoder_path):
+            return None
+        X, y = labelled_matrix(FeatureStore(FeatureEncoder.load(encoder_path)),
+                               training_sources(self.main_db, self.government_db), LEVELS)
+        if len(y) > MAX_TRAINING_ROWS:
+            rows = np.sort(np.random.default_rng(42).choice(len(y), MAX_TRAINING_ROWS, replace=False))
+            X, y = X[rows], y[rows]
+        # As in training_frame: stratified folds need two students per level
+        levels, counts = np.unique(y, return_counts=True)
+        keep = np.isin(y, levels[counts >= 2])
+        return X[keep], y[keep]
+
+    def run_job(self, job_id: str) -> Dict:
+        """Train (incrementally when possible), register the model and promote it if it is good enough"""
+        with self._lock:
+            if self._queued_job == job_id:
+                self._queued_job = None
+            pending = self._pending.pop(job_id, {'rows': [], 'full': True})
+        new_rows = pd.concat(pending['rows'], ignore_index=True) if pending['rows'] else None
+        search = pending.get('search')
+        incremental = not pending['full'] and search is None and new_rows is not None and len(new_rows) > 0 \
+            and self.registry.active_version() is not None
+        mode = 'incremental' if incremental else 'search' if search is not None else 'full'
+
+        self._update(job_id, status='running', mode=mode)
+        try:
+            fallback = None
+            if incremental:
+                try:
+                    predictor, results = self.train_incremental(new_rows)
+                except ValueError as e:
+                    fallback, incremental, mode = str(e), False, 'full'
+                    self._update(job_id, mode=mode)
+            if incremental:
+                self.reservoir.add(new_rows)
+            else:
+                predictor, results, df = self.train_search(search) if search is not None else self.train_full()
+                # The first full training seeds the reservoir with everything stored so far
+                if self.reservoir.seen == 0:
+                    self.reservoir.add(df)
+                elif new_rows is not None:
+                    self.reservoir.add(new_rows)
+            self.reservoir.save()
+
+            metrics = {
+                **{k: v for k, v in results.items() if k != 'feature_importance'},
+                'random_forest_accuracy': float(results['random_forest_accuracy']),
+                'decision_tree_accuracy': float(results['decision_tree_accuracy']),
+                'feature_importance': {k: float(v) for k, v in results['feature_importance'].items()},
+                'mode': mode,
+                'reservoir_rows': len(self.reservoir.rows),
+                'reservoir_seen': self.reservoir.seen,
+                'trained_at': datetime.now().isoformat(),
+                'job_id': job_id
+            }
+            if fallback:
+                metrics['incremental_fallback'] = fallback
+            version = self.registry.save(predictor, metrics)
+            promoted = self.should_promote(metrics)
+            if promoted:
+                self.registry.promote(version)
+                if self.on_promote is not None:
+                    self.on_promote(version)
+
+            self._update(job_id, status='completed', training_rows=metrics['training_rows'], model_version=version,
+                         promoted=int(promoted), metrics=json.dumps(metrics))
+            print(f"Training job {job_id[:8]} ({metrics['mode']}): model {version} "
+                  f"(accuracy {metrics['random_forest_accuracy']:.3f}){' promoted' if promoted else ''}")
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e))
+            print(f"Training job {job_id[:8]} failed: {e}")
+        return self.get_job(job_id)
@@ -0,0 +1,190 @@
+"""Flattened tree ensembles evaluated with plain NumPy.
+
+compile_model() turns a fitted RandomForestClassifier or
+DecisionTreeClassifier into one CompiledForest: every node of every tree
+sits in contiguous arrays (feature, threshold, left, right, value), and
+roots[t] is the first node of tree t. apply() walks all trees for all
+rows at once, one tree level per step. For large inputs, a (row, tree)
+pair leaves the working arrays as soon as it reaches a leaf.
+
+The results are bit-for-bit those of scikit-learn, for three reasons:
+- inputs are rounded to float32 before the threshold comparison, as the
+  Cython trees do
+- each leaf's class counts are normalized the same way
+- the per-tree probabilities are summed in tree order and then divided
+  by the number of trees, which is how ForestClassifier accumulates
+
+For a handful of rows this is far faster than scikit-learn: it skips
+input validation and joblib's per-tree dispatch, which is where almost
+all of sklearn's time goes for small inputs. For large batches, sklearn's
+compiled tree walk wins, so callers use CompiledForest only up to
+COMPILED_MAX_ROWS rows.
+"""
+import os
+from typing import Dict
+
+import numpy as np
+
+# Up to this many (row, tree) pairs, apply() steps every pair through the
+# full depth; beyond it, finished pairs are compacted away after each level
+SMALL_WALKERS = 4096
+# Largest batch for which callers should prefer CompiledForest over sklearn
+COMPILED_MAX_ROWS = 256
+
+ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots', 'classes')
+
+
+class CompiledForest:
+    """Trees of one classifier as flat arrays; a single tree is a forest of one"""
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, classes, depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.depth = depth
+        self.has_missing = bool(missing_left.any())
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index of every row in every tree, shape (rows, trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        leaves = np.tile(self.roots, n_rows)
+        offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        if len(leaves) <= SMALL_WALKERS:
+            # Few (row, tree) walkers: step them all, finished ones stay on their leaf
+            for level in range(self.depth):
+                leaves = self._step(flat_x, offsets, leaves)
+                if level % 4 == 3 and (self.left[leaves] == leaves).all():
+                    break
+            return leaves.reshape(n_rows, self.n_trees)
+
+        # Many walkers: those that reach a leaf drop out of the working arrays
+        walkers = np.flatnonzero(self.left[leaves] != leaves)
+        nodes, offsets = leaves[walkers], offsets[walkers]
+        while len(walkers):
+            nodes = self._step(flat_x, offsets, nodes)
+            done = self.left[nodes] == nodes
+            if done.any():
+                leaves[walkers[done]] = nodes[done]
+                running = ~done
+                walkers, nodes, offsets = walkers[running], nodes[running], offsets[running]
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def _step(self, flat_x: np.ndarray, offsets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Move every walker one level down (a leaf's children are itself)"""
+        values = flat_x[offsets + self.feature[nodes]]
+        go_left = values <= self.threshold[nodes]
+        if self.has_missing:
+            go_left |= np.isnan(values) & self.missing_left[nodes]
+        return np.where(go_left, self.left[nodes], self.right[nodes])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaf_values = self.value[self.apply(X)]  # (rows, trees, classes)
+        # cumsum adds strictly in tree order (np.sum would pair terms differently)
+        proba = np.cumsum(leaf_values, axis=1)[:, -1]
+        if self.n_trees > 1:
+            proba /= self.n_trees
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    def contributions(self, X: np.ndarray):
+        """Path decomposition of predict_proba: (bias, contributions).
+
+        Every split a row passes moves the class probabilities from the node's
+        value to its child's; that change is credited to the split feature.
+        Averaged over trees, bias (classes,) is the mean root value and
+        contributions has shape (rows, features, classes), so that
+        bias + contributions.sum(axis=1) equals predict_proba(X) up to rounding.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        n_classes = self.value.shape[1]
+        flat_x = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), self.n_trees)
+        walking = np.flatnonzero(self.left[nodes] != nodes)
+        nodes, rows = nodes[walking], rows[walking]
+
+        totals = np.zeros((n_classes, n_rows * n_features))
+        while len(nodes):
+            children = self._step(flat_x, rows * n_features, nodes)
+            delta = self.value[children] - self.value[nodes]
+            slots = rows * n_features + self.feature[nodes]
+            for c in range(n_classes):
+                totals[c] += np.bincount(slots, weights=delta[:, c], minlength=n_rows * n_features)
+            running = self.left[children] != children
+            nodes, rows = children[running], rows[running]
+
+        contributions = totals.T.reshape(n_rows, n_features, n_classes) / self.n_trees
+        return self.value[self.roots].mean(axis=0), contributions
+
+    def save(self, path: str):
+        """One .npy per array, so load(mmap_mode='r') can map them"""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, 'classes_' if name == 'classes' else name),
+                    allow_pickle=name == 'classes')
+        np.save(os.path.join(path, "depth.npy"), np.array(self.depth))
+
+    @classmethod
+    def load(cls, path: str, mmap_mode=None) -> 'CompiledForest':
+        arrays: Dict[str, np.ndarray] = {}
+        for name in ARRAYS:
+            # Class labels are strings (object arrays), which cannot be mapped
+            allow_pickle = name == 'classes'
+            arrays[name] = np.load(os.path.join(path, f"{name}.npy"), allow_pickle=allow_pickle,
+                                   mmap_mode=None if allow_pickle else mmap_mode)
+        return cls(**arrays, depth=int(np.load(os.path.join(path, "depth.npy"))))
+
+
+def compile_model(model) -> CompiledForest:
+    """Flatten a fitted RandomForestClassifier or DecisionTreeClassifier"""
+    trees = getattr(model, 'estimators_', [model])
+    features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+    offset, depth = 0, 0
+    for estimator in trees:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n)
+
+        # Leaves point at themselves; that is how apply() recognizes them
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        missing.append(getattr(tree, 'missing_go_to_left', np.zeros(n, dtype=np.uint8)).astype(bool))
+
+        # predict_proba of a tree: the leaf's class weights over their sum (0 sums stay 0)
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += n
+        depth = max(depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts).astype(np.intp),
+        right=np.concatenate(rights).astype(np.intp),
+        missing_left=np.concatenate(missing),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.intp),
+        classes=np.asarray(model.classes_),
+        depth=depth
+    )
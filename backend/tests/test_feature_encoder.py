@@ -0,0 +1,82 @@
+"""FeatureEncoder: models saved before feature_encoder.json, and small-frame encoding.
+
+Old artifacts (label_encoders.pkl) carry no training medians; missing
+numerical inputs must still be imputed with finite values, because the
+forests cannot take NaN.
+"""
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_cohort
+from models.feature_encoder import FeatureEncoder
+from models.ml_models import CATEGORICAL_FEATURES, DropoutPredictor
+from models.risk_engine import SCORING_INPUTS, RiskEngine
+from models.tree_compiler import COMPILED_MAX_ROWS
+
+
+@pytest.fixture(scope="module")
+def old_format_path(tmp_path_factory):
+    """A trained model saved the way DropoutPredictor did before feature_encoder.json"""
+    from sklearn.preprocessing import LabelEncoder
+
+    train = RiskEngine().batch_calculate_risk(make_cohort(3000, seed=1))
+    predictor = DropoutPredictor()
+    predictor.train_models(train)
+
+    path = str(tmp_path_factory.mktemp("old_model"))
+    predictor.save_models(path)
+    os.remove(os.path.join(path, "feature_encoder.json"))
+    shutil.rmtree(os.path.join(path, "compiled_rf"))
+    shutil.rmtree(os.path.join(path, "compiled_dt"))
+    label_encoders = {col: LabelEncoder().fit(train[col].astype(str)) for col in CATEGORICAL_FEATURES
+                      if col in train.columns}
+    joblib.dump(label_encoders, os.path.join(path, "label_encoders.pkl"))
+    return path
+
+
+def test_old_format_imputes_engine_defaults(old_format_path):
+    predictor = DropoutPredictor()
+    predictor.load_models(old_format_path)
+    defaults = dict(SCORING_INPUTS)
+    assert predictor.encoder.numerical == {name: float(defaults[name]) for name in predictor.encoder.numerical}
+    assert FeatureEncoder.from_label_encoders({}, ['gpa']).numerical == {'gpa': 0.0}
+
+
+def test_old_format_predicts_with_missing_fields(old_format_path):
+    predictor = DropoutPredictor()
+    predictor.load_models(old_format_path)
+
+    student = make_cohort(1, seed=5).iloc[0].to_dict()
+    del student['marks'], student['family_income']
+    student['attendance_percentage'] = np.nan
+    result = predictor.predict_risk(student)
+    assert result['prediction'] in predictor.rf_model.classes_
+    assert np.isfinite(result['probability'])
+
+    # Large enough for the sklearn models rather than the compiled forest
+    cohort = make_cohort(COMPILED_MAX_ROWS * 2, seed=6).drop(columns=['family_size'])
+    cohort.loc[cohort.index[::3], 'marks'] = np.nan
+    X = predictor.prepare_features(cohort)
+    assert np.isfinite(X.to_numpy(dtype=float)).all()
+    predicted = predictor.batch_predict(cohort)['predicted_risk']
+    assert list(predicted) == list(predictor.rf_model.predict(X))
+
+
+def test_small_frames_encode_like_large_ones():
+    train = make_cohort(2000, seed=2)
+    train.loc[train.index[::50], 'region'] = np.nan
+    encoder = FeatureEncoder().fit(train, ['marks', 'family_size'], ['region', 'gender', 'semester'])
+
+    df = make_cohort(1000, seed=3)
+    odd = [None, np.nan, 'Coastal', 4, 4.0, 'Urban', np.str_('Rural')]
+    df['region'] = [odd[i % len(odd)] if i % 3 == 0 else value for i, value in enumerate(df['region'])]
+    df['marks'] = df['marks'].astype(object)
+    df.loc[df.index[::7], 'marks'] = 'absent'
+    for frame in (df, df.astype({'region': 'category', 'gender': 'category'})):
+        expected = encoder.transform(frame)
+        chunks = [encoder.transform(frame.iloc[start:start + 50]) for start in range(0, len(frame), 50)]
+        assert np.array_equal(np.concatenate([chunk.to_numpy() for chunk in chunks]), expected.to_numpy())
@@ -0,0 +1,105 @@
+"""RiskEngine (memoised scalar and vectorized batch) against the hand-coded scorer in benchmarks.legacy_scorers.
+
+Cohorts are random with values sitting exactly on the cut-offs, missing
+values and, for some seeds, missing columns or perturbed thresholds and
+weights. Scores must match bit for bit.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import legacy_scorers
+from benchmarks.synthetic import make_cohort, perturbed_rules
+from models.risk_engine import SCORING_INPUTS, RiskEngine
+
+ROWS = 2000
+SEEDS = range(10)
+DROPPED_COLUMNS = ['family_income', 'payment_status', 'distance_from_college']
+
+
+def engine_and_cohort(seed: int):
+    engine = RiskEngine()
+    if seed % 3 == 1:
+        thresholds, weights = perturbed_rules(engine.thresholds, engine.weights, np.random.default_rng(seed))
+        engine.update_thresholds(thresholds)
+        engine.update_weights(weights)
+    df = make_cohort(ROWS, seed=seed, edge_cases=True)
+    if seed % 5 == 4:
+        # Absent columns score with the scalar path's defaults
+        df = df.drop(columns=DROPPED_COLUMNS)
+    return engine, df
+
+
+def legacy(engine: RiskEngine, student: dict):
+    return legacy_scorers.standard_score(student, engine.thresholds, engine.weights)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_batch_matches_legacy(seed):
+    engine, df = engine_and_cohort(seed)
+    expected = [legacy(engine, student) for student in df.to_dict('records')]
+
+    batch = engine.batch_calculate_risk(df)
+    scores = np.array([score for score, _, _, _ in expected], dtype=float)
+    assert np.array_equal(batch['risk_score'].to_numpy().view(np.int64), scores.view(np.int64))
+    assert list(batch['risk_level']) == [level for _, level, _, _ in expected]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_memoised_matches_legacy(seed):
+    engine, df = engine_and_cohort(seed)
+    records = df.to_dict('records')
+    # Twice: the second pass is served from the memo
+    for _ in range(2):
+        for student in records:
+            score, level, components, factors = legacy(engine, student)
+            result = engine.calculate_risk_score(student)
+            assert repr((result['composite_score'], result['risk_level'])) == repr((score, level)), student
+            assert {name: (c['score'], c['level']) for name, c in result['components'].items()} == components
+            assert result['components']['socioeconomic']['factors'] == factors
+    assert engine.cache_info()['hits'] >= len(records)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_students_match_legacy(seed):
+    """Students with any subset of the scoring inputs, values drawn around the cut-offs"""
+    rng = np.random.default_rng(seed)
+    engine = RiskEngine(cache_size=0)
+    candidates = {
+        'attendance_percentage': [0, 44.9, 45, 59.9, 60, 74.9, 75, 100, np.nan],
+        'marks': [0, 39.9, 40, 54.9, 55, 69.9, 70, 100, np.nan],
+        'family_income': [0, 99999, 100000, 199999, 200000, 300000, 500000],
+        'total_fees': [0, 1, 50000, 80000],
+        'fees_due': [0, 10000, 20000, 35000, 56000, np.nan],
+        'payment_status': ['Paid', 'Partial', 'Pending', None],
+        'internet_access': ['Yes', 'No'],
+        'electricity': ['Regular', 'Irregular'],
+        'distance_from_college': [0, 15, 16, 30, 31],
+        'family_size': [1, 7, 8],
+        'region': ['Urban', 'Rural'],
+    }
+    students = []
+    for _ in range(500):
+        student = {'student_id': f"S{len(students):05d}"}
+        for field, _ in SCORING_INPUTS:
+            if rng.random() < 0.85:
+                values = candidates[field]
+                student[field] = values[rng.integers(len(values))]
+        students.append(student)
+
+    expected = [legacy(engine, student) for student in students]
+    for student, (score, level, _, _) in zip(students, expected):
+        result = engine.calculate_risk_score(student)
+        assert repr((result['composite_score'], result['risk_level'])) == repr((score, level)), student
+
+    # One frame per present-column set: absent keys are absent columns
+    by_columns = {}
+    for student, outcome in zip(students, expected):
+        by_columns.setdefault(tuple(student), []).append((student, outcome))
+    for group in by_columns.values():
+        frame = pd.DataFrame([student for student, _ in group])
+        batch = engine.batch_calculate_risk(frame)
+        scores = np.array([outcome[0] for _, outcome in group], dtype=float)
+        assert np.array_equal(batch['risk_score'].to_numpy().view(np.int64), scores.view(np.int64))
+        assert list(batch['risk_level']) == [outcome[1] for _, outcome in group]
+
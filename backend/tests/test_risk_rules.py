@@ -0,0 +1,81 @@
+"""Compiled risk rule profiles reproduce the hand-coded scorers in benchmarks.legacy_scorers exactly.
+
+Each profile is checked on edge-case cohorts with its default thresholds
+and weights (even seeds) and with randomly perturbed ones (odd seeds),
+through the scalar and the vectorized evaluators.
+"""
+import numpy as np
+import pytest
+
+from api.multi_file_upload import calculate_multi_factor_risk, categorize_risk, multi_factor_rules
+from benchmarks import legacy_scorers
+from benchmarks.synthetic import perturbed_rules, rule_edge_cohort
+from models.enhanced_risk_engine import EnhancedRiskEngine
+from models.risk_engine import RiskEngine
+from models.risk_rules import RISK_LEVELS, compile_profile
+
+ROWS = 2000
+SEEDS = range(4)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_standard_matches_legacy(seed):
+    engine = RiskEngine()
+    if seed % 2:
+        thresholds, weights = perturbed_rules(engine.thresholds, engine.weights, np.random.default_rng(seed))
+        engine.update_thresholds(thresholds)
+        engine.update_weights(weights)
+
+    for student in rule_edge_cohort(ROWS, seed).to_dict('records'):
+        expected = legacy_scorers.standard_score(student, engine.thresholds, engine.weights)
+        result = engine._calculate_risk_score(student)
+        actual = (
+            result['composite_score'], result['risk_level'],
+            {name: (c['score'], c['level']) for name, c in result['components'].items()},
+            result['components']['socioeconomic']['factors']
+        )
+        assert repr(actual) == repr(expected), student
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_enhanced_matches_legacy(seed):
+    engine, legacy = EnhancedRiskEngine(), legacy_scorers.LegacyEnhancedRiskEngine()
+    if seed % 2:
+        rng = np.random.default_rng(seed)
+        thresholds, weights = perturbed_rules(engine.risk_thresholds, engine.risk_weights, rng)
+        legacy.risk_thresholds, legacy.risk_weights = thresholds, weights
+        engine.risk_thresholds, engine.risk_weights = thresholds, weights
+        engine._rules = compile_profile('enhanced', thresholds, weights)
+
+    df = rule_edge_cohort(ROWS, seed)
+    scores, levels = [], []
+    for student in df.to_dict('records'):
+        expected = legacy.calculate_comprehensive_risk(student)
+        actual = engine.calculate_comprehensive_risk(student)
+        expected.pop('calculated_at')
+        actual.pop('calculated_at')
+        assert repr(actual) == repr(expected), student
+        scores.append(expected['composite_score'])
+        levels.append(expected['risk_level'])
+
+    batch = engine._rules.evaluate_frame(df)
+    assert np.array_equal(batch['composite_score'].view(np.int64), np.array(scores, dtype=float).view(np.int64))
+    assert list(RISK_LEVELS[batch['risk_level']]) == levels
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_multi_factor_matches_legacy(seed):
+    df = rule_edge_cohort(ROWS, seed)
+    df.loc[df.sample(frac=0.05, random_state=seed).index, 'attendance_percentage'] = np.nan
+
+    expected = legacy_scorers.multi_factor_risk(df)
+    actual = calculate_multi_factor_risk(df)
+    assert np.array_equal(actual.to_numpy().view(np.int64), expected.to_numpy(dtype=float).view(np.int64))
+    assert list(actual.index) == list(expected.index)
+
+    expected_levels = list(expected.apply(legacy_scorers.multi_factor_level))
+    assert list(RISK_LEVELS[multi_factor_rules.evaluate_frame(df)['risk_level']]) == expected_levels
+    assert list(actual.apply(categorize_risk)) == expected_levels
+
+    for student, score in zip(df.to_dict('records'), expected):
+        assert repr(multi_factor_rules.evaluate(student)['composite_score']) == repr(score)
@@ -0,0 +1,135 @@
+"""Encoding and delimiter detection for uploaded CSV files.
+
+Spreadsheet exports arrive in several forms: UTF-8 with or without a BOM,
+Windows cp1252 (Excel's en dashes and curly quotes are single
+bytes 0x91-0x97), UTF-16 "Unicode Text" saved by
+Excel (tab-separated), and comma, semicolon, tab or pipe delimiters.
+sniff() decides the encoding and delimiter from the first SNIFF_BYTES of
+the file:
+- a BOM names the encoding;
+- otherwise the prefix is UTF-8 if it decodes as UTF-8 (a multi-byte
+  character cut off at the end of the prefix is allowed), else cp1252,
+  else latin-1, which accepts any byte;
+- csv.Sniffer picks the delimiter from the prefix's complete lines. If its
+  choice does not split every line into the same number of fields, the
+  candidate that does (with the most fields) wins; ',' is the default.
+
+read_csv() then parses the whole file once with pandas' C engine. Only
+one case needs a second parse: the prefix was valid UTF-8 but a later
+byte is not. The file is then read as cp1252, or latin-1 if cp1252 fails.
+
+Decimal commas are decided per column, after parsing: in a file not
+separated by ',', a text column is converted to numbers only when every
+value looks like 58,75 and none could be a grouped amount like 45,000 or
+1,50,000. Unclear columns (amounts, dotted dates) stay text.
+"""
+import codecs
+import csv
+import io
+import re
+from typing import List, Tuple
+
+import pandas as pd
+
+SNIFF_BYTES = 64 * 1024
+SNIFF_LINES = 50
+DELIMITERS = ',;\t|'
+_DECIMAL_COMMA = re.compile(r'[+-]?\d+,\d+')
+# Digit grouping ends in a group of three: 45,000, 12,500, 1,50,000
+_GROUPED = re.compile(r'[+-]?\d{1,3}(,\d{2})*,\d{3}')
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def detect_encoding(sample: bytes) -> str:
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def _fields(lines, delimiter: str) -> int:
+    """Fields per line when every line has the same number, else 0"""
+    counts = {len(row) for row in csv.reader(lines, delimiter=delimiter)}
+    return counts.pop() if len(counts) == 1 else 0
+
+
+def _sample_lines(text: str, truncated: bool) -> List[str]:
+    lines = text.splitlines()
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]  # cut off by the prefix
+    return [line for line in lines[:SNIFF_LINES] if line.strip()]
+
+
+def detect_delimiter(text: str, truncated: bool = False) -> str:
+    lines = _sample_lines(text, truncated)
+    if not lines:
+        return ','
+    try:
+        sniffed = csv.Sniffer().sniff('\n'.join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sniffed = None
+    if sniffed is not None and _fields(lines, sniffed) > 1:
+        return sniffed
+    # The Sniffer prefers ',' when several candidates look regular, e.g. decimal
+    # commas in a ';' file; the header line settles it
+    fields, delimiter = max((_fields(lines, d), d) for d in DELIMITERS)
+    return delimiter if fields > 1 else sniffed or ','
+
+
+def sniff(content: bytes) -> Tuple[str, str]:
+    """(encoding, delimiter) of a CSV file, from its first SNIFF_BYTES"""
+    sample = content[:SNIFF_BYTES]
+    truncated = len(content) > SNIFF_BYTES
+    encoding = detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=not truncated)
+    return encoding, detect_delimiter(text, truncated)
+
+
+def decimal_comma_columns(df: pd.DataFrame) -> List[str]:
+    """Text columns whose every value is a number like 58,75 and none could be a grouped amount"""
+    columns = []
+    for name in df.columns:
+        if df[name].dtype != object:
+            continue
+        # Most text columns fail on their first values; only candidates are matched in full
+        head = df[name].head(SNIFF_LINES).dropna().astype(str).str.strip()
+        if len(head) == 0 or not head.str.fullmatch(_DECIMAL_COMMA).all():
+            continue
+        values = df[name].dropna().astype(str).str.strip()
+        if values.str.fullmatch(_DECIMAL_COMMA).all() and not values.str.fullmatch(_GROUPED).any():
+            columns.append(name)
+    return columns
+
+
+def _parse(content: bytes, encoding: str, delimiter: str, **kwargs) -> pd.DataFrame:
+    try:
+        return pd.read_csv(io.BytesIO(content), encoding=encoding, sep=delimiter, **kwargs)
+    except UnicodeDecodeError:
+        if encoding != 'utf-8':
+            raise
+    # Valid UTF-8 up to SNIFF_BYTES only
+    try:
+        return pd.read_csv(io.BytesIO(content), encoding='cp1252', sep=delimiter, **kwargs)
+    except UnicodeDecodeError:
+        return pd.read_csv(io.BytesIO(content), encoding='latin-1', sep=delimiter, **kwargs)
+
+
+def read_csv(content: bytes, **kwargs) -> pd.DataFrame:
+    """Parse CSV bytes with the sniffed encoding and delimiter (pandas C engine)"""
+    encoding, delimiter = sniff(content)
+    df = _parse(content, encoding, delimiter, **kwargs)
+    if delimiter != ',':
+        for name in decimal_comma_columns(df):
+            df[name] = pd.to_numeric(df[name].str.strip().str.replace(',', '.', regex=False))
+    return df
@@ -4,6 +4,8 @@ from typing import Dict, List, Tuple
 import io
 import os
 
+from utils.csv_sniffer import read_csv
+
 class FileProcessor:
     def __init__(self):
         self.supported_formats = ['.csv', '.xlsx', '.xls']
@@ -24,21 +26,8 @@ class FileProcessor:
         
         try:
             if file_ext == '.csv':
-                # Try different encodings and separators
-                encodings = ['utf-8', 'latin-1', 'cp1252']
-                separators = [',', ';', '\t']
-                
-                for encoding in encodings:
-                    for sep in separators:
-                        try:
-                            df = pd.read_csv(io.BytesIO(file_content), encoding=encoding, sep=sep, on_bad_lines='skip')
-                            if len(df.columns) > 1 and len(df) > 0:
-                                return df
-                        except:
-                            continue
-                
-                # Fallback: try with error handling
-                df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8', on_bad_lines='skip', sep=None, engine='python')
+                # Encoding and separator sniffed from the start of the file, then one parse
+                df = read_csv(file_content, on_bad_lines='skip')
             else:  # Excel files
                 df = pd.read_excel(io.BytesIO(file_content))
             
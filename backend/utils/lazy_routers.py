@@ -0,0 +1,92 @@
+import importlib
+from typing import Dict, List, Optional
+
+from utils.services import services
+
+
+class RouteGroup:
+    """A router module that can be included eagerly or on first request"""
+
+    def __init__(self, name: str, module: str, attribute: str, prefix: str = "",
+                 tags: Optional[List[str]] = None, paths: Optional[List[str]] = None):
+        self.name = name
+        self.module = module
+        self.attribute = attribute
+        self.prefix = prefix
+        self.tags = tags
+        # Request path prefixes served by this group, used for lazy matching
+        self.paths = paths or [prefix + "/"]
+
+    def load_router(self):
+        with services.startup_report.phase(f"import:{self.name}"):
+            module = importlib.import_module(self.module)
+        return getattr(module, self.attribute)
+
+    def matches(self, path: str) -> bool:
+        return any(path.startswith(p) for p in self.paths)
+
+
+class LazyRouterLoader:
+    """ASGI middleware that includes route groups the first time they are hit.
+
+    Cold starts then only import the modules (and their pandas/sklearn
+    dependencies) needed by the route actually requested. Routes are kept
+    in the declared group order so overlapping paths resolve exactly as
+    they would with eager inclusion.
+    """
+
+    # Paths that need the full route table (interactive docs and schema)
+    FULL_TABLE_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+    def __init__(self, app, fastapi_app, groups: List[RouteGroup], fallback_prefixes: List[str]):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.groups = groups
+        self.fallback_prefixes = fallback_prefixes
+        self.loaded: Dict[str, bool] = {}
+        self._route_order: Dict[int, int] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and len(self.loaded) < len(self.groups):
+            self.ensure_loaded(scope["path"])
+        await self.app(scope, receive, send)
+
+    def ensure_loaded(self, path: str):
+        if path.startswith(self.FULL_TABLE_PATHS):
+            wanted = self.groups
+        else:
+            wanted = [g for g in self.groups if g.matches(path)]
+            if not wanted and path.startswith(tuple(self.fallback_prefixes)):
+                # Unknown API path: load everything rather than return a false 404
+                wanted = self.groups
+
+        for group in wanted:
+            if group.name not in self.loaded:
+                self._include(group)
+
+    def _include(self, group: RouteGroup):
+        router = group.load_router()
+        routes = self.fastapi_app.router.routes
+        before = len(routes)
+        self.fastapi_app.include_router(router, prefix=group.prefix, tags=group.tags)
+
+        position = self.groups.index(group)
+        for route in routes[before:]:
+            self._route_order[id(route)] = position
+        # Stable sort: eagerly registered routes first, then groups in declared order
+        routes.sort(key=lambda route: self._route_order.get(id(route), -1))
+
+        self.fastapi_app.openapi_schema = None
+        self.loaded[group.name] = True
+
+
+def include_route_groups(app, groups: List[RouteGroup], lazy: bool = False):
+    """Include route groups now, or defer each one until first matching request"""
+    if not lazy:
+        for group in groups:
+            app.include_router(group.load_router(), prefix=group.prefix, tags=group.tags)
+        return
+
+    fallback_prefixes = sorted({g.prefix + "/" for g in groups if g.prefix})
+    app.add_middleware(LazyRouterLoader, fastapi_app=app, groups=groups,
+                       fallback_prefixes=fallback_prefixes)
@@ -0,0 +1,139 @@
+"""Bounded parallel execution over tenant (college) databases.
+
+Statewide operations run one task per college. Thread pools suit SQLite
+reads, because sqlite3 releases the GIL while a query runs. Process pools
+suit CPU-bound scoring. Both are bounded and give each tenant a timeout.
+Failures are collected per tenant instead of failing the whole operation.
+reduce_partials() folds per-tenant counts and distributions into the
+government view.
+"""
+import multiprocessing
+import os
+import queue
+import time
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_READ_WORKERS = 8
+DEFAULT_TIMEOUT_S = 30.0
+_POLL_S = 0.05
+
+# Start-time queue of a process pool's workers, set by the pool initializer
+_process_starts = None
+
+
+class TenantResults:
+    """Per-tenant results, errors (including timeouts) and run times"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.elapsed_s: Dict[str, float] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f"TenantResults({len(self.results)} ok, {len(self.errors)} failed)"
+
+
+def _init_process(starts):
+    global _process_starts
+    _process_starts = starts
+
+
+def _report_start(starts, index: int, fn: Callable, *args):
+    """Runs fn(*args) in the pool after putting (index, start time) on starts (the process queue if None)"""
+    (_process_starts if starts is None else starts).put((index, time.monotonic()))
+    return fn(*args)
+
+
+def map_tenants(fn: Callable, tenants: Iterable, processes: bool = False, max_workers: Optional[int] = None,
+                timeout: Optional[float] = DEFAULT_TIMEOUT_S,
+                on_result: Optional[Callable[[str, Any], None]] = None) -> TenantResults:
+    """Run fn once per tenant in a bounded pool.
+
+    tenants is an iterable of tenant ids, called as fn(tenant_id), or a
+    mapping of tenant id -> argument, called as fn(tenant_id, argument).
+    With processes=True fn and its arguments must be picklable
+    (module-level functions, functools.partial).
+
+    timeout applies per tenant from when a worker starts its task (the
+    worker reports the time; a task merely queued to a worker process has
+    not started); a tenant that overruns is reported in errors and no
+    longer waited for.
+    on_result(tenant_id, result) is called in this thread as each tenant
+    completes.
+    """
+    items = list(tenants.items()) if isinstance(tenants, Mapping) else [(tenant, None) for tenant in tenants]
+    with_argument = isinstance(tenants, Mapping)
+    outcome = TenantResults()
+    if not items:
+        return outcome
+
+    limit = DEFAULT_READ_WORKERS if not processes else (os.cpu_count() or 1)
+    workers = max(1, min(max_workers or limit, len(items)))
+    if processes:
+        # time.monotonic() is system-wide, so worker start times compare with this process's clock
+        starts = multiprocessing.SimpleQueue()
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(starts,))
+        task_starts = None
+    else:
+        starts = task_starts = queue.SimpleQueue()
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    abandoned = False
+    try:
+        submitted = [
+            pool.submit(_report_start, task_starts, index, fn, tenant, *((argument,) if with_argument else ()))
+            for index, (tenant, argument) in enumerate(items)
+        ]
+        futures = {future: tenant for future, (tenant, _) in zip(submitted, items)}
+        started: Dict[Any, float] = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=_POLL_S, return_when=FIRST_COMPLETED)
+            while not starts.empty():
+                index, start = starts.get()
+                started[submitted[index]] = start
+            now = time.monotonic()
+            for future in done:
+                tenant = futures[future]
+                outcome.elapsed_s[tenant] = round(now - started.get(future, now), 4)
+                try:
+                    outcome.results[tenant] = future.result()
+                except Exception as e:
+                    outcome.errors[tenant] = f"{type(e).__name__}: {e}"
+                    continue
+                if on_result is not None:
+                    on_result(tenant, outcome.results[tenant])
+
+            for future in list(pending):
+                if timeout is not None and future in started and now - started[future] > timeout:
+                    tenant = futures[future]
+                    outcome.errors[tenant] = f"timed out after {timeout:g}s"
+                    outcome.elapsed_s[tenant] = round(now - started[future], 4)
+                    pending.discard(future)
+                    abandoned = True
+    finally:
+        # Timed-out tasks cannot be interrupted; don't wait for them
+        pool.shutdown(wait=not abandoned, cancel_futures=abandoned)
+    return outcome
+
+
+def reduce_partials(partials: Iterable[Dict], counts: Iterable[str] = (),
+                    distributions: Iterable[str] = ()) -> Dict:
+    """Sum per-tenant count fields and merge per-tenant {key: count} distributions"""
+    counts, distributions = list(counts), list(distributions)
+    reduced = {name: 0 for name in counts}
+    reduced.update({name: {} for name in distributions})
+    for partial in partials:
+        for name in counts:
+            reduced[name] += partial.get(name, 0)
+        for name in distributions:
+            merged = reduced[name]
+            for key, value in partial.get(name, {}).items():
+                merged[key] = merged.get(key, 0) + value
+    return reduced
@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StartupReport:
+    """Records how long each startup/initialization phase took.
+
+    Phases may nest (the lazy router imports run inside include:routers);
+    each entry records its depth and only top-level phases count toward
+    the total.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str):
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        # Appended on entry so nested phases are listed after their parent
+        entry = {'phase': name, 'ms': None, 'depth': depth}
+        with self._lock:
+            self.phases.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['ms'] = round((time.perf_counter() - start) * 1000, 2)
+            self._local.depth = depth
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            phases = [dict(p) for p in self.phases if p['ms'] is not None]
+        return {
+            'phases': phases,
+            'total_ms': round(sum(p['ms'] for p in phases if p['depth'] == 0), 2)
+        }
+
+    def print_report(self):
+        report = self.as_dict()
+        print("Startup report:")
+        for entry in report['phases']:
+            name = '  ' * entry['depth'] + entry['phase']
+            print(f"  {name:<28} {entry['ms']:>9.2f} ms")
+        print(f"  {'total':<28} {report['total_ms']:>9.2f} ms")
+
+
+class ServiceContainer:
+    """Process-wide registry of shared services.
+
+    Every service is built lazily on first access and exactly once, so
+    importing a router never constructs databases, seeds users or imports
+    scikit-learn. The application lifespan decides what to warm up front.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.startup_report = StartupReport()
+        # tenant -> database path, waiting for the feature-refresh thread
+        self._pending_refreshes: Dict[str, str] = {}
+        self._refresh_worker: Optional[threading.Thread] = None
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                with self.startup_report.phase(f"init:{name}"):
+                    instance = factory()
+                self._instances[name] = instance
+            return instance
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self):
+        """Drop all instances (used by scripts and benchmarks)"""
+        with self._lock:
+            self._instances.clear()
+
+    @property
+    def auth(self):
+        from auth.auth import AuthService
+        return self._get('auth', AuthService)
+
+    @property
+    def multi_db(self):
+        from models.multi_tenant_db import MultiTenantDatabase
+        return self._get('multi_db', MultiTenantDatabase)
+
+    @property
+    def db(self):
+        from models.database import Database
+        return self._get('db', Database)
+
+    @property
+    def risk_engine(self):
+        return self._get('risk_engine', self._build_risk_engine)
+
+    @staticmethod
+    def _build_risk_engine():
+        from models.risk_engine import RiskEngine
+        from models.risk_rules import load_overrides
+
+        engine = RiskEngine()
+        # Thresholds/weights saved in the main database's risk_thresholds table
+        engine.apply_overrides(load_overrides("dte_rajasthan.db"))
+        return engine
+
+    @property
+    def ml_predictor(self):
+        return self._get('ml_predictor', self._build_ml_predictor)
+
+    def _build_ml_predictor(self):
+        from models.ml_models import DropoutPredictor
+        # The registry's active model when there is one, else an untrained predictor
+        return self.model_registry.load() or DropoutPredictor()
+
+    @property
+    def inference(self):
+        return self._get('inference', self._build_inference)
+
+    def _build_inference(self):
+        from models.inference import MicroBatcher
+        return MicroBatcher(lambda: self.ml_predictor)
+
+    @property
+    def model_registry(self):
+        from models.training import ModelRegistry
+        return self._get('model_registry', ModelRegistry)
+
+    @property
+    def training(self):
+        return self._get('training', self._build_training)
+
+    def _build_training(self):
+        from models.training import TrainingService
+        return TrainingService(registry=self.model_registry, on_promote=self.use_model)
+
+    def use_model(self, version: str):
+        """Replace the live predictor after a promotion; requests in flight keep the old object"""
+        predictor = self.model_registry.load(version)
+        with self._lock:
+            self._instances['ml_predictor'] = predictor
+        # Features prepared for the previous encoder are not read again
+        if self.feature_store is not None:
+            self.feature_store.prune()
+            threading.Thread(target=self.rescore_all, name="ml-rescoring", daemon=True).start()
+
+    @property
+    def feature_store(self):
+        """Stored features for the live predictor's encoder; None while no model is trained"""
+        predictor = self.ml_predictor
+        if not predictor.is_trained:
+            return None
+        store = self._instances.get('feature_store')
+        if store is None or store.encoder is not predictor.encoder:
+            from models.feature_store import FeatureStore
+            with self._lock:
+                store = self._instances.get('feature_store')
+                if store is None or store.encoder is not predictor.encoder:
+                    store = self._instances['feature_store'] = FeatureStore(predictor.encoder)
+        return store
+
+    def refresh_features(self, tenant: str, db_path: str):
+        """After a tenant's students changed: refresh its stored features and predictions; never raises"""
+        from models.prediction_store import init_predictions_table, score_tenant
+
+        store = self.feature_store
+        if store is None:
+            return None
+        try:
+            with sqlite3.connect(db_path) as conn:
+                init_predictions_table(conn)
+            refreshed = store.refresh(tenant, db_path)
+            if refreshed['mode'] != 'unchanged':
+                new_rows = refreshed['new_rows'] if refreshed['mode'] == 'appended' else None
+                score_tenant(self.ml_predictor, store, tenant, db_path, new_rows=new_rows)
+            return refreshed
+        except Exception as e:
+            print(f"Feature store refresh for {tenant} failed: {e}")
+            return None
+
+    def refresh_features_later(self, tenant: str, db_path: str):
+        """Queue refresh_features for a background thread, so upload responses return after persistence.
+
+        One thread drains the queue; a tenant uploaded again before its refresh ran is refreshed once.
+        """
+        with self._lock:
+            self._pending_refreshes[tenant] = db_path
+            if self._refresh_worker is None:
+                self._refresh_worker = threading.Thread(target=self._drain_refreshes, name="feature-refresh",
+                                                        daemon=True)
+                self._refresh_worker.start()
+
+    def _drain_refreshes(self):
+        while True:
+            with self._lock:
+                if not self._pending_refreshes:
+                    self._refresh_worker = None
+                    return
+                tenant = next(iter(self._pending_refreshes))
+                db_path = self._pending_refreshes.pop(tenant)
+            self.refresh_features(tenant, db_path)
+
+    def rescore_all(self):
+        """Store predictions of the live model for every tenant (after a promotion)"""
+        from models.prediction_store import init_predictions_table, score_tenant
+        from models.training import training_sources
+
+        predictor, store = self.ml_predictor, self.feature_store
+        for tenant, db_path in training_sources().items():
+            try:
+                with sqlite3.connect(db_path) as conn:
+                    init_predictions_table(conn)
+                store.refresh(tenant, db_path)
+                score_tenant(predictor, store, tenant, db_path)
+            except Exception as e:
+                print(f"ML rescoring of {tenant} failed: {e}")
+
+    @property
+    def file_processor(self):
+        from utils.file_processor import FileProcessor
+        return self._get('file_processor', FileProcessor)
+
+    def model_status(self) -> Dict:
+        """Readiness of the ML predictor, without building it"""
+        predictor = self._instances.get('ml_predictor')
+        if predictor is None:
+            return {'loaded': False, 'trained': False, 'version': None}
+        return {'loaded': True, 'trained': predictor.is_trained, 'version': predictor.version}
+
+    def warm_up(self, names: List[str]):
+        """Eagerly build the named services, recording each phase"""
+        for name in names:
+            getattr(self, name)
+
+
+# Global instance
+services = ServiceContainer()
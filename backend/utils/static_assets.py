@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/x-icon",
+                      "image/vnd.microsoft.icon")
+
+
+class Asset:
+    """One file with its content hash and precompressed encodings"""
+
+    def __init__(self, content: bytes, media_type: str):
+        self.content = content
+        self.media_type = media_type
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        self.encodings: Dict[str, bytes] = {}
+        self._compressed = False
+
+    @property
+    def compressible(self) -> bool:
+        return self.media_type.startswith(COMPRESSIBLE_TYPES)
+
+    def compress(self):
+        """Build gzip/brotli variants, keeping only those that are smaller"""
+        if self._compressed:
+            return
+        if self.compressible:
+            candidates = {'gzip': gzip.compress(self.content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates['br'] = brotli.compress(self.content, quality=11)
+            self.encodings = {enc: data for enc, data in candidates.items() if len(data) < len(self.content)}
+        self._compressed = True
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}-{encoding}"'
+
+
+def negotiate_encoding(accept_encoding: str, available) -> str:
+    """Pick the best available encoding (br > gzip > identity) from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.lower()] = quality
+
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+class StaticAssetPipeline:
+    """Fingerprints, precompresses and serves the static directory and HTML pages.
+
+    Assets get content-hashed URLs (/static/logo.<hash>.jpg) that are served
+    with long-lived immutable caching; pages reference those URLs and are
+    revalidated with ETags. Each response uses the best encoding the client
+    accepts (brotli when installed, else gzip).
+
+    `directory` is relative to the working directory, as the StaticFiles
+    mount it replaces was: backend/static when the app runs from backend/
+    (including the serverless entry point, which changes into it), the
+    top-level static/ when it runs from the repository root.
+    """
+
+    def __init__(self, directory: str = "static", url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self._lock = threading.RLock()
+        self._manifest: Optional[Dict[str, str]] = None
+        self._fingerprinted: Dict[str, str] = {}
+        self._assets: Dict[str, Asset] = {}
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        """Maps each static file name to its fingerprinted name"""
+        if self._manifest is None:
+            with self._lock:
+                if self._manifest is None:
+                    self._build_manifest()
+        return self._manifest
+
+    def _build_manifest(self):
+        manifest = {}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if not os.path.isfile(path) or name.endswith(".html"):
+                    continue
+                asset = self._load(path)
+                stem, ext = os.path.splitext(name)
+                manifest[name] = f"{stem}.{asset.digest}{ext}"
+        self._fingerprinted = {fp: name for name, fp in manifest.items()}
+        self._manifest = manifest
+
+    def _load(self, path: str) -> Asset:
+        asset = self._assets.get(path)
+        if asset is None:
+            with open(path, "rb") as f:
+                content = f.read()
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type == "text/html":
+                content = self._rewrite_references(content)
+            asset = Asset(content, media_type)
+            self._assets[path] = asset
+        return asset
+
+    def _rewrite_references(self, html: bytes) -> bytes:
+        """Point page references at fingerprinted asset URLs"""
+        for name, fingerprinted in self.manifest.items():
+            html = html.replace(f"{self.url_prefix}/{name}".encode(), f"{self.url_prefix}/{fingerprinted}".encode())
+        return html
+
+    def get(self, path: str) -> Asset:
+        asset = self._assets.get(path)
+        if asset is None:
+            self.manifest  # pages are rewritten against the fingerprints
+            with self._lock:
+                asset = self._load(path)
+        asset.compress()
+        return asset
+
+    def precompress_all(self) -> Dict[str, Dict[str, int]]:
+        """Startup step: build every asset and page variant; returns transfer sizes"""
+        sizes = {}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if os.path.isfile(path):
+                    sizes[path] = self._sizes(self.get(path))
+        return sizes
+
+    @staticmethod
+    def _sizes(asset: Asset) -> Dict[str, int]:
+        sizes = {'identity': len(asset.content)}
+        sizes.update({enc: len(data) for enc, data in asset.encodings.items()})
+        return sizes
+
+    def asset_response(self, request: Request, filename: str) -> Response:
+        """Serve /static/<filename>; fingerprinted names are cached forever"""
+        manifest = self.manifest
+        if filename in self._fingerprinted or filename in manifest:
+            original = self._fingerprinted.get(filename, filename)
+            immutable = filename in self._fingerprinted
+        elif filename.endswith(".html") and os.path.isfile(os.path.join(self.directory, filename)):
+            original, immutable = filename, False
+        else:
+            return Response(status_code=404)
+
+        path = os.path.join(self.directory, original)
+        return self._respond(request, self.get(path), IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE)
+
+    def page_response(self, request: Request, path: str) -> Response:
+        """Serve an HTML page with its asset URLs fingerprinted"""
+        if not os.path.isfile(path):
+            return Response(status_code=404)
+        return self._respond(request, self.get(path), REVALIDATE_CACHE)
+
+    def _respond(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), asset.encodings)
+        headers = {
+            "Cache-Control": cache_control,
+            "ETag": asset.etag(encoding),
+            "Vary": "Accept-Encoding",
+        }
+
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+
+        if encoding == "identity":
+            body = asset.content
+        else:
+            body = asset.encodings[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+# Global instance
+static_assets = StaticAssetPipeline()